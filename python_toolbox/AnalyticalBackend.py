@@ -0,0 +1,295 @@
+# This file is part of the Planar Inductor Toolbox
+# Copyright (C) 2025 Adrian Keil
+# 
+# The Planar Inductor Toolbox is free software: you can redistribute it 
+# and/or modify it under the terms of the GNU General Public License as 
+# published by the Free Software Foundation, either version 3 of the 
+# License, or (at your option) any later version.
+# 
+# The Planar Inductor Toolbox is distributed in the hope that it will be
+# useful, but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+# 
+# You should have received a copy of the GNU General Public License
+# along with this program.  
+# If not, see https://www.gnu.org/licenses/gpl-3.0.html
+
+import re
+import numpy as np
+import scipy.sparse
+import scipy.sparse.linalg
+from SolverBackend import SolverBackend, getShownFile
+
+class AnalyticalBackend(SolverBackend):
+    # Simplified solver for screening designs without FEMM (e.g. on Linux).
+    # The magnetic field is solved magnetostatically with finite differences
+    # (bilinear elements on a rectangular grid, i.e. a reluctance network)
+    # on the rectangles of the design: core rectangles with the linear
+    # permeability of the material, conductors with a uniform current
+    # density and air everywhere else. The field is zero at a boundary that
+    # is as far from the design as the design is large.
+    # Eddy currents are not solved. Instead, the voltage of each circuit
+    # contains the AC resistance of its conductors from Dowell's equation.
+    # Models and solutions only exist in memory. The grid is set with
+    # simParam.ANALYTICAL_GRID_SIZE.
+    
+    def __init__(self):
+        # Models by file name and solutions by solution file name
+        self.models = {}
+        self.solutions = {}
+        # Model, frequency, currents and potential of the last solve
+        self.solution = None
+    
+    def draw(self, myind, simnum, simParam):
+        if simnum == 0:
+            self.models[myind.filename_planar] = createModel(myind, simnum, simParam)
+        else:
+            self.models[myind.filename_axi] = createModel(myind, simnum, simParam)
+    
+    def solve(self, myind, simnum, baseFile, solutionFile, freq, currents, simParam):
+        if baseFile not in self.models:
+            self.draw(myind, simnum, simParam)
+        model = self.models[baseFile]
+        if currents is None:
+            freq = simParam.target_fs
+            currents = model['currents']
+        else:
+            currents = {**model['currents'], **currents}
+        
+        # Load of each node: The current of each conductor cell is
+        # distributed equally to its corners
+        load = np.zeros(model['numNodes'], dtype=complex)
+        for name, current in currents.items():
+            if name in model['circuits']:
+                circuit = model['circuits'][name]
+                np.add.at(load, model['cellNodes'][circuit['cells']].ravel(),
+                          np.repeat(current * model['cellArea'][circuit['cells']] / circuit['area'] / 4, 4))
+        
+        # The matrix is real, so solve real and imaginary part at once
+        potential = np.zeros(model['numNodes'], dtype=complex)
+        free = model['freeNodes']
+        rhs = np.column_stack([load[free].real, load[free].imag])
+        sol = model['lu'].solve(rhs)
+        potential[free] = sol[:, 0] + 1j * sol[:, 1]
+        
+        self.solution = {'model': model, 'freq': freq, 'currents': currents, 'potential': potential}
+        self.solutions[solutionFile] = self.solution
+    
+    def getCircuitProperties(self, name):
+        model = self.solution['model']
+        current = self.solution['currents'].get(name, 0)
+        if name not in model['circuits']:
+            return [current, 0, 0]
+        circuit = model['circuits'][name]
+        # Flux linkage for the uniform current density of the circuit
+        cellPotential = np.mean(self.solution['potential'][model['cellNodes'][circuit['cells']]], axis=1)
+        fluxLinkage = model['linkageFactor'] * np.sum(cellPotential * model['cellArea'][circuit['cells']]) / circuit['area']
+        voltage = getResistance(circuit, self.solution['freq'], model['rho'], model['mu0']) * current + 2j * np.pi * self.solution['freq'] * fluxLinkage
+        return [current, voltage, fluxLinkage]
+    
+    def getBlockIntegrals(self, centers):
+        model = self.solution['model']
+        bx, by = getFluxDensity(model, self.solution['potential'])
+        vol = np.zeros(centers.shape[1])
+        bxAvg = np.zeros(centers.shape[1], dtype=complex)
+        byAvg = np.zeros(centers.shape[1], dtype=complex)
+        # Points are in mm
+        centers = np.asarray(centers) * 1e-3
+        rects = model['coreRects']
+        for i in range(centers.shape[1]):
+            # Find the core rectangle that contains the point
+            idx = np.flatnonzero((rects[:, 0, 0] < centers[0, i]) & (centers[0, i] < rects[:, 1, 0]) &
+                                 (rects[:, 0, 1] < centers[1, i]) & (centers[1, i] < rects[:, 1, 1]))[0]
+            cells = model['coreCells'][idx]
+            weight = model['cellVolume'][cells]
+            vol[i] = np.sum(weight)  # Volume in m^3
+            bxAvg[i] = np.sum(weight * bx[cells]) / vol[i]  # flux in T
+            byAvg[i] = np.sum(weight * by[cells]) / vol[i]  # flux in T
+        return vol, bxAvg, byAvg
+    
+    def close(self, simParam):
+        self.solution = None
+    
+    def showDesign(self, myind, result, sim, harmonic, type, maxScale, simParam):
+        import matplotlib.pyplot as plt
+        freqfile = getShownFile(myind, result, sim, harmonic)
+        if freqfile not in self.solutions:
+            print(f"Warning: No solution for {freqfile} available")
+            return
+        if not type == 'mag':
+            print(f"Warning: Plot type '{type}' is not available, showing 'mag'")
+        solution = self.solutions[freqfile]
+        model = solution['model']
+        bx, by = getFluxDensity(model, solution['potential'])
+        bmag = np.sqrt(np.abs(bx)**2 + np.abs(by)**2).reshape(len(model['x']) - 1, len(model['y']) - 1)
+        
+        plt.figure()
+        plt.pcolormesh(model['x'] * 1e3, model['y'] * 1e3, bmag.T, vmin=0, vmax=maxScale)
+        plt.colorbar(label='|B| in T')
+        for rects in [model['coreRects'], model['conductorRects']]:
+            for rect in rects * 1e3:
+                plt.plot(rect[[0, 1, 1, 0, 0], 0], rect[[0, 0, 1, 1, 0], 1], 'w', linewidth=0.5)
+        rects = model['coreRects'] * 1e3
+        plt.xlim(np.min(rects[:, :, 0]) * 1.1, np.max(rects[:, :, 0]) * 1.1)
+        plt.ylim(np.min(rects[:, :, 1]) * 1.1, np.max(rects[:, :, 1]) * 1.1)
+        plt.gca().set_aspect('equal')
+        plt.title(f"{freqfile}")
+        plt.show()
+
+def createModel(myind, simnum, simParam):
+    # Creates the grid, materials and factorized system matrix of the
+    # planar (simnum == 0) or axisymmetric (simnum == 1) model of myind.
+    # The unknown is the vector potential A for planar and r*A for
+    # axisymmetric models. All lengths are in m.
+    if simnum == 0:
+        coreRects = np.asarray(myind.rects_planar, dtype=float)
+    else:
+        coreRects = np.asarray(myind.rects_axi, dtype=float)
+    conductorRects, conductorCircuits = myind.getConductors(simnum, simParam)
+    # Sort the corners, so each rectangle is [[xmin, ymin], [xmax, ymax]]
+    coreRects = np.sort(coreRects, axis=1) * 1e-3
+    conductorRects = np.sort(np.asarray(conductorRects, dtype=float), axis=1) * 1e-3
+    allRects = np.concatenate([coreRects, conductorRects])
+    
+    # Grid lines at every edge, refined to the grid size within the design
+    # and growing towards the boundary
+    low = np.min(allRects, axis=(0, 1))
+    high = np.max(allRects, axis=(0, 1))
+    margin = np.max(high - low)
+    gridSize = simParam.ANALYTICAL_GRID_SIZE * 1e-3
+    if simnum == 0:
+        x = getGridLines(allRects[:, :, 0], low[0] - margin, high[0] + margin, gridSize)
+    else:
+        x = getGridLines(allRects[:, :, 0], 0, high[0] + margin, gridSize)
+    y = getGridLines(allRects[:, :, 1], low[1] - margin, high[1] + margin, gridSize)
+    
+    # Cells (index i * (len(y) - 1) + j) and their corner nodes
+    # (index i * len(y) + j)
+    hx, hy = np.meshgrid(np.diff(x), np.diff(y), indexing='ij')
+    xc, yc = np.meshgrid((x[:-1] + x[1:]) / 2, (y[:-1] + y[1:]) / 2, indexing='ij')
+    hx, hy, xc, yc = hx.ravel(), hy.ravel(), xc.ravel(), yc.ravel()
+    i, j = np.meshgrid(np.arange(len(x) - 1), np.arange(len(y) - 1), indexing='ij')
+    node = (i * len(y) + j).ravel()
+    cellNodes = np.column_stack([node, node + len(y), node + len(y) + 1, node + 1])
+    cellArea = hx * hy
+    
+    def inside(rect):
+        return np.flatnonzero((rect[0, 0] < xc) & (xc < rect[1, 0]) & (rect[0, 1] < yc) & (yc < rect[1, 1]))
+    
+    # Reluctivity of each cell
+    nu = np.full(len(xc), 1 / simParam.mu0)
+    coreCells = [inside(rect) for rect in coreRects]
+    for cells in coreCells:
+        nu[cells] = 1 / (simParam.mu0 * myind.material.mu)
+    if simnum == 0:
+        cellVolume = cellArea * myind.depth_planar * 1e-3
+        linkageFactor = myind.depth_planar * 1e-3
+    else:
+        nu = nu / xc
+        cellVolume = cellArea * 2 * np.pi * xc
+        linkageFactor = 2 * np.pi
+    
+    # Stiffness matrix of the bilinear elements
+    kx = np.array([[2, -2, -1, 1], [-2, 2, 1, -1], [-1, 1, 2, -2], [1, -1, -2, 2]]) / 6
+    ky = np.array([[2, 1, -1, -2], [1, 2, -2, -1], [-1, -2, 2, 1], [-2, -1, 1, 2]]) / 6
+    values = nu[:, None, None] * ((hy / hx)[:, None, None] * kx + (hx / hy)[:, None, None] * ky)
+    numNodes = len(x) * len(y)
+    matrix = scipy.sparse.coo_matrix((values.ravel(), (np.repeat(cellNodes, 4, axis=1).ravel(), np.tile(cellNodes, (1, 4)).ravel())),
+                                     shape=(numNodes, numNodes)).tocsc()
+    # The potential is zero at the boundary (and at the axis)
+    ix, iy = np.meshgrid(np.arange(len(x)), np.arange(len(y)), indexing='ij')
+    freeNodes = np.flatnonzero(((ix > 0) & (ix < len(x) - 1) & (iy > 0) & (iy < len(y) - 1)).ravel())
+    lu = scipy.sparse.linalg.splu(matrix[freeNodes][:, freeNodes].tocsc())
+    
+    # Conductors of each circuit. The turns of one side of a winding (same
+    # name without the number of the turn) are the layers for Dowell's
+    # equation; parallel conductors of one turn share the current of a layer
+    circuits = {}
+    for rect, name in zip(conductorRects, conductorCircuits):
+        cells = inside(rect)
+        if name not in circuits:
+            circuits[name] = {'cells': [], 'area': 0, 'conductors': [], 'group': re.sub(r'\d+$', '', name)}
+        circuits[name]['cells'].append(cells)
+        circuits[name]['area'] += np.sum(cellArea[cells])
+        # Conductor length, area and thickness (smaller dimension)
+        if simnum == 0:
+            length = myind.depth_planar * 1e-3
+        else:
+            length = 2 * np.pi * np.mean(rect[:, 0])
+        width, height = rect[1] - rect[0]
+        circuits[name]['conductors'].append([length, width * height, min(width, height)])
+    for name in circuits:
+        circuits[name]['cells'] = np.concatenate(circuits[name]['cells'])
+        circuits[name]['conductors'] = np.array(circuits[name]['conductors'])
+        circuits[name]['layers'] = sum(circuit['group'] == circuits[name]['group'] for circuit in circuits.values())
+    
+    # Currents of the drawing (see drawPlanarInductor and
+    # drawAxisymmetricInductor)
+    currents = {}
+    for i in range(1, myind.turns + 1):
+        if simnum == 0:
+            currents[f'Al{i}'] = simParam.iout_avg / 2
+            currents[f'Ar{i}'] = -simParam.iout_avg / 2
+            currents[f'Bl{i}'] = 0.0001
+            currents[f'Br{i}'] = 0.0001
+        else:
+            currents[str(i)] = simParam.iout_avg / 2
+    
+    return {'x': x, 'y': y, 'cellNodes': cellNodes, 'cellArea': cellArea, 'cellVolume': cellVolume,
+            'cellCenters': (xc, yc), 'simnum': simnum, 'numNodes': numNodes, 'freeNodes': freeNodes, 'lu': lu,
+            'coreRects': coreRects, 'coreCells': coreCells, 'conductorRects': conductorRects,
+            'circuits': circuits, 'currents': currents, 'linkageFactor': linkageFactor, 'rho': simParam.rho_copper, 'mu0': simParam.mu0}
+
+def getGridLines(edges, start, end, gridSize):
+    # Returns grid lines at all edges, with a spacing of at most gridSize
+    # between the edges and a geometrically growing spacing from the outer
+    # edges towards start and end
+    edges = np.unique(np.round(edges, 9))
+    lines = [edges[:1]]
+    for a, b in zip(edges[:-1], edges[1:]):
+        lines.append(np.linspace(a, b, int(np.ceil((b - a) / gridSize)) + 1)[1:])
+    lines = np.concatenate(lines)
+    
+    outer = [[], []]
+    for side, (edge, boundary) in enumerate([(edges[0], start), (edges[-1], end)]):
+        step = gridSize
+        pos = edge + np.sign(boundary - edge) * step
+        while np.abs(boundary - pos) > step:
+            outer[side].append(pos)
+            step = step * 1.5
+            pos = pos + np.sign(boundary - edge) * step
+        if not edge == boundary:
+            outer[side].append(boundary)
+    return np.concatenate([outer[0][::-1], lines, outer[1]])
+
+def getFluxDensity(model, potential):
+    # Returns the flux density (x and y component) of each cell
+    cellPotential = potential[model['cellNodes']]
+    hx = np.diff(model['x'])[:, None] * np.ones(len(model['y']) - 1)
+    hy = np.ones(len(model['x']) - 1)[:, None] * np.diff(model['y'])
+    # Derivatives of the potential in x and y (average over the cell)
+    dx = (cellPotential[:, 1] + cellPotential[:, 2] - cellPotential[:, 0] - cellPotential[:, 3]) / (2 * hx.ravel())
+    dy = (cellPotential[:, 2] + cellPotential[:, 3] - cellPotential[:, 0] - cellPotential[:, 1]) / (2 * hy.ravel())
+    if model['simnum'] == 0:
+        return dy, -dx
+    else:
+        # Potential is r*A
+        r = model['cellCenters'][0]
+        return -dy / r, dx / r
+
+def getResistance(circuit, freq, rho, mu0):
+    # AC resistance of a circuit from Dowell's equation (factor averaged over
+    # the layers of the winding side). The current is split between the
+    # parallel conductors like at DC.
+    length, area, thickness = circuit['conductors'].T
+    resistance = rho * length / area
+    share = (1 / resistance) / np.sum(1 / resistance)
+    if freq > 0:
+        delta = np.maximum(thickness / np.sqrt(rho / (np.pi * freq * mu0)), 1e-3)
+        xi1 = (np.sinh(2 * delta) + np.sin(2 * delta)) / (np.cosh(2 * delta) - np.cos(2 * delta))
+        xi2 = (np.sinh(delta) - np.sin(delta)) / (np.cosh(delta) + np.cos(delta))
+        factor = delta * (xi1 + 2 / 3 * (circuit['layers']**2 - 1) * xi2)
+    else:
+        factor = 1
+    return np.sum(factor * share**2 * resistance)
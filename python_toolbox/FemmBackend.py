@@ -0,0 +1,175 @@
+# This file is part of the Planar Inductor Toolbox
+# Copyright (C) 2025 Adrian Keil
+# 
+# The Planar Inductor Toolbox is free software: you can redistribute it 
+# and/or modify it under the terms of the GNU General Public License as 
+# published by the Free Software Foundation, either version 3 of the 
+# License, or (at your option) any later version.
+# 
+# The Planar Inductor Toolbox is distributed in the hope that it will be
+# useful, but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+# 
+# You should have received a copy of the GNU General Public License
+# along with this program.  
+# If not, see https://www.gnu.org/licenses/gpl-3.0.html
+
+import os
+import femm
+import numpy as np
+from FemmSession import femmSession
+from SolverBackend import SolverBackend, getShownFile
+from simulationCache import isReuseAllowed
+from drawPlanarInductor import drawPlanarInductor
+from drawAxisymmetricInductor import drawAxisymmetricInductor
+from writeFemFile import writeFemFile, writeFemVariant
+from FemmSolution import FemmSolution
+
+# Lua script that extracts all results of a solution with one call to FEMM
+# (instead of one call per circuit property and block integral). The tables
+# circuits (names) and blocks (x1, y1, x2, y2, ...) and the file results are
+# added in front of it. Each line of the file contains three complex values
+# as pairs of real and imaginary part: current, voltage and flux linkage of
+# each circuit, then volume, integral of Bx and integral of By of each block
+_extractionScript = """
+function writeComplex(values)
+    for i = 1, getn(values) do
+        write(results, format("%.17g %.17g ", re(values[i]), im(values[i])))
+    end
+    write(results, "\\n")
+end
+for i = 1, getn(circuits) do
+    current, voltage, fluxLinkage = mo_getcircuitproperties(circuits[i])
+    writeComplex({current, voltage, fluxLinkage})
+end
+for i = 1, getn(blocks), 2 do
+    mo_selectblock(blocks[i], blocks[i + 1])
+    writeComplex({mo_blockintegral(10), mo_blockintegral(8), mo_blockintegral(9)})
+    mo_clearblock()
+end
+closefile(results)
+"""
+
+class FemmBackend(SolverBackend):
+    # Solves the models with FEMM. The models and solutions are stored as
+    # .fem and .ans files. All backends share the FEMM instance of
+    # femmSession.
+    
+    def __init__(self):
+        # Name of the solution that is currently loaded
+        self.solutionFile = None
+        # Evaluate the block integrals from the .ans file (see FemmSolution)
+        self.readAnsFiles = False
+    
+    def draw(self, myind, simnum, simParam):
+        if simParam.WRITE_FEM_FILES:
+            if simnum == 0:
+                filename = f"{myind.filename_planar}.fem"
+            else:
+                filename = f"{myind.filename_axi}.fem"
+            if not (os.path.isfile(filename) and isReuseAllowed(simParam)):
+                if os.path.dirname(filename):
+                    os.makedirs(os.path.dirname(filename), exist_ok=True)
+                writeFemFile(myind, simnum, simParam, filename)
+        elif simnum == 0:
+            drawPlanarInductor(myind, simParam)
+        else:
+            drawAxisymmetricInductor(myind, simParam)
+    
+    def solve(self, myind, simnum, baseFile, solutionFile, freq, currents, simParam):
+        femmSession.open(simParam)
+        if currents is None:
+            femmSession.opendocument(f"{baseFile}.fem")
+        elif os.path.isfile(f"{solutionFile}.fem") and isReuseAllowed(simParam):
+            femmSession.opendocument(f"{solutionFile}.fem")
+        elif simParam.WRITE_FEM_FILES:
+            # Only frequency and currents change
+            writeFemVariant(f"{baseFile}.fem", f"{solutionFile}.fem", freq, currents)
+            femmSession.opendocument(f"{solutionFile}.fem")
+        else:
+            # Adjust frequency and currents
+            femmSession.opendocument(f"{baseFile}.fem")
+            if simnum == 0:
+                femm.mi_probdef(freq, 'millimeters', 'planar', 1.e-8, myind.depth_planar, 30)
+            else:
+                femm.mi_probdef(freq, 'millimeters', 'axi', 1.e-8, 0, 30)
+            for name, current in currents.items():
+                femm.mi_setcurrent(name, current)
+            femm.mi_saveas(f"{solutionFile}.fem")
+        
+        if not os.path.isfile(f"{solutionFile}.ans") or not isReuseAllowed(simParam):
+            femm.mi_analyze()
+        femmSession.loadsolution()
+        self.solutionFile = solutionFile
+        self.readAnsFiles = simParam.READ_ANS_FILES
+    
+    def getCircuitProperties(self, name):
+        return femm.mo_getcircuitproperties(name)
+    
+    def getBlockIntegrals(self, centers):
+        vol = np.zeros(centers.shape[1])
+        bx = np.zeros(centers.shape[1], dtype=complex)
+        by = np.zeros(centers.shape[1], dtype=complex)
+        for i in range(centers.shape[1]):
+            femm.mo_selectblock(centers[0, i], centers[1, i])
+            vol[i] = femm.mo_blockintegral(10)  # Volume in m^3
+            # Get the average flux densities
+            bx[i] = femm.mo_blockintegral(8) / vol[i]  # flux in T
+            by[i] = femm.mo_blockintegral(9) / vol[i]  # flux in T
+            femm.mo_clearblock()
+        return vol, bx, by
+    
+    def getResults(self, circuitNames, centers):
+        # The script and its results are stored next to the solution and
+        # removed afterwards. FEMM wants forward slashes in Lua strings
+        # With READ_ANS_FILES, FEMM only extracts the circuit properties
+        blockCenters = np.zeros((2, 0)) if self.readAnsFiles else centers
+        scriptFile = os.path.abspath(f"{self.solutionFile}_extract.lua").replace('\\', '/')
+        resultFile = os.path.abspath(f"{self.solutionFile}_extract.txt").replace('\\', '/')
+        with open(scriptFile, 'w') as f:
+            f.write(f'results = openfile("{resultFile}", "w")\n')
+            f.write('circuits = {' + ', '.join(f'"{name}"' for name in circuitNames) + '}\n')
+            f.write('blocks = {' + ', '.join(repr(value) for value in np.asarray(blockCenters, dtype=float).T.ravel().tolist()) + '}\n')
+            f.write(_extractionScript)
+        femm.callfemm(f'dofile("{scriptFile}")')
+        
+        values = np.loadtxt(resultFile, ndmin=2)
+        values = (values[:, 0::2] + 1j * values[:, 1::2]).reshape(-1, 3)
+        os.remove(scriptFile)
+        os.remove(resultFile)
+        properties = values[:len(circuitNames)]
+        if self.readAnsFiles:
+            vol, bx, by = FemmSolution(f"{self.solutionFile}.ans").getBlockIntegrals(centers)
+        else:
+            vol = np.real(values[len(circuitNames):, 0])  # Volume in m^3
+            # Average flux densities in T
+            bx = values[len(circuitNames):, 1] / vol
+            by = values[len(circuitNames):, 2] / vol
+        return properties, vol, bx, by
+    
+    def close(self, simParam):
+        femmSession.close(simParam)
+    
+    def shutdown(self):
+        femmSession.shutdown()
+    
+    def run(self, msg, simParam, function, *args):
+        return femmSession.run(msg, simParam, function, *args)
+    
+    def showDesign(self, myind, result, sim, harmonic, type, maxScale, simParam):
+        femm.openfemm(0)
+        freqfile = getShownFile(myind, result, sim, harmonic)
+        if sim == 0:
+            rects = myind.rects_planar
+        else:
+            rects = myind.rects_axi
+        femm.opendocument(f"{freqfile}.fem")
+        femm.mi_loadsolution()
+
+        femm.mo_zoom(np.min(rects[:, :, 0]) * 1.1,
+                    np.min(rects[:, :, 1]) * 1.1,
+                    np.max(rects[:, :, 0]) * 1.1,
+                    np.max(rects[:, :, 1]) * 1.1)
+        # Show flux-density
+        femm.mo_showdensityplot(1, 0, maxScale, 0, type)
@@ -0,0 +1,107 @@
+# This file is part of the Planar Inductor Toolbox
+# Copyright (C) 2025 Adrian Keil
+# 
+# The Planar Inductor Toolbox is free software: you can redistribute it 
+# and/or modify it under the terms of the GNU General Public License as 
+# published by the Free Software Foundation, either version 3 of the 
+# License, or (at your option) any later version.
+# 
+# The Planar Inductor Toolbox is distributed in the hope that it will be
+# useful, but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+# 
+# You should have received a copy of the GNU General Public License
+# along with this program.  
+# If not, see https://www.gnu.org/licenses/gpl-3.0.html
+
+import femm
+
+class FemmSession:
+    # Keeps one FEMM instance alive for all draws and solves (also across
+    # designs) instead of starting FEMM for every document. Documents are
+    # opened inside the running instance and closed again when the work on
+    # them is done. FEMM is only restarted if something fails.
+    # pyfemm controls one FEMM instance per Python process, so there is one
+    # session object (femmSession below) that is used by all modules.
+    # With simParam.PERSISTENT_FEMM = 0, FEMM is started and closed for every
+    # document as before.
+    
+    def __init__(self):
+        self.running = False
+        # Documents that are currently open
+        self.preprocessor = False
+        self.postprocessor = False
+    
+    def open(self, simParam):
+        # Make sure that FEMM is running
+        if not self.running:
+            femm.openfemm(simParam.HIDE_FEMM)
+            if simParam.MINIMIZE_FEMM:
+                femm.main_minimize()
+            self.running = True
+    
+    def newdocument(self):
+        # Create a new magnetics document
+        femm.newdocument(0)
+        self.preprocessor = True
+    
+    def opendocument(self, filename):
+        femm.opendocument(filename)
+        self.preprocessor = True
+    
+    def loadsolution(self):
+        femm.mi_loadsolution()
+        self.postprocessor = True
+    
+    def close(self, simParam):
+        # Finish the work on the current documents. FEMM keeps running for the
+        # next document if PERSISTENT_FEMM is set
+        if simParam.PERSISTENT_FEMM:
+            self.closeDocuments()
+        else:
+            self.shutdown()
+    
+    def closeDocuments(self):
+        if self.postprocessor:
+            femm.mo_close()
+        if self.preprocessor:
+            femm.mi_close()
+        self.preprocessor = False
+        self.postprocessor = False
+    
+    def shutdown(self):
+        # Close FEMM
+        if self.running:
+            try:
+                femm.closefemm()
+            except Exception:
+                # FEMM might already be gone (e.g. after a crash)
+                pass
+        self.running = False
+        self.preprocessor = False
+        self.postprocessor = False
+    
+    def run(self, msg, simParam, function, *args):
+        # Calls function(*args), which does its work in FEMM. If the
+        # connection to FEMM fails, FEMM is restarted and function is called
+        # once more. All FEMM functions of the toolbox start from files, so
+        # they can be repeated. Other errors are raised immediately.
+        try:
+            return function(*args)
+        except Exception as e:
+            if not isFemmFailure(e):
+                raise
+            msg.print_msg(0, f"FEMM failed ({e}), restarting FEMM\n", simParam)
+            self.shutdown()
+            return function(*args)
+
+def isFemmFailure(e):
+    # Checks if the exception e means that the connection to FEMM failed
+    # (e.g. FEMM crashed or was closed). pyfemm talks to FEMM via COM on
+    # Windows, which raises pywintypes.com_error
+    module = type(e).__module__.split('.')[0]
+    return isinstance(e, (ConnectionError, TimeoutError)) or type(e).__name__ == 'com_error' or \
+        module in ['pywintypes', 'pythoncom', 'win32com']
+
+femmSession = FemmSession()
@@ -0,0 +1,203 @@
+# This file is part of the Planar Inductor Toolbox
+# Copyright (C) 2025 Adrian Keil
+# 
+# The Planar Inductor Toolbox is free software: you can redistribute it 
+# and/or modify it under the terms of the GNU General Public License as 
+# published by the Free Software Foundation, either version 3 of the 
+# License, or (at your option) any later version.
+# 
+# The Planar Inductor Toolbox is distributed in the hope that it will be
+# useful, but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+# 
+# You should have received a copy of the GNU General Public License
+# along with this program.  
+# If not, see https://www.gnu.org/licenses/gpl-3.0.html
+
+import re
+import mmap
+import numpy as np
+
+# Length of the FEMM length units in m
+_lengthUnits = {'inches': 0.0254, 'millimeters': 1e-3, 'centimeters': 1e-2, 'meters': 1,
+                'mils': 2.54e-5, 'micrometers': 1e-6}
+
+class FemmSolution:
+    # Reads a FEMM magnetics solution (.ans file) without FEMM and evaluates
+    # it with NumPy, so solutions can be post-processed on any system.
+    # The file is memory-mapped and the tables of the solution (nodes,
+    # elements) are parsed in one piece each.
+    # Block integrals and flux linkages are evaluated on the first-order
+    # triangles like FEMM does, with the following approximations:
+    # - The current density for the flux linkage is evaluated at the
+    #   centroid of each triangle, except for the eddy current term
+    #   (integrated exactly for the linear potential)
+    # - For axisymmetric problems, B is evaluated per triangle as
+    #   Br = -dA/dz and Bz = dA/dr + A/r at the centroid
+    
+    def __init__(self, filename):
+        with open(filename, 'rb') as f:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                start = data.find(b'[Solution]')
+                if start < 0:
+                    raise Exception(f"{filename} does not contain a solution")
+                self.parseHeader(data[:start].decode())
+                
+                # Start of each line of the solution
+                view = np.frombuffer(data, dtype=np.uint8)
+                lineStarts = np.flatnonzero(view[start:] == ord('\n')) + start + 1
+                del view
+                lineStarts = np.append(lineStarts[lineStarts < len(data)], len(data))
+                
+                # Nodes: x, y, A (real and imaginary part for AC problems)
+                line = 0
+                numNodes = int(data[lineStarts[line]:lineStarts[line + 1]])
+                nodes = _readTable(data, lineStarts, line + 1, numNodes)
+                line = line + 1 + numNodes
+                # Elements: Nodes and block label
+                numElements = int(data[lineStarts[line]:lineStarts[line + 1]])
+                elements = _readTable(data, lineStarts, line + 1, numElements)
+        
+        self.nodes = nodes[:, :2] * self.unit  # in m
+        if self.freq == 0:
+            self.potential = nodes[:, 2].astype(complex)
+        else:
+            self.potential = nodes[:, 2] + 1j * nodes[:, 3]
+        self.elements = elements[:, :3].astype(int)
+        self.elementLabels = elements[:, 3].astype(int)
+        self.calcElements()
+    
+    def parseHeader(self, header):
+        # Problem definition, circuits and block labels of the model
+        def field(name):
+            return re.search(r'\[' + name + r'\]\s*=\s*"?([^"\r\n]*)', header).group(1).strip()
+        self.freq = float(field('Frequency'))
+        self.unit = _lengthUnits[field('LengthUnits')]
+        self.depth = float(field('Depth')) * self.unit
+        self.axisymmetric = field('ProblemType').startswith('axi')
+        
+        # Circuits in the order of the file: name and current
+        self.circuits = {}
+        self.circuitTypes = {}
+        for block in re.findall(r'<BeginCircuit>(.*?)<EndCircuit>', header, re.DOTALL):
+            name = re.search(r'<CircuitName>\s*=\s*"(.*?)"', block).group(1)
+            current = float(re.search(r'<TotalAmps_re>\s*=\s*(\S+)', block).group(1))
+            current = current + 1j * float(re.search(r'<TotalAmps_im>\s*=\s*(\S+)', block).group(1))
+            self.circuits[name] = current
+            self.circuitTypes[name] = int(re.search(r'<CircuitType>\s*=\s*(\S+)', block).group(1))
+        
+        # Conductivity of the block properties in S/m (MS/m in the file)
+        sigma = [float(re.search(r'<Sigma>\s*=\s*(\S+)', block).group(1)) * 1e6
+                 for block in re.findall(r'<BeginBlock>(.*?)<EndBlock>', header, re.DOTALL)]
+        
+        # Block labels: x, y, block property, mesh size, circuit, ...
+        numLabels = int(re.search(r'\[NumBlockLabels\]\s*=\s*(\d+)', header).group(1))
+        lines = header[header.index('[NumBlockLabels]'):].splitlines()[1:numLabels + 1]
+        self.labelCircuits = np.array([int(line.split()[4]) for line in lines], dtype=int)
+        # Block properties are numbered from 1, 0 for labels without one
+        blockProps = [int(line.split()[2]) for line in lines]
+        self.labelSigma = np.array([sigma[i - 1] if i > 0 else 0 for i in blockProps], dtype=float)
+    
+    def calcElements(self):
+        # Area, volume, centroid and flux density of each element
+        x = self.nodes[self.elements, 0]
+        y = self.nodes[self.elements, 1]
+        a = self.potential[self.elements]
+        doubleArea = (x[:, 1] - x[:, 0]) * (y[:, 2] - y[:, 0]) - (x[:, 2] - x[:, 0]) * (y[:, 1] - y[:, 0])
+        # Gradient of the linear potential
+        dadx = (a[:, 0] * (y[:, 1] - y[:, 2]) + a[:, 1] * (y[:, 2] - y[:, 0]) + a[:, 2] * (y[:, 0] - y[:, 1])) / doubleArea
+        dady = (a[:, 0] * (x[:, 2] - x[:, 1]) + a[:, 1] * (x[:, 0] - x[:, 2]) + a[:, 2] * (x[:, 1] - x[:, 0])) / doubleArea
+        self.area = np.abs(doubleArea) / 2
+        self.centroid = np.column_stack([np.mean(x, axis=1), np.mean(y, axis=1)])
+        self.meanPotential = np.mean(a, axis=1)
+        if self.axisymmetric:
+            r = self.centroid[:, 0]
+            self.volume = 2 * np.pi * r * self.area
+            self.bx = -dady
+            self.by = dadx + np.divide(self.meanPotential, r, out=np.zeros_like(self.meanPotential), where=r > 0)
+        else:
+            self.volume = self.depth * self.area
+            self.bx = dady
+            self.by = -dadx
+    
+    def findElements(self, points):
+        # Returns the index of the element that contains each point
+        # (points[:, i] in the length unit of the file)
+        points = np.asarray(points, dtype=float).reshape(2, -1) * self.unit
+        x = self.nodes[self.elements, 0]
+        y = self.nodes[self.elements, 1]
+        index = np.zeros(points.shape[1], dtype=int)
+        for i in range(points.shape[1]):
+            # Barycentric coordinates of the point in every element
+            d = (y[:, 1] - y[:, 2]) * (x[:, 0] - x[:, 2]) + (x[:, 2] - x[:, 1]) * (y[:, 0] - y[:, 2])
+            l0 = ((y[:, 1] - y[:, 2]) * (points[0, i] - x[:, 2]) + (x[:, 2] - x[:, 1]) * (points[1, i] - y[:, 2])) / d
+            l1 = ((y[:, 2] - y[:, 0]) * (points[0, i] - x[:, 2]) + (x[:, 0] - x[:, 2]) * (points[1, i] - y[:, 2])) / d
+            inside = np.flatnonzero((l0 >= -1e-12) & (l1 >= -1e-12) & (1 - l0 - l1 >= -1e-12))
+            if len(inside) == 0:
+                raise Exception(f"Point ({points[0, i] / self.unit}, {points[1, i] / self.unit}) is outside of the mesh")
+            index[i] = inside[0]
+        return index
+    
+    def getBlockIntegrals(self, centers):
+        # Returns the volume in m^3 and the average Bx and By in T of the
+        # blocks that contain the points centers[:, i] (same as block
+        # integrals 10, 8/10 and 9/10 in FEMM)
+        labels = self.elementLabels[self.findElements(centers)]
+        vol = np.zeros(len(labels))
+        bx = np.zeros(len(labels), dtype=complex)
+        by = np.zeros(len(labels), dtype=complex)
+        for i, label in enumerate(labels):
+            selected = self.elementLabels == label
+            vol[i] = np.sum(self.volume[selected])
+            bx[i] = np.sum(self.volume[selected] * self.bx[selected]) / vol[i]
+            by[i] = np.sum(self.volume[selected] * self.by[selected]) / vol[i]
+        return vol, bx, by
+    
+    def getFluxLinkage(self, name):
+        # Returns the flux linkage of the circuit name in Wb (integral of A*J
+        # over the conductors divided by the current, like FEMM).
+        # All conductors of a parallel circuit have the same voltage drop,
+        # so the current density is J = sigma*(-j*omega*A + w*E) with w = 1
+        # (planar) or w = 1/r (axisymmetric) and E such that the total
+        # current is I. For planar conductors of one conductivity, this is
+        # J = -j*omega*sigma*(A - mean(A)) + I/S, i.e. it includes the eddy
+        # currents (skin and proximity effect). Conductors without
+        # conductivity have a uniform current density.
+        index = list(self.circuits).index(name) + 1
+        if self.circuitTypes[name] != 0:
+            raise Exception(f"Flux linkage of circuit {name}: Only parallel circuits are supported")
+        selected = self.labelCircuits[self.elementLabels] == index
+        area = self.area[selected]
+        volume = self.volume[selected]
+        meanPotential = self.meanPotential[selected]
+        # Mean of A^2 over each triangle (exact for the linear potential)
+        a = self.potential[self.elements[selected]]
+        meanSquare = (np.sum(a ** 2, axis=1) + a[:, 0] * a[:, 1] + a[:, 1] * a[:, 2] + a[:, 2] * a[:, 0]) / 6
+        
+        sigma = self.labelSigma[self.elementLabels[selected]]
+        omega = 2 * np.pi * self.freq
+        if self.axisymmetric:
+            weight = 1 / self.centroid[selected, 0]
+        else:
+            weight = np.ones(len(area))
+        if np.all(sigma == 0):
+            # Uniform current density
+            sigma = np.ones(len(area))
+            weight = np.ones(len(area))
+            omega = 0
+        
+        current = self.circuits[name]
+        if current == 0:
+            # No current: flux linkage from the induced voltage (E with the
+            # total current 0)
+            return np.sum(volume * sigma * weight * meanPotential) / np.sum(sigma * weight * area)
+        field = (current + 1j * omega * np.sum(sigma * meanPotential * area)) / np.sum(sigma * weight * area)
+        return np.sum(volume * sigma * (weight * field * meanPotential - 1j * omega * meanSquare)) / current
+
+def _readTable(data, lineStarts, first, count):
+    # Parses count lines of numbers starting at line first. All lines have
+    # as many columns as the first one
+    columns = len(data[lineStarts[first]:lineStarts[first + 1]].split())
+    values = np.fromstring(data[lineStarts[first]:lineStarts[first + count]], sep=' ')
+    return values.reshape(count, columns)
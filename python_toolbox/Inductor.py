@@ -17,10 +17,11 @@
 
 import os
 import numpy as np
-import femm
 from Material import Material
 from PCB import PCB
 from standardWinding import standardWinding
+from SolverBackend import getSolverBackend
+from simulationCache import getModelKey
 
 class Inductor:
     # This class stores all parameters that are specific to a certain
@@ -39,6 +40,8 @@ class Inductor:
 
         # Unique name of the design
         self.uniqueName = ""
+        # Number of the design in designs (None if not created by designs)
+        self.design_num = None
 
         # Filenames of the simulation files in their basic configuration
         self.filename_planar = ""
@@ -135,6 +138,35 @@ class Inductor:
         self.uniqueName = f"{customText}_{self.description}_{self.material.name}_whd_{self.dimension['width']:.2f}_{self.dimension['height']:.2f}_{self.dimension['depth']:.2f}"
         self.filename_planar = os.path.join(simParam.femm_folder, f"planar_{self.uniqueName}")
         self.filename_axi = os.path.join(simParam.femm_folder, f"axi_{self.uniqueName}")
+        # Name the files by their content instead (see CONTENT_CACHE)
+        if simParam.CONTENT_CACHE:
+            if len(self.rects_planar) > 0:
+                self.filename_planar = os.path.join(simParam.femm_folder, 'cache', getModelKey(self, 0, simParam))
+            if len(self.rects_axi) > 0:
+                self.filename_axi = os.path.join(simParam.femm_folder, 'cache', getModelKey(self, 1, simParam))
+
+    # Returns the conductors of the windings for the planar (simnum == 0) or
+    # axisymmetric (simnum == 1) simulation: The rectangles (same layout as
+    # rects_planar) and the name of the circuit of each conductor
+    def getConductors(self, simnum, simParam):
+        if simnum == 0:
+            windings = [('Al', self.winding['planar_start'][0], 'l'),
+                        ('Ar', self.winding['planar_start'][1], 'r')]
+            if self.coupled < 0:
+                windings += [('Bl', self.winding['planar_start'][2], 'l'),
+                             ('Br', self.winding['planar_start'][3], 'r')]
+            elif self.coupled > 0:
+                windings += [('Br', self.winding['planar_start'][2], 'l'),
+                             ('Bl', self.winding['planar_start'][3], 'r')]
+        else:
+            windings = [('', self.winding['axi_start'], 'r')]
+        rects = []
+        circuits = []
+        for name, start, positionToCore in windings:
+            windingRects, windingCircuits = self.winding['function'](self, name, start, positionToCore, simParam)
+            rects.append(windingRects)
+            circuits = circuits + windingCircuits
+        return np.concatenate(rects), circuits
 
     # Show the design
     # result: Array with the result objects
@@ -144,19 +176,4 @@ class Inductor:
     # mo_showdensityplot. Common: 'mag' for B, 'jmag' for J, hmag for H
     # max: Upper limit of the scale
     def showDesign(self, result, sim, harmonic, type, maxScale, simParam):
-        femm.openfemm(0)
-        if sim == 0:
-            freqfile = f"{self.filename_planar}_f{result[0].fs/1e6*harmonic:.2f}MHz"
-            rects = self.rects_planar
-        else:
-            freqfile = f"{self.filename_axi}_f{result[1].fs/1e6*harmonic:.2f}MHz"
-            rects = self.rects_axi
-        femm.opendocument(f"{freqfile}.fem")
-        femm.mi_loadsolution()
-
-        femm.mo_zoom(np.min(rects[:, :, 0]) * 1.1,
-                    np.min(rects[:, :, 1]) * 1.1,
-                    np.max(rects[:, :, 0]) * 1.1,
-                    np.max(rects[:, :, 1]) * 1.1)
-        # Show flux-density
-        femm.mo_showdensityplot(1, 0, maxScale, 0, type)
+        getSolverBackend(simParam).showDesign(self, result, sim, harmonic, type, maxScale, simParam)
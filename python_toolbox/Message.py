@@ -24,14 +24,16 @@ class Message:
     # independently within simulationParameters using verbose_detail and
     # logfile_detail
     
-    def __init__(self, filename):
-        # Create a message object that writes to filename
+    def __init__(self, filename, console=True):
+        # Create a message object that writes to filename. Without console,
+        # messages are only written to the logfile
         self.filename = filename
         self.fileID = open(self.filename, 'w')
+        self.console = console
     
     def print_msg(self, detail, text, simParam):
         # send some text to the console and/or logfile as specified in simParam
-        if simParam.verbose and detail <= simParam.verbose_detail:
+        if self.console and simParam.verbose and detail <= simParam.verbose_detail:
             print(text, end='')
         
         if simParam.writeLogfile and detail <= simParam.logfile_detail:
@@ -15,6 +15,7 @@
 # along with this program.  
 # If not, see https://www.gnu.org/licenses/gpl-3.0.html
 
+import os
 import numpy as np
 
 class Result:
@@ -55,12 +56,60 @@ class Result:
         self.by_waveform = []
         self.babs_waveform = []
         self.time_interpol = []
+        # Piecewise linear approximation of Bx(t) and By(t) for each area
+        self.bx_waveform_linear = []
+        self.by_waveform_linear = []
+        # Files of the waveforms in the waveform archive (name: file name
+        # relative to the data folder). Archived waveforms are not pickled but
+        # memory-mapped from their file when they are used (see waveformArchive)
+        self.waveform_files = {}
+        # Frequencies of the simulated harmonics and the complex Bx and By
+        # for each harmonic and area (harmonics x areas)
+        self.f_harmonic = []
+        self.bx_harmonic = []
+        self.by_harmonic = []
+        # Simulation file of each solved harmonic (frequency: file name)
+        self.harmonic_files = {}
+        # Frequencies of the solutions of the frequency-response model and the
+        # relative fit and leave-one-out validation error at each of them
+        self.f_model = []
+        self.model_fit_error = []
+        self.model_validation_error = []
         # Hdc for each area
         self.Hdc = []
 
         # Time it took for the simulation to complete
         self.elapsedTime = 0.0
     
+    def __getstate__(self):
+        # Archived waveforms are only stored as reference to their file
+        state = self.__dict__.copy()
+        for name in self.waveform_files:
+            state.pop(name, None)
+        return state
+    
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        # Results saved before the archive existed contain the waveforms
+        if 'waveform_files' not in self.__dict__:
+            self.waveform_files = {}
+    
+    def __getattr__(self, name):
+        # Archived waveforms are memory-mapped from their file (relative to
+        # archive_root, the data folder of the design) when they are used
+        # the first time. archive_root is set by waveformArchive.loadDesign
+        files = self.__dict__.get('waveform_files', {})
+        if name not in files:
+            raise AttributeError(f"'Result' object has no attribute '{name}'")
+        root = self.__dict__.get('archive_root')
+        if root is None:
+            raise Exception(f"Waveform {name} is archived, load the design with waveformArchive.loadDesign or set archive_root")
+        filename = os.path.join(root, files[name])
+        if not os.path.isfile(filename):
+            raise Exception(f"Waveform file {filename} not found")
+        self.__dict__[name] = np.load(filename, mmap_mode='r')
+        return self.__dict__[name]
+    
     def calcTrafoModel(self):
         self.L_out = (self.L_self + self.L_coupled) / 2
         self.L_m = (self.L_self - self.L_coupled) / 2
@@ -0,0 +1,109 @@
+# This file is part of the Planar Inductor Toolbox
+# Copyright (C) 2025 Adrian Keil
+# 
+# The Planar Inductor Toolbox is free software: you can redistribute it 
+# and/or modify it under the terms of the GNU General Public License as 
+# published by the Free Software Foundation, either version 3 of the 
+# License, or (at your option) any later version.
+# 
+# The Planar Inductor Toolbox is distributed in the hope that it will be
+# useful, but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+# 
+# You should have received a copy of the GNU General Public License
+# along with this program.  
+# If not, see https://www.gnu.org/licenses/gpl-3.0.html
+
+import numpy as np
+
+# Backends that were created by getSolverBackend
+_solverBackends = {}
+
+class SolverBackend:
+    # Interface between the toolbox and the field solver. The simulation
+    # (simCustomCore and the modules it calls) only uses these functions, so
+    # the solver can be exchanged with simParam.SOLVER_BACKEND.
+    # Work is done on one model at a time: A model is drawn once (draw) and
+    # then solved for different frequencies and currents (solve). The
+    # results of the last solve are read with getCircuitProperties and
+    # getBlockIntegrals until close is called.
+    # Models are identified by their file name (myind.filename_planar or
+    # myind.filename_axi) and solutions by the name of the solution file.
+    
+    def draw(self, myind, simnum, simParam):
+        # Creates the model for the planar (simnum == 0) or axisymmetric
+        # (simnum == 1) simulation of myind
+        raise Exception(f"{self.__class__.__name__} does not implement draw")
+    
+    def solve(self, myind, simnum, baseFile, solutionFile, freq, currents, simParam):
+        # Solves the model baseFile at frequency freq with the currents given
+        # in the dictionary currents (circuit name: complex amplitude).
+        # Circuits that are not given keep the current of the drawing. With
+        # currents None, the model is solved as it was drawn (freq is not
+        # used then). solutionFile is the name under which the solution is
+        # stored (and reused, see isReuseAllowed)
+        raise Exception(f"{self.__class__.__name__} does not implement solve")
+    
+    def getCircuitProperties(self, name):
+        # Returns current, voltage and flux linkage of the circuit name
+        raise Exception(f"{self.__class__.__name__} does not implement getCircuitProperties")
+    
+    def getBlockIntegrals(self, centers):
+        # Returns the volume in m^3 and the average Bx and By in T of the
+        # areas that contain the points centers[:, i]
+        raise Exception(f"{self.__class__.__name__} does not implement getBlockIntegrals")
+    
+    def getResults(self, circuitNames, centers):
+        # Returns the circuit properties of all circuits in circuitNames
+        # (array len(circuitNames) x 3, see getCircuitProperties) and the
+        # block integrals of all areas (see getBlockIntegrals) at once.
+        # Backends can override this if single requests are expensive
+        properties = np.array([self.getCircuitProperties(name) for name in circuitNames], dtype=complex).reshape(-1, 3)
+        vol, bx, by = self.getBlockIntegrals(centers)
+        return properties, vol, bx, by
+    
+    def close(self, simParam):
+        # Finish the work on the current model
+        pass
+    
+    def shutdown(self):
+        # Release everything the backend holds (e.g. external programs)
+        pass
+    
+    def run(self, msg, simParam, function, *args):
+        # Calls function(*args). Backends can use this to recover from
+        # failures of the solver
+        return function(*args)
+    
+    def showDesign(self, myind, result, sim, harmonic, type, maxScale, simParam):
+        # Shows the solution of the harmonic (see Inductor.showDesign)
+        raise Exception(f"{self.__class__.__name__} does not implement showDesign")
+
+def getShownFile(myind, result, sim, harmonic):
+    # Returns the simulation file of the harmonic (multiple of fs) that is
+    # shown with showDesign
+    freq = result[sim].fs * harmonic
+    if len(result[sim].harmonic_files) > 0:
+        # Solved harmonic with the closest frequency
+        return min(result[sim].harmonic_files.items(), key=lambda item: abs(item[0] - freq))[1]
+    if sim == 0:
+        return f"{myind.filename_planar}_f{freq/1e6:.2f}MHz"
+    return f"{myind.filename_axi}_f{freq/1e6:.2f}MHz"
+
+def getSolverBackend(simParam):
+    # Returns the backend selected with simParam.SOLVER_BACKEND. There is one
+    # instance per backend, so all modules work with the same solver.
+    # The backends are only imported when they are used, so FEMM is not
+    # required for the analytical backend.
+    name = simParam.SOLVER_BACKEND
+    if name not in _solverBackends:
+        if name == 'femm':
+            from FemmBackend import FemmBackend
+            _solverBackends[name] = FemmBackend()
+        elif name == 'analytical':
+            from AnalyticalBackend import AnalyticalBackend
+            _solverBackends[name] = AnalyticalBackend()
+        else:
+            raise Exception(f"Unknown solver backend '{name}'")
+    return _solverBackends[name]
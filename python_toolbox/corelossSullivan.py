@@ -78,6 +78,67 @@ def corelossSullivan(tvs, B, param, suppressFlag):
     return y
 
 
+# CORELOSSSULLIVANBATCH Calculate the power loss for many waveforms at once.
+#
+#   CORELOSSSULLIVANBATCH(time, B, param)
+#
+#   time = vector of successive time values shared by all waveforms, in seconds.
+#   B = 2-D array of flux densities (waveforms x time nodes), in tesla.
+#   param = material with the Steinmetz parameters fexp, bexp and k.
+#
+#   Returns one loss value per row of B. The result is identical to calling
+#   CORELOSS with suppressFlag=1 for every row: the loops of all waveforms are
+#   collected first and then evaluated in a single vectorized pass.
+#   Rows with invalid data return -1.
+def corelossSullivanBatch(tvs, B, param):
+    alpha = param.fexp
+    beta = param.bexp
+    k = param.k
+
+    tvs = np.asarray(tvs, dtype=float)
+    B = np.atleast_2d(np.asarray(B, dtype=float))
+    y = -np.ones(B.shape[0])
+
+    # check data for errors. The time vector is shared, so it only needs to be checked once
+    if np.any(np.diff(tvs) <= 0) or len(tvs) != B.shape[1]:
+        return y
+    # Since the PWL input is periodic, the first flux value must equal the last
+    valid = B[:, 0] == B[:, -1]
+    if not np.any(valid):
+        return y
+
+    # a is fraction of Bpp used, 1-a is fraction of original
+    a = 1.0
+    T = tvs[-1] - tvs[0]
+    ki = calcki(alpha, beta, k)
+
+    # Split all waveforms into major and minor loops and store the loops
+    # back-to-back. loopOwner stores to which row each loop belongs.
+    # Waveforms without minor loops are a single loop already and don't need
+    # to be split. They are stored directly, all other waveforms are split.
+    fast = valid & ismonotonicloop(B)
+    numfast = np.count_nonzero(fast)
+    loopsB = [B[fast].ravel()]
+    loopsT = [np.tile(tvs, numfast)]
+    loopEnds = [np.arange(1, numfast + 1) * len(tvs)]
+    loopOwner = [np.flatnonzero(fast)]
+    numpoints = numfast * len(tvs)
+    for row in np.flatnonzero(valid & ~fast):
+        loopB, loopT, offsets = splitloop(B[row], tvs)
+        loopsB.append(loopB)
+        loopsT.append(loopT)
+        loopEnds.append(offsets[1:] + numpoints)
+        loopOwner.append(np.full(len(offsets) - 1, row))
+        numpoints = numpoints + len(loopB)
+
+    offsets = np.concatenate([[0]] + loopEnds)
+    pseg, dt = calcsegs(np.concatenate(loopsT), np.concatenate(loopsB), offsets, alpha, beta, ki, a)
+
+    p = np.bincount(np.concatenate(loopOwner), weights=pseg * dt, minlength=B.shape[0]) / T
+    y[valid] = p[valid]
+    return y
+
+
 # ====================================================================
 # to calculate core loss per unit volume using GSE for PWL signal form
 # ====================================================================
@@ -88,323 +149,168 @@ def gsepwl(t, B, alpha, beta, k):
 
     T = t[len(t)-1] - t[0]  # total time of PWL period
 
-    ki = k / ((2**(beta+1)) * np.pi**(alpha-1) * (0.2761 + 1.7061/(alpha+1.354)))
+    ki = calcki(alpha, beta, k)
 
-    B, t, Bs, ts = splitloop(B, t)  # split waveform into major and minor loops
+    # Fast path: A waveform that only rises once and falls once has no minor
+    # loops, so the iGSE integral can be evaluated directly over all segments
+    if ismonotonicloop(B)[0]:
+        pseg, dt = calcsegs(t, B, [0, len(B)], alpha, beta, ki, a)
+        p = pseg[0] * dt[0] / T
+        return p
 
-    pseg = np.zeros(len(ts) + 1)
-    dt = np.zeros(len(ts) + 1)
-    
-    pseg[0] = calcseg(t, B, alpha, beta, ki, a)
-    dt[0] = t[len(t)-1] - t[0]
+    B, t, offsets = splitloop(B, t)  # split waveform into major and minor loops
 
-    for j in range(len(ts)):
-        pseg[j+1] = calcseg(ts[j], Bs[j], alpha, beta, ki, a)
-        tseg = ts[j]
-        dt[j+1] = tseg[len(tseg)-1] - tseg[0]
+    pseg = np.zeros(len(offsets) - 1)
+    dt = np.zeros(len(offsets) - 1)
+
+    for j in range(len(offsets) - 1):
+        tseg = t[offsets[j]:offsets[j+1]]
+        pseg[j] = calcseg(tseg, B[offsets[j]:offsets[j+1]], alpha, beta, ki, a)
+        dt[j] = tseg[len(tseg)-1] - tseg[0]
 
     p = np.sum(pseg * dt) / T
     return p
 
 
+# ==========================================================
+# iGSE coefficient ki, only depends on the Steinmetz parameters
+# ==========================================================
+def calcki(alpha, beta, k):
+    ki = k / ((2**(beta+1)) * np.pi**(alpha-1) * (0.2761 + 1.7061/(alpha+1.354)))
+    return ki
+
+
+# ==========================================================================
+# Checks which periodic waveforms (rows of B) have no minor loops, i.e. rise
+# monotonically from their minimum to their maximum and fall monotonically
+# back. Constant segments are ignored. This is the case if the direction of
+# the waveform changes at most twice within one period.
+# ==========================================================================
+def ismonotonicloop(B):
+    B = np.atleast_2d(np.asarray(B, dtype=float))
+    direction = np.sign(np.diff(B, axis=1))
+    # Constant segments continue the direction of the previous segment.
+    # Leading constant segments continue the last direction (periodicity).
+    index = np.where(direction != 0, np.arange(direction.shape[1]), -1)
+    index = np.maximum.accumulate(index, axis=1)
+    index = np.where(index < 0, index[:, -1:], index)
+    direction = np.take_along_axis(direction, np.maximum(index, 0), axis=1)
+    changes = np.sum(direction != np.roll(direction, 1, axis=1), axis=1)
+    return changes <= 2
+
+
 # ==============
 # Loop Splitter
 # ==============
-# %%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%
-# %%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%Loop Spliter%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%
-# %%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%
-# %%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%By %%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%
-# %%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%Kapil Venkatachalam%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%
-# %%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%
-# %%%%%%%%%%%%%%%%%%%%%%%%%%%%%%Modified on June 2nd, 2002%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%
+# Stack-based (rainflow-style) replacement of the original loop splitter by
+# Kapil Venkatachalam. It takes a piecewise linear waveform corresponding to
+# a B-H loop and splits it into the major loop and the minor loops, each
+# of which has the same starting and ending value.
 #
-# This program takes a piecewise linear
-# current waveform corresponding to a B-H loop 
-# and splits it into smaller waveforms 
-# which have the same starting and ending value.
+# The waveform is rotated to start at its lowest point and walked once. The
+# turning points of the remaining path are kept on a stack. As soon as the
+# path returns to the level of the second-to-last turning point, the
+# excursion between them is cut out as a minor loop (closing point is
+# interpolated) and the time of the remaining path is shifted accordingly.
+# Nested minor loops are closed before their parent loop, so every loop that
+# is returned is a simple loop.
 #
 # Inputs:
 #
 # 'a': B vector corresponding to the B-H loop.
-# 'b': Time vector of currents corresponding to the B-H loop. 
+# 'b': Time vector corresponding to the B-H loop.
 #
-# Outputs:
+# Outputs (all loops are stored back-to-back):
 #
-# 'Majorloop': B values corresponding to the major B-H loop.
-# 'Majortime': time vector of currents corresponding to the major B-H loop.
-# 'Minorloop': B values corresponding to the different minor B-H loop.
-# 'Minorloop': time vector of currents corresponding to the different minor B-H loop.
+# 'loopB': B values of all loops.
+# 'loopT': time values of all loops.
+# 'offsets': Loop j consists of the points offsets[j] to offsets[j+1]-1.
+#            Loop 0 is the major loop, all others are minor loops.
 
 def splitloop(a, b):
-    # %%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%
-    # %%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%
-    #                Reshaping the waveforms and identifying the peak point
-    # %%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%
-    # %%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%
-
-    # %%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%
-    # Identifies the lowest point in 'a'.
-    # %%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%
-
-    e = 0  # Constant defined to identify the position of the lowest value.
-    sa = 1  # Counter to check if lowest point is reached.
-    for d in range(len(a)):  # Check for the size of vector.
-        if (a[d] == np.min(a) and sa == 1):  # Checking condition if lowest point has been reached.
-            e = d  # Identifies the lowest point in the waveform.
-            sa = sa + 1  # Counter incremented if lowest point is reached.
-
-    # v is a vector which stores the shifted values of 'a'.
-    # t is a vector which stores the shifted values of 'b'.
-
-    v = [a[e]]  # adds the lowest point as the first value.
-    t = [0]  # adds the corresponding time value the first value.
-
-    bdiff = np.diff(b)  # adjusts for the times corresponding to the values.
-    cumdiff = 0
-
-    # %%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%
-    # Loop stores all value of 'a' (from the lowest point till the end point) in 'v'.
-    # %%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%
-
-    for q in range(e+1, len(a)):  # 'q' counts the remaining vectors before the lowest point is reached.
-        v.append(a[q])  # Values of 'a' stored in 'v'.
-        cumdiff = cumdiff + bdiff[q-1]  # Time adjustment
-        t.append(cumdiff)  # Values of 'b' stored in 't'.
-
-    # %%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%
-    # Loop stores all value of 'a' (from the starting point till the lowest point) in 'v'.
-    # %%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%
-
-    for zx in range(1, e):  # Appends the part before the lowest point.
-        v.append(a[zx])  # Values of 'a' stored in 'v'.
-        cumdiff = cumdiff + bdiff[zx-1]  # Time adjustment    
-        t.append(cumdiff)  # Values of 'b' stored in 't'.
-
-    v = np.array(v)
-    t = np.array(t)
-
-    # %%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%
-    #                         Finds the position of the peak value
-    # %%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%
-
-    z = 0  # Constant defined to identify the position of the peak value.
-    sa = 1  # Counter to check if peak point is reached.
-    for x in range(len(v)):  # Check for the size of vector.
-        if (v[x] == np.max(v) and sa == 1):  # Checking condition if peak has been reached.
-            z = x  # Identifies the peak point in the waveform.
-            sa = sa + 1  # Counter incremented if peak point is reached.
-
-    # %%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%
-    # %%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%
-    #             End of reshaping the waveforms and identifying the peak point
-    # %%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%
-    # %%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%
-
-    # Defining variables to keep track of values in the vectors
-    i = 1  # Python: changed from 2 to 1 (0-based indexing)
-    j = 0  # Python: changed from 1 to 0 (0-based indexing)
-    k = 0  # Python: changed from 1 to 0 (0-based indexing)
-
-    s = [[] for _ in range(1300)]  # Defining cells for minorloop.
-    p = [[] for _ in range(1300)]  # Defining cells for minortime.
-
-    # 'm' stores the majorloop values extracted from 'v'.
-    # 'n' stores the corresponding time values extracted from 't'.
-
-    # %%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%
-    # %%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%
-    #                     Splits the rising portion of the waveform
-    # %%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%
-    # %%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%
-
-    m = [v[0]]  # Adds the first element of 'v' to 'm'.
-    n = [t[0]]  # Adds the first element of 't' to 'n'.
-
-    while i <= z:  # Checks for all values before the peak point
-        
-        # %%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%
-        #                     Check to see if the waveform is rising
-        # %%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%
-        
-        if v[i] >= v[i-1]:  # Compares adjacent values of 'v'.
-            m.append(v[i])  # Adds an element of 'v' to 'm'.
-            n.append(t[i])  # Adds an element of 't' to 'n'.
-            count = 1  # Counter to keep track of end of the rising part.
-        else:
-            # Check for minor loop in the rising part
-            s[j].append(v[i-1])  # Adds an element of 'v' to 's'.
-            p[j].append(t[i-1])  # Adds an element of 't' to 'p'.
-            
-            # by jens czogalla
-            k = k + 1
-            
-            # Repeating the process till the minor loop ends
-            while v[i] < max(m):
-                s[j].append(v[i])  # Adds an element of 'v' to 's'.
-                p[j].append(t[i])  # Adds an element of 't' to 'p'.
-                # by jens czogalla            
-                k = k + 1
-                i = i + 1  # Increments the counter keeping track of the elements in 'v'.
-            
-            # Calculating the slope of the rising edge of the minor loop.
-            slope = (v[i-1] - v[i]) / (t[i-1] - t[i])
-
-            # Makes the last element of the minor loop same as the maximum value of 'm'.
-            s[j].append(max(m))
-            
-            # Computes the value of time of the point which was stored last in 's'.
-            stemp = ((max(m) - v[i-1]) / slope) + t[i-1]  # Calculating the time value.
-            p[j].append(stemp)  # Value is stored in p.
-            m.append(max(m))  # The last point in 'm' is repeated for continuity.
-            n.append(stemp)  # The time value is also repeated.
-            count = count + 1  # Counter is incremented to indicate end of minor loop.
-            j = j + 1  # Index of 's' is incremented.
-            # by jens czogalla        
-            k = 0  # Python: reset to 0
-        
-        if count <= 1:  # Check condition keeping track of end of rising part.
-            i = i + 1  # Increment counter keeping track of the elements in 'v'.
-
-    # %%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%
-    # %%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%
-    #                   End of splitting of the rising portion of the waveform
-    # %%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%
-    # %%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%
-
-    # 'm' now stores part the rising part of the major loop.
-    # 'n' stores the corresponding time values of the major loop.
-    # 's' stores the minor loops in the rising part of the waveform.
-    # 'p' stores the corresponding time values of the minor loops.
-
-    # %%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%
-    # %%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%
-    #                     Splits the falling portion of the waveform
-    # %%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%
-    # %%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%
-
-    while i < len(v):  # Checks for all values after the peak point
-        if v[i] <= v[i-1]:  # Compares adjacent values of 'v'.
-            m.append(v[i])  # Adds an element of 'v' to 'm'.
-            n.append(t[i])  # Adds an element of 't' to 'n'.
-            count = 1  # Counter to keep track of end of the rising part.
-        else:
-            # Check for minor loop in the falling part.
-            temp = v[i-1]  # Temporary variable to store last value in 'v'.
-            s[j].append(v[i-1])  # Adds an element of 'v' to 's'. 
-            p[j].append(t[i-1])  # Adds an element of 't' to 'p'. 
-            # by jens czogalla        
-            k = k + 1
-            
-            while i < len(v) and v[i] > temp:  # Compares adjacent values of 'v' for all the remaining 'v' values.
-                s[j].append(v[i])  # Adds an element of 'v' to 's'.
-                p[j].append(t[i])  # Adds an element of 't' to 'p'.
-                # by jens czogalla            
-                k = k + 1
-                i = i + 1  # Increments the counter keeping track of the elements in 'v'.
-            
-            # Repeating the process till the minor loop ends
-            # by jens czogalla
-            while i < len(v) and k > 1:
-                # Calculating the slope of the rising edge of the minor loop.
-                slope = (v[i-1] - v[i]) / (t[i-1] - t[i])
-                
-                # Makes the first element of the minor loop same as the last element in 'm'.
-                s[j].append(temp)
-                
-                # Computes the value of time of the point which was stored last in 's'.
-                qtemp = ((temp - v[i-1]) / slope) + t[i-1]  # Calculating the time value.
-                p[j].append(qtemp)  # Value is stored in p.
-                r = 1  # Counter to make the pass through the loop only once.
-                while v[i] != temp and r == 1:
-                    m.append(temp)  # The last point in 'm' is repeated for continuity.
-                    n.append(qtemp)  # The time value is also repeated.
-                    r = r + 1  # Counter incremented to indicate the pass has been made.
-                count = count + 1  # Counter is incremented to indicate end of minor loop.
-                j = j + 1  # Index of 's' is incremented.
-                # by jens czogalla            
-                k = 0  # Python: reset to 0
-        
-        if count <= 1:  # Check condition keeping track of end of falling part.
-            i = i + 1  # Increment counter keeping track of the elements in 'v'.
-
-    # %%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%
-    # %%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%
-    #                   End of splitting of the falling portion of the waveform
-    # %%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%
-    # %%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%
-
-    # %%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%
-    # %%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%
-    #              Removal of repetition of points in 'm' and adjusting the values
-    # %%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%
-    # %%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%
-
-    x = len(m)  # Variable to store the length of 'm'.
-    majorloop = [m[0]]  # Stores the first element of 'm' in 'majorloop'                 
-    majortime = [n[0]]  # Stores the first element of 'n' in 'majortime'      
-    g = 0  # Initializing variable which adjust time for points following the point of repetition.
-
-    # by jens czogalla
-    for h in range(1, x):
-        if m[h-1] != m[h]:  # Checking for repeated points.
-            majortime.append(n[h] - g)  # Add time value to 'majortime'.
-            majorloop.append(m[h])  # Add corresponding value of 'm' in 'majorloop'.    
-        else:
-            g = g + n[h] - n[h-1]  # Adjusts the time to compensate for repetitions.
-
-    # %%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%
-    # %%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%
-    #           End of removal of repetition of points in 'm' and adjusting the values
-    # %%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%
-    # %%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%
-
-    # %%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%
-    # %%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%
-    #       Finding the number of minor loops to be used for checking sub loops later
-    # %%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%
-    # %%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%
-    
-    uo = 0  # Python: changed from 1 to 0
-    pt = 0  # Variable to keep track of the number of minor loops.
-    ss = 1
-    while ss == 1 and uo < len(s):
-        while len(s[uo]) > 0:
-            uo = uo + 1
-            if uo >= len(s):
+    a = np.asarray(a, dtype=float)
+    b = np.asarray(b, dtype=float)
+
+    # Rotate the waveform such that it starts and ends at the (first) lowest point
+    e = int(np.argmin(a))
+    v = np.concatenate([a[e:], a[1:e+1]])
+    t = np.concatenate([[0], np.cumsum(np.concatenate([np.diff(b[e:]), np.diff(b[:e+1])]))])
+
+    # Remaining path (becomes the major loop) and stack of its turning points
+    pathB = [v[0]]
+    pathT = [t[0]]
+    turns = [0]
+    direction = 0
+    # Time that has been cut out of the path so far
+    g = 0.0
+
+    minorB = []
+    minorT = []
+    minorEnds = []
+
+    for i in range(1, len(v)):
+        x = v[i]
+        tx = t[i] - g
+        d = np.sign(x - pathB[-1])
+        if d == 0:
+            pathB.append(x)
+            pathT.append(tx)
+            continue
+        # The last point of the path is a turning point if the direction changes
+        if direction != 0 and d != direction:
+            turns.append(len(pathB) - 1)
+        direction = d
+
+        # Close all loops whose starting level is reached by the new segment.
+        # The first point is the lowest point and never closes a loop.
+        while len(turns) >= 3 and (x - pathB[turns[-2]]) * d >= 0:
+            q = turns[-2]
+            level = pathB[q]
+            # A peak that is reached again exactly is kept if it is the
+            # highest point of its loop (like the first maximum in the
+            # original splitter), the new point then starts a minor loop
+            if x == level and d > 0 and not exceedsinloop(v, i + 1, level, pathB[turns[-3]]):
                 break
-        ss = ss + 1
-        pt = uo
-
-    # %%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%
-    # %%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%
-    #                                        Recursion
-    #              Checks if any portion of the  split waveform has subloops.
-    #              If so repeats the above process to make it a single loop.
-    # %%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%
-    # %%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%
-
-    minorloop = []
-    minortime = []
-    for qq in range(pt):
-        sinp = s[qq]  # flux
-        pinp = p[qq]  # time
-        
-        if minorloop1(sinp, pinp):
-            fn, ln, sn, pn = splitloop(np.array(sinp), np.array(pinp))
-            if len(fn) != 0:
-                minorloop.append(fn)
-                minorloop.append(sn[0])
-                minortime.append(ln)
-                minortime.append(pn[0])
-        else:
-            if len(sinp) != 0:
-                minorloop.append(np.array(sinp))
-                minortime.append(np.array(pinp))
-
-    majorloop = np.array(majorloop)
-    majortime = np.array(majortime)
-    
-    return majorloop, majortime, minorloop, minortime
+            # Time at which the segment reaches the level of the turning point
+            tcross = pathT[-1] + (level - pathB[-1]) * (tx - pathT[-1]) / (x - pathB[-1])
+            minorB.extend(pathB[q:])
+            minorB.append(level)
+            minorT.extend(pathT[q:])
+            minorT.append(tcross)
+            minorEnds.append(len(minorB))
+            # Remove the loop from the path and shift the time of the remaining path
+            del pathB[q+1:]
+            del pathT[q+1:]
+            del turns[-2:]
+            g = g + tcross - pathT[q]
+            tx = tx - (tcross - pathT[q])
+
+        # Only add the point if it is not the closing point of a loop
+        if x != pathB[-1]:
+            pathB.append(x)
+            pathT.append(tx)
+
+    loopB = np.concatenate([pathB, minorB])
+    loopT = np.concatenate([pathT, minorT])
+    offsets = np.concatenate([[0, len(pathB)], len(pathB) + np.array(minorEnds, dtype=int)]).astype(int)
+
+    return loopB, loopT, offsets
+
+
+# Checks if the waveform v exceeds level after the point start and before it
+# returns to the starting level bottom of the loop (i.e. within the loop).
+# The waveform is searched in growing chunks, so only about the rest of the
+# loop is read.
+def exceedsinloop(v, start, level, bottom):
+    size = 16
+    while start < len(v):
+        chunk = v[start:start+size]
+        hit = np.flatnonzero((chunk > level) | (chunk <= bottom))
+        if len(hit) > 0:
+            return chunk[hit[0]] > level
+        start = start + size
+        size = 2 * size
+    return False
 
 
 # =======================================================
@@ -458,6 +364,58 @@ def calcseg(t, B, alpha, beta, k1, a):
     return pseg
 
 
+# ==========================================================================
+# calculate the loss of many loop segments at once (vectorized calcseg)
+# The loops are stored back-to-back in t and B. Loop j consists of the points
+# offsets[j] to offsets[j+1]-1. Returns the loss and the duration of each loop.
+# Instead of inserting points at the zero crossings (makepositive), segments
+# that cross zero are integrated piecewise in closed form, which gives the
+# same result.
+# ==========================================================================
+def calcsegs(t, B, offsets, alpha, beta, k1, a):
+    # a is fraction of Bpp used, 1-a is fraction of original
+    bma1a = (beta - alpha) * (1 - a)  # exponent of B(t)
+    bmaa = (beta - alpha) * a  # exponent of Bpp
+
+    t = np.asarray(t, dtype=float)
+    B = np.asarray(B, dtype=float)
+    offsets = np.asarray(offsets)
+    starts = offsets[:-1]
+    ends = offsets[1:]
+    numloops = len(starts)
+
+    Bpp = np.maximum.reduceat(B, starts) - np.minimum.reduceat(B, starts)
+    T = t[ends-1] - t[starts]
+
+    # Loop index of every segment. The segments connecting the last point of
+    # a loop with the first point of the next loop are masked out.
+    loopindex = np.repeat(np.arange(numloops), ends - starts)[:-1]
+    inside = np.ones(len(B) - 1, dtype=bool)
+    inside[ends[:-1] - 1] = False
+
+    deltaB = np.abs(B[1:] - B[:-1])
+    deltat = np.maximum(t[1:] - t[:-1], 1e-15)
+    dBdt = deltaB / deltat
+    # The contribution of segments without flux change is zero
+    m1 = np.zeros(len(dBdt))
+    m1[dBdt > 1e-15] = dBdt[dBdt > 1e-15] ** (alpha - 1)
+
+    B_pos = np.abs(B)
+    B_term = np.zeros(len(B))
+    B_term[B_pos > 1e-15] = B_pos[B_pos > 1e-15] ** (bma1a + 1)
+    # A segment crossing zero consists of a falling and a rising part in |B|
+    cross = (B[1:] * B[:-1]) < 0
+    m2 = np.where(cross, B_term[1:] + B_term[:-1], np.abs(B_term[1:] - B_term[:-1]))
+
+    segsum = np.bincount(loopindex[inside], weights=(m1 * m2)[inside], minlength=numloops)
+
+    # Loops without flux variation or duration have no loss
+    pseg = np.zeros(numloops)
+    active = (Bpp >= 1e-12) & (T >= 1e-15)
+    pseg[active] = k1 / T[active] / (bma1a + 1) * segsum[active] * Bpp[active] ** bmaa
+    return pseg, T
+
+
 # ==========================================================================
 # Convert a piecewise-linear waveform w (which must be a vector)
 # represented by the points w at times t, to a piecewise-linear waveform with 
@@ -465,44 +423,12 @@ def calcseg(t, B, alpha, beta, k1, a):
 # positive or all negative.  If w is a matrix, use makepositiveM.
 # ==========================================================================
 def makepositive(t, w):
-    t = list(t)
-    w = list(w)
-    length = len(t)
-    cross = [(w[i] * w[i+1]) < 0 for i in range(length-1)]
-    loopnumber = length - 1 + sum(cross)
-    i = 0
-    while i < loopnumber and i < len(cross):
-        if cross[i]:
-            length = len(w)
-            tcross = w[i] * (t[i+1] - t[i]) / (w[i] - w[i+1]) + t[i]
-            t = t[0:i+1] + [tcross] + t[i+1:length]
-            w = w[0:i+1] + [0] + w[i+1:length]
-            cross = cross[0:i+1] + [0] + cross[i+1:length-1]
-        i = i + 1
-    
-    w = np.abs(np.array(w))
-    t = np.array(t)
+    t = np.asarray(t, dtype=float)
+    w = np.asarray(w, dtype=float)
+    # Find all segments that change sign and compute the times of the zero crossings
+    cross = np.flatnonzero((w[:-1] * w[1:]) < 0)
+    tcross = w[cross] * (t[cross+1] - t[cross]) / (w[cross] - w[cross+1]) + t[cross]
+    # Insert all zero crossings at once
+    t = np.insert(t, cross + 1, tcross)
+    w = np.abs(np.insert(w, cross + 1, 0.0))
     return t, w
-
-
-# ==================
-# minorloop function
-# ==================
-def minorloop1(s, p):
-    qr = len(s)
-    peak = -1
-    prevslope = 0
-    for i in range(1, qr):
-        slope = (s[i-1] - s[i]) / (p[i-1] - p[i])
-        if slope <= 0 and prevslope >= 0:
-            peak = peak + 1
-        if prevslope <= 0 and slope >= 0:
-            peak = peak + 1
-        prevslope = slope
-    
-    if peak > 2:
-        ml = 1
-    else:
-        ml = 0
-    
-    return ml
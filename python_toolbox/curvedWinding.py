@@ -15,12 +15,12 @@
 # along with this program.  
 # If not, see https://www.gnu.org/licenses/gpl-3.0.html
 
-import femm
 import numpy as np
+from helperFunctions import getRectangle
 
 def curvedWinding(myind, windingName, start, positionToCore, simParam):
-    # Draws windings which are curved (i.e. have a smaller width in the
-    # outer layers)
+    # Creates the conductors of windings which are curved (i.e. have a
+    # smaller width in the outer layers)
     # windingName: Name of the circuit that shoud be used. A number is
     # automatically added depending on the turn
     # start: Coordinates where the winding starts: [startx; centery]
@@ -33,6 +33,10 @@ def curvedWinding(myind, windingName, start, positionToCore, simParam):
     # shortenFactor can be used if even more shortening is required: The
     # amount by which a winding is shortened is multiplied by
     # shortenFactor. Default value is 1
+    # Returns the rectangles of the conductors (same layout as rects_planar)
+    # and the name of the circuit of each conductor
+    rects = []
+    circuits = []
 
     if 'shortenFactor' not in myind.winding:
         myind.winding['shortenFactor'] = 1
@@ -61,14 +65,11 @@ def curvedWinding(myind, windingName, start, positionToCore, simParam):
             width = myind.winding['width'] - (myind.winding['shortenWindingRadius'] - b) * myind.winding['shortenFactor']
             
             if positionToCore == 'l':
-                femm.mi_drawrectangle(startx, posy, startx + width, posy + thickness)
-                femm.mi_addblocklabel(startx + width / 2, posy + thickness / 2)
-                femm.mi_selectlabel(startx + width / 2, posy + thickness / 2)
+                rects.append(getRectangle(startx, posy, width, thickness))
             else:
-                femm.mi_drawrectangle(startx + myind.winding['width'] - width, posy, startx + myind.winding['width'], posy + thickness)
-                femm.mi_addblocklabel(startx + myind.winding['width'] - width / 2, posy + thickness / 2)
-                femm.mi_selectlabel(startx + myind.winding['width'] - width / 2, posy + thickness / 2)
-            femm.mi_setblockprop('Copper', simParam.COPPER_AUTOMESH, simParam.COPPER_MESHSIZE, f'{windingName}{i}', 0, 0, 1)
-            femm.mi_clearselected()
+                rects.append(getRectangle(startx + myind.winding['width'] - width, posy, width, thickness))
+            circuits.append(f'{windingName}{i}')
 
             posy = posy + thickness + myind.pcb.insulator_thickness
+    
+    return np.array(rects), circuits
@@ -0,0 +1,283 @@
+# This file is part of the Planar Inductor Toolbox
+# Copyright (C) 2025 Adrian Keil
+# 
+# The Planar Inductor Toolbox is free software: you can redistribute it 
+# and/or modify it under the terms of the GNU General Public License as 
+# published by the Free Software Foundation, either version 3 of the 
+# License, or (at your option) any later version.
+# 
+# The Planar Inductor Toolbox is distributed in the hope that it will be
+# useful, but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+# 
+# You should have received a copy of the GNU General Public License
+# along with this program.  
+# If not, see https://www.gnu.org/licenses/gpl-3.0.html
+
+import os
+import pickle
+import sqlite3
+import hashlib
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import pandas as pd
+
+# Columns of the summary of a design. getSummaryRow needs to match with this
+summaryColumns = ["description", "num", "A [mm^2]", "h [mm]", "V [mm^3]", 
+                  "L_s_pln [nH]", "L_s_axi [nH]", "k", "fs [MHz]", 
+                  "Pco_pln [W]", "Pco_axi [W]", "Hdc_max_pln [A/m]"]
+# Columns that identify the file of a design
+fileColumns = ["file", "size", "mtime", "hash"]
+
+# Name of the index in the data folder
+indexName = 'designs.sqlite'
+def getSummaryRow(mywinding, myind, result):
+    # Returns the summary of a simulated design as dict with summaryColumns
+    
+    # Multiply area by 2 for single designs for a better comparability
+    if myind.coupled == 0:
+        area = myind.dimension['width'] * myind.dimension['depth'] * 2
+    else:
+        area = myind.dimension['width'] * myind.dimension['depth']
+    
+    # Simulations that were not run have no result
+    def get(simnum, value):
+        if result[simnum] is None:
+            return np.nan
+        return value(result[simnum])
+    
+    return {
+        "description": myind.description,
+        "num": mywinding,
+        "A [mm^2]": area,
+        "h [mm]": myind.dimension['height'],
+        "V [mm^3]": area * myind.dimension['height'],
+        "L_s_pln [nH]": get(0, lambda res: res.L_self * 1e9),
+        "L_s_axi [nH]": get(1, lambda res: res.L_self * 1e9),
+        "k": get(0, lambda res: res.k),
+        "fs [MHz]": get(0, lambda res: res.fs / 1e6),
+        "Pco_pln [W]": get(0, lambda res: res.loss_copper),
+        "Pco_axi [W]": get(1, lambda res: res.loss_copper),
+        "Hdc_max_pln [A/m]": get(0, lambda res: np.max(res.Hdc) if len(res.Hdc) > 0 else np.nan)
+    }
+
+def updateDesignIndex(filepath, mywinding, myind, result):
+    # Adds the summary of the design saved in filepath to the index in the
+    # same folder (or replaces it if the file was already in the index)
+    row = getSummaryRow(mywinding, myind, result)
+    _writeRows(os.path.dirname(filepath), [[os.path.basename(filepath)] + list(getFileInfo(filepath))
+                                           + [row[name] for name in summaryColumns]])
+
+def ingestDesigns(datafolder, numWorkers=None):
+    # Brings the index of datafolder up to date with the design files in it.
+    # Only files that are not in the index or whose size, modification time
+    # and content hash changed are loaded, in parallel by numWorkers processes
+    # (default: number of CPUs). Files that can't be loaded (e.g. corrupt or
+    # still being written) are skipped with a warning and are tried again the
+    # next time. Returns the number of designs that were added or updated.
+    
+    # Get all the design files from the data directory
+    filenames = [filename for filename in os.listdir(datafolder)
+                 if filename.endswith('.pkl') and os.path.isfile(os.path.join(datafolder, filename))]
+    
+    # Files with the same size and modification time are assumed unchanged
+    index = readDesignIndex(datafolder).set_index('file')
+    candidates = []
+    for filename in filenames:
+        filepath = os.path.join(datafolder, filename)
+        if filename in index.index:
+            if (index.at[filename, 'size'] == os.path.getsize(filepath)
+                    and index.at[filename, 'mtime'] == os.path.getmtime(filepath)):
+                continue
+            candidates.append((filepath, index.at[filename, 'hash']))
+        else:
+            candidates.append((filepath, None))
+    
+    # Hash and (if the content changed) decode the candidates. Most of the
+    # time is spent unpickling, so a process pool is used for many files
+    if len(candidates) > 1 and numWorkers != 1:
+        with ProcessPoolExecutor(max_workers=numWorkers) as pool:
+            entries = list(pool.map(_readDesign, *zip(*candidates), chunksize=8))
+    else:
+        entries = [_readDesign(filepath, knownHash) for filepath, knownHash in candidates]
+    
+    rows = []
+    ingested = 0
+    for filepath, entry in zip([filepath for filepath, _ in candidates], entries):
+        if isinstance(entry, Exception):
+            print(f"Warning: Skipping {filepath}: {entry!r}")
+        elif entry['row'] is None:
+            # Same content (e.g. copied from another machine), only the
+            # file information changed
+            row = index.loc[os.path.basename(filepath), summaryColumns]
+            rows.append([os.path.basename(filepath)] + list(entry['info']) + list(row))
+        else:
+            rows.append([os.path.basename(filepath)] + list(entry['info'])
+                        + [entry['row'][name] for name in summaryColumns])
+            ingested += 1
+    _writeRows(datafolder, rows)
+    
+    # Remove designs whose file was deleted
+    removed = [filename for filename in index.index if filename not in filenames]
+    if removed:
+        removeFromDesignIndex(datafolder, removed)
+    
+    return ingested
+
+def getFileInfo(filepath):
+    # Returns the size, modification time and SHA-256 hash of a design file
+    sha = hashlib.sha256()
+    with open(filepath, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            sha.update(block)
+    return os.path.getsize(filepath), os.path.getmtime(filepath), sha.hexdigest()
+
+def readDesignIndex(datafolder):
+    # Reads the summary of all designs in the index of datafolder with one
+    # query. Returns a DataFrame with fileColumns and summaryColumns
+    con = _connect(datafolder)
+    table = pd.read_sql_query("SELECT * FROM designs", con)
+    con.close()
+    # Values of simulations that were not run are stored as NULL
+    table[summaryColumns[2:]] = table[summaryColumns[2:]].astype(float)
+    return table
+
+def queryDesigns(datafolder, filters=None, orderBy=None, ascending=True, limit=None):
+    # Returns the summary of the designs in the index of datafolder that
+    # match all filters, sorted by the column orderBy and limited to the
+    # first limit designs. filters is a list of (column, operator, value)
+    # with the operators <, <=, >, >=, = and !=, e.g.
+    # [('V [mm^3]', '<', 300), ('L_s_pln [nH]', '>', 100), ('L_s_pln [nH]', '<', 150)]
+    # Designs without a value in a filtered column (simulation not run) never match
+    query, params = _getQuery(filters, orderBy, ascending, limit)
+    con = _connect(datafolder)
+    table = pd.read_sql_query(query, con, params=params)
+    con.close()
+    table[summaryColumns[2:]] = table[summaryColumns[2:]].astype(float)
+    return table
+
+def iterDesigns(datafolder, filters=None, orderBy=None, ascending=True, chunksize=1000):
+    # Same as queryDesigns, but yields the result in DataFrames of chunksize
+    # designs, so large archives never need to be loaded at once
+    query, params = _getQuery(filters, orderBy, ascending, None)
+    con = _connect(datafolder)
+    try:
+        for table in pd.read_sql_query(query, con, params=params, chunksize=chunksize):
+            table[summaryColumns[2:]] = table[summaryColumns[2:]].astype(float)
+            yield table
+    finally:
+        con.close()
+
+def getTopDesigns(datafolder, column, k, filters=None, ascending=True):
+    # Returns the k designs with the lowest (or highest if ascending is False)
+    # value of column, e.g. getTopDesigns(datafolder, 'Pco_pln [W]', 10)
+    return queryDesigns(datafolder, (filters or []) + [(column, '!=', None)], column, ascending, k)
+
+def getParetoDesigns(datafolder, columns, filters=None, minimize=(True, True)):
+    # Returns the designs that are Pareto optimal for the two columns, i.e. no
+    # other design is better in one column without being worse in the other.
+    # minimize tells for each column whether lower values are better.
+    # The designs are sorted by the first column, so the front is found in
+    # a single pass over the (streamed) index
+    front = []
+    best = np.inf
+    sign = 1 if minimize[1] else -1
+    filters = (filters or []) + [(columns[0], '!=', None), (columns[1], '!=', None)]
+    for table in iterDesigns(datafolder, filters, list(columns), list(minimize)):
+        for i, value in enumerate(table[columns[1]].to_numpy() * sign):
+            # A design is only on the front if it is better in the second
+            # column than all designs that are better in the first column
+            if value < best:
+                best = value
+                front.append(table.iloc[[i]])
+    if len(front) == 0:
+        return pd.DataFrame(columns=fileColumns + summaryColumns)
+    return pd.concat(front, ignore_index=True)
+
+def removeFromDesignIndex(datafolder, filenames):
+    # Removes the designs saved in filenames from the index of datafolder
+    with _connect(datafolder) as con:
+        con.executemany("DELETE FROM designs WHERE file = ?", [(name,) for name in filenames])
+    con.close()
+
+def _getQuery(filters, orderBy, ascending, limit):
+    # Builds the SQL query of the summary of the designs and its parameters.
+    # orderBy and ascending may be lists to sort by several columns
+    operators = ['<', '<=', '>', '>=', '=', '!=']
+    conditions = []
+    params = []
+    for column, operator, value in (filters or []):
+        if column not in fileColumns + summaryColumns:
+            raise Exception(f"Unknown column '{column}' in filter")
+        if operator not in operators:
+            raise Exception(f"Unknown operator '{operator}' in filter, use one of {operators}")
+        if value is None:
+            # Only = and != can be used to check for missing values
+            conditions.append(f'"{column}" IS {"NOT " if operator == "!=" else ""}NULL')
+        else:
+            conditions.append(f'"{column}" {operator} ?')
+            params.append(_toSql(value))
+    
+    query = "SELECT * FROM designs"
+    if conditions:
+        query += " WHERE " + " AND ".join(conditions)
+    if orderBy is not None:
+        orderBy = orderBy if isinstance(orderBy, list) else [orderBy]
+        ascending = ascending if isinstance(ascending, list) else [ascending] * len(orderBy)
+        for column in orderBy:
+            if column not in fileColumns + summaryColumns:
+                raise Exception(f"Unknown column '{column}' to sort by")
+        # Designs without a value come last (like in pandas)
+        query += " ORDER BY " + ", ".join(f'"{column}" {"ASC" if asc else "DESC"} NULLS LAST'
+                                          for column, asc in zip(orderBy, ascending))
+    if limit is not None:
+        query += f" LIMIT {int(limit)}"
+    return query, params
+
+def _readDesign(filepath, knownHash):
+    # Reads the file information of a design file and, if its hash differs
+    # from knownHash, its summary. Errors are returned instead of raised, so
+    # a single bad file doesn't stop the others
+    try:
+        info = getFileInfo(filepath)
+        if info[2] == knownHash:
+            return {'info': info, 'row': None}
+        with open(filepath, 'rb') as f:
+            data = pickle.load(f)
+        return {'info': info, 'row': getSummaryRow(data.get('mywinding'), data.get('myind'), data.get('result'))}
+    except Exception as e:
+        return e
+
+def _writeRows(datafolder, rows):
+    # Adds or replaces rows (fileColumns + summaryColumns) in the index
+    if len(rows) == 0:
+        return
+    with _connect(datafolder) as con:
+        con.executemany(f"INSERT OR REPLACE INTO designs VALUES ({', '.join(['?'] * len(rows[0]))})",
+                        [[_toSql(value) for value in row] for row in rows])
+    con.close()
+
+def _connect(datafolder):
+    # Opens the index of datafolder and creates it if it doesn't exist yet
+    con = sqlite3.connect(os.path.join(datafolder, indexName), timeout=60)
+    columns = [row[1] for row in con.execute("PRAGMA table_info(designs)")]
+    if columns and columns != fileColumns + summaryColumns:
+        # The index can always be rebuilt from the design files, so an index
+        # with other columns (from an older version) is simply replaced
+        con.execute("DROP TABLE designs")
+    columns = ', '.join(f'"{name}"' for name in summaryColumns)
+    con.execute(f"CREATE TABLE IF NOT EXISTS designs (file TEXT PRIMARY KEY, size INTEGER, mtime REAL, hash TEXT, {columns})")
+    # Indices of the results, so filters and sorting (see queryDesigns) don't
+    # need to scan the whole table
+    for i, name in enumerate(summaryColumns[2:]):
+        con.execute(f'CREATE INDEX IF NOT EXISTS designs_{i} ON designs ("{name}")')
+    return con
+
+def _toSql(value):
+    # Converts numpy scalars to values that can be stored by sqlite
+    if isinstance(value, np.generic):
+        value = value.item()
+    if isinstance(value, float) and np.isnan(value):
+        return None
+    return value
@@ -27,6 +27,7 @@ def designs(design_num, simParam):
 
     # Create a new raw inductor object from a certain material
     myind = Inductor("PC200")
+    myind.design_num = design_num
 
     # coreParam contains all the free parameters of a certain core.
     # Then a processing function like coreSingleInductor() is called which
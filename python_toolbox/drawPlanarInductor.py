@@ -17,17 +17,17 @@
 
 import os
 import femm
+from FemmSession import femmSession
+from simulationCache import isReuseAllowed
 import numpy as np
 
 def drawPlanarInductor(myind, simParam):
     # Draws the inductor for the planar simulation in FEMM and saves the
     # result in myind.filename_planar+'.fem'
 
-    if not (os.path.isfile(f"{myind.filename_planar}.fem") and simParam.reuse_file):
-        femm.openfemm(simParam.HIDE_FEMM)
-        if simParam.MINIMIZE_FEMM:
-            femm.main_minimize()
-        femm.newdocument(0)
+    if not (os.path.isfile(f"{myind.filename_planar}.fem") and isReuseAllowed(simParam)):
+        femmSession.open(simParam)
+        femmSession.newdocument()
         femm.mi_showgrid()
         
         ## Setup FEMM
@@ -84,14 +84,14 @@ def drawPlanarInductor(myind, simParam):
             femm.mi_clearselected()
 
         # Draw the windings
-        myind.winding['function'](myind, 'Al', myind.winding['planar_start'][0], 'l', simParam)
-        myind.winding['function'](myind, 'Ar', myind.winding['planar_start'][1], 'r', simParam)
-        if myind.coupled < 0:
-            myind.winding['function'](myind, 'Bl', myind.winding['planar_start'][2], 'l', simParam)
-            myind.winding['function'](myind, 'Br', myind.winding['planar_start'][3], 'r', simParam)
-        elif myind.coupled > 0:
-            myind.winding['function'](myind, 'Br', myind.winding['planar_start'][2], 'l', simParam)
-            myind.winding['function'](myind, 'Bl', myind.winding['planar_start'][3], 'r', simParam)
+        rects, circuits = myind.getConductors(0, simParam)
+        for i in range(rects.shape[0]):
+            center = np.mean(rects[i], axis=0)
+            femm.mi_drawrectangle(rects[i, 0, 0], rects[i, 0, 1], rects[i, 1, 0], rects[i, 1, 1])
+            femm.mi_addblocklabel(center[0], center[1])
+            femm.mi_selectlabel(center[0], center[1])
+            femm.mi_setblockprop('Copper', simParam.COPPER_AUTOMESH, simParam.COPPER_MESHSIZE, circuits[i], 0, 0, 1)
+            femm.mi_clearselected()
 
         # Make the Dirichlet Boundary at the end because for some reason this
         # speeds up the process a lot. Automatically zooms to natural at the end.
@@ -115,4 +115,4 @@ def drawPlanarInductor(myind, simParam):
         
         femm.mi_saveas(file_path)
     
-        femm.closefemm()
+        femmSession.close(simParam)
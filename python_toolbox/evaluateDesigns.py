@@ -16,66 +16,26 @@
 # If not, see https://www.gnu.org/licenses/gpl-3.0.html
 
 # This script reads all designs from the "data" folder and summarizes them in a nice table.
+# Full design data can be loaded from the pickle file in the data folder
+# (<description>.pkl) with waveformArchive.loadDesign if needed.
 
-import os
-import pickle
-import pandas as pd
-from simulationParameters import simulationParameters
+from simulationParameters import SimulationParameters
+from designIndex import queryDesigns, ingestDesigns, summaryColumns
 
-def evaluateDesigns():
-    # Specify the column names that should be printed in the table. This needs
-    # to match with the creation of a row further down
-    mynames = ["description", "num", "A [mm^2]", "h [mm]", "V [mm^3]", 
-               "L_s_pln [nH]", "L_s_axi [nH]", "k", "fs [MHz]", 
-               "Pco_pln [W]", "Pco_axi [W]", "Hdc_max_pln [A/m]"]
-    
-    # Create an empty DataFrame with the right names
-    rawtable = pd.DataFrame(columns=mynames)
-
-    # Get all the filenames from the data directory
-    simParam = simulationParameters()
+def evaluateDesigns(filters=None, orderBy='Pco_pln [W]', ascending=True, limit=None):
+    # The summary of each design is read from the index in the data folder
+    # (see designIndex), which is written when a design is saved. New or
+    # changed design files (e.g. results copied from other machines) are
+    # added to the index first.
+    # Only designs that match filters are shown, sorted by orderBy and limited
+    # to the first limit designs (see designIndex.queryDesigns), e.g.
+    # evaluateDesigns([('V [mm^3]', '<', 300)], 'Pco_pln [W]', limit=10)
+    simParam = SimulationParameters()
     datafolder = simParam.datafolder
-    filenames = os.listdir(datafolder)
-    
-    index = 0
-    for filename in filenames:
-        filepath = os.path.join(datafolder, filename)
-        # Check if it's actually a file
-        if os.path.isfile(filepath):
-            # Load the relevant data from the pickle file
-            with open(filepath, 'rb') as f:
-                data = pickle.load(f)
-            
-            mywinding = data.get('mywinding')
-            myind = data.get('myind')
-            result = data.get('result')
-            
-            # Multiply area by 2 for single designs for a better comparability
-            if myind.coupled == 0:
-                area = myind.dimension['width'] * myind.dimension['depth'] * 2
-            else:
-                area = myind.dimension['width'] * myind.dimension['depth']
-            
-            # Create a new row
-            new_row = {
-                "description": myind.description,
-                "num": mywinding,
-                "A [mm^2]": area,
-                "h [mm]": myind.dimension['height'],
-                "V [mm^3]": area * myind.dimension['height'],
-                "L_s_pln [nH]": result[0].L_self * 1e9,
-                "L_s_axi [nH]": result[1].L_self * 1e9,
-                "k": result[0].k,
-                "fs [MHz]": result[0].fs / 1e6,
-                "Pco_pln [W]": result[0].loss_copper,
-                "Pco_axi [W]": result[1].loss_copper,
-                "Hdc_max_pln [A/m]": max(result[0].Hdc)
-            }
-            rawtable.loc[index] = new_row
-            index += 1
+    ingestDesigns(datafolder)
     
-    # Sort by some desired property, in this case copper loss
-    rawtable = rawtable.sort_values(by='Pco_pln [W]', ascending=True)
+    # Get the table with one query. By default, sort by copper loss
+    rawtable = queryDesigns(datafolder, filters, orderBy, ascending, limit)[summaryColumns]
     print(rawtable)
     
     return rawtable
@@ -15,26 +15,16 @@
 # along with this program.  
 # If not, see https://www.gnu.org/licenses/gpl-3.0.html
 
-import os
-import femm
 import numpy as np
+from resultStore import getStoredResults
 
 def getInductanceAxi(myind, res, msg, simParam):
-    # Determines the inductance for myind using an axisymmetric FEMM simulation
+    # Determines the inductance for myind using an axisymmetric simulation
         
-    femm.openfemm(simParam.HIDE_FEMM)
-    if simParam.MINIMIZE_FEMM:
-        femm.main_minimize()
-    femm.opendocument(f"{myind.filename_axi}.fem")
-
-    if not (os.path.isfile(f"{myind.filename_axi}.ans") and simParam.reuse_file):
-        femm.mi_analyze()
-    femm.mi_loadsolution()
-
-    # Analze results
-    vals = np.zeros((myind.turns, 3), dtype=complex)
-    for i in range(1, myind.turns + 1):
-        vals[i-1, :] = femm.mo_getcircuitproperties(str(i))
+    # Solve the model as drawn and get the circuit properties of all turns
+    circuitNames = [str(i) for i in range(1, myind.turns + 1)]
+    vals, _, _, _ = getStoredResults(myind, 1, myind.filename_axi, myind.filename_axi,
+        None, None, circuitNames, np.zeros((2, 0)), simParam)
 
     # Analze results
     # Get the self inductance by dividing flux linkage by current
@@ -44,5 +34,4 @@ def getInductanceAxi(myind, res, msg, simParam):
     res.calcTrafoModel()
     msg.print_msg(2, f'Simulated inductance axi: Lself={res.L_self*1e9:.1f} nH\n', simParam)
     
-    femm.closefemm()
     return res
@@ -15,35 +15,25 @@
 # along with this program.  
 # If not, see https://www.gnu.org/licenses/gpl-3.0.html
 
-import os
-import femm
 import numpy as np
+from resultStore import getStoredResults
 
 def getInductancePlanar(myind, res, msg, simParam):
-    # Determines the inductance for myind using a planar FEMM simulation
+    # Determines the inductance for myind using a planar simulation
         
-    femm.openfemm(simParam.HIDE_FEMM)
-    if simParam.MINIMIZE_FEMM:
-        femm.main_minimize()
-    femm.opendocument(f"{myind.filename_planar}.fem")
-
-    if not (os.path.isfile(f"{myind.filename_planar}.ans") and simParam.reuse_file):
-        femm.mi_analyze()
-    femm.mi_loadsolution()
+    # Solve the model as drawn and get the circuit properties of all turns
+    circuitNames = [f'{side}{i}' for side in ['Al', 'Ar'] for i in range(1, myind.turns + 1)]
+    if not (myind.coupled == 0):
+        circuitNames += [f'{side}{i}' for side in ['Bl', 'Br'] for i in range(1, myind.turns + 1)]
+    properties, _, _, _ = getStoredResults(myind, 0, myind.filename_planar, myind.filename_planar,
+        None, None, circuitNames, np.zeros((2, 0)), simParam)
 
     # Analze results
-    valsAl = np.zeros((myind.turns, 3), dtype=complex)
-    valsAr = np.zeros((myind.turns, 3), dtype=complex)
-    for i in range(1, myind.turns + 1):
-        valsAl[i-1, :] = femm.mo_getcircuitproperties(f'Al{i}')
-        valsAr[i-1, :] = femm.mo_getcircuitproperties(f'Ar{i}')
-        
+    valsAl = properties[:myind.turns, :]
+    valsAr = properties[myind.turns:2*myind.turns, :]
     if not (myind.coupled == 0):
-        valsBl = np.zeros((myind.turns, 3), dtype=complex)
-        valsBr = np.zeros((myind.turns, 3), dtype=complex)
-        for i in range(1, myind.turns + 1):
-            valsBl[i-1, :] = femm.mo_getcircuitproperties(f'Bl{i}')
-            valsBr[i-1, :] = femm.mo_getcircuitproperties(f'Br{i}')
+        valsBl = properties[2*myind.turns:3*myind.turns, :]
+        valsBr = properties[3*myind.turns:, :]
     
     # Get the self inductance by dividing flux linkage by current. 
     # All series turns have the same current, so no need to add them up.
@@ -65,5 +55,4 @@ def getInductancePlanar(myind, res, msg, simParam):
     msg.print_msg(2, f'Simulated inductance planar: Lself={res.L_self*1e9:.1f} nH, k={res.k:.2f}\n', simParam)
     msg.print_msg(5, f'L_mutual={res.L_coupled*1e9:.1f} nH; L_out={res.L_out*1e9:.1f} nH; L_m={res.L_m*1e9:.1f} nH\n', simParam)
     
-    femm.closefemm()
     return res
@@ -88,53 +88,86 @@ def getRectangle(bottom_left_x, bottom_left_y, width, height):
                      [bottom_left_x + width, bottom_left_y + height]])
     return rect
 
+# Calculates the exact integral of the piecewise linear waveform ydata with
+# datapoints at times specified in time, evaluated at each datapoint (the
+# first value is 0). The distance between elements does not need to be
+# constant. Several waveforms (stacked in the leading axes of ydata, datapoints
+# in the last axis) are integrated at once. time is either shared by all
+# waveforms or stacked in the same way as ydata.
+def myintegralNodes(time, ydata):
+    time = np.asarray(time, dtype=float)
+    ydata = np.asarray(ydata, dtype=float)
+    # Trapezoid per interval is exact for linear segments
+    area = 0.5 * np.diff(time, axis=-1) * (ydata[..., 1:] + ydata[..., :-1])
+    y = np.zeros(np.broadcast(time, ydata).shape)
+    y[..., 1:] = np.cumsum(area, axis=-1)
+    return y
+
 # Calculates the curve of integrating ydata with datapoints at times specified in
 # time. The distance between elements does not need to be constant.
+# The curve is evaluated exactly at 1001 equidistant points. Several waveforms
+# (stacked in the leading axes of ydata) are integrated at once.
 def myintegral(time, ydata):
+    time = np.asarray(time, dtype=float)
+    ydata = np.asarray(ydata, dtype=float)
     x = np.linspace(time[0], time[-1], 1001)
-    y = np.zeros(len(x))
-    # Iterate over the array and integrate the the waveform. 
-    j = 1
-    init = 0
-    for i in range(len(time) - 1):
-        while j < len(x) and x[j] <= time[i + 1]:
-            if time[i + 1] - time[i] == 0:
-                y[j] = 0
-            else:
-                y[j] = (0.5 * (ydata[i + 1] - ydata[i]) / (time[i + 1] - time[i]) * (x[j] - time[i])**2 + 
-                        ydata[i] * (x[j] - time[i]) + init)
-            j += 1
-        init = y[j - 1]
-    
+    nodes = myintegralNodes(time, ydata)
+    # Interval of each point. Points on a datapoint belong to the interval
+    # before it, so intervals of length zero are never used
+    i = np.clip(np.searchsorted(time, x, side='left') - 1, 0, len(time) - 2)
+    dt = time[i + 1] - time[i]
+    slope = (ydata[..., i + 1] - ydata[..., i]) / np.where(dt == 0, 1, dt)
+    y = 0.5 * slope * (x - time[i])**2 + ydata[..., i] * (x - time[i]) + nodes[..., i]
     return x, y
 
+# Calculates the minimum and maximum of the integral of ydata with datapoints
+# at times specified in time (see myintegralNodes). Besides the datapoints,
+# the integral has its extrema where ydata crosses zero inside an interval.
+# Several waveforms (stacked in the leading axes of ydata and optionally time)
+# are handled at once.
+def myintegralRange(time, ydata):
+    time = np.asarray(time, dtype=float)
+    ydata = np.asarray(ydata, dtype=float)
+    nodes = myintegralNodes(time, ydata)
+    y0 = ydata[..., :-1]
+    y1 = ydata[..., 1:]
+    crossing = y0 * y1 < 0
+    dt = np.diff(time, axis=-1)
+    # Integral at the zero crossing: Integral at the start of the interval
+    # plus the triangle up to the crossing
+    extremum = nodes[..., :-1] + 0.5 * y0**2 * dt / np.where(crossing, y0 - y1, 1)
+    extremum = np.where(crossing, extremum, nodes[..., :-1])
+    allValues = np.concatenate([nodes, extremum], axis=-1)
+    return np.min(allValues, axis=-1), np.max(allValues, axis=-1)
+
 # Calculates the average of ydata with datapoints at times specified in
 # time. The distance between elements does not need to be constant.
+# Several waveforms (stacked in the leading axes of ydata and optionally time)
+# are handled at once.
 def mymean(time, ydata):
-    # Compute the rms value
-    _, y = myintegral(time, ydata)
-    dt = time[-1] - time[0]
-    result = 1 / dt * y[-1]
+    time = np.asarray(time, dtype=float)
+    y = myintegralNodes(time, ydata)
+    dt = time[..., -1] - time[..., 0]
+    result = 1 / dt * y[..., -1]
     return result
 
 # Calculates the rms value of ydata with datapoints at times specified in
 # time. The distance between elements does not need to be constant as
-# opposed to the built_in rms function
+# opposed to the built_in rms function.
+# Several waveforms (stacked in the leading axes of ydata and optionally time)
+# are handled at once.
 def myrms(time, ydata):
-    sum_val = 0
-    # Iterate over the array and integrate the square of the waveform. 
-    # See report for a detailed explanation.
-    for i in range(len(time) - 1):
-        dt = time[i + 1] - time[i]
-        if ydata[i + 1] == ydata[i]:
-            # Constant value over the interval
-            sum_val += dt * ydata[i]**2
-        else:
-            # Value changes linearly over the interval
-            sum_val += dt * (ydata[i]**2 + ydata[i] * ydata[i + 1] + ydata[i + 1]**2) / 3
+    time = np.asarray(time, dtype=float)
+    ydata = np.asarray(ydata, dtype=float)
+    # Integrate the square of the waveform. The square of a linear segment
+    # integrates to dt * (y0^2 + y0*y1 + y1^2) / 3 (also valid for constant
+    # segments). See report for a detailed explanation.
+    y0 = ydata[..., :-1]
+    y1 = ydata[..., 1:]
+    sum_val = np.sum(np.diff(time, axis=-1) * (y0**2 + y0 * y1 + y1**2) / 3, axis=-1)
 
     # Compute the duration of the interval
-    T = time[-1] - time[0]
+    T = time[..., -1] - time[..., 0]
     result = np.sqrt(sum_val / T)
     return result
 
@@ -157,85 +190,233 @@ def getSpectrum(data, timestamps, N):
     frequency = f_sample / N * np.arange(0, N//2+1)
     return amplitude, frequency
 
+# Computes the exact Fourier series of a periodic piecewise linear waveform
+# with nodes at timestamps (one period from timestamps[0] to timestamps[-1]).
+# Returns the complex amplitudes of DC and the first numHarmonics harmonics
+# and their frequencies, scaled like getSpectrum (amplitude[0] is the mean).
+# Several waveforms (rows of data) are analyzed at once.
+def getSpectrumPwl(data, timestamps, numHarmonics):
+    data = np.asarray(data, dtype=float)
+    timestamps = np.asarray(timestamps, dtype=float)
+    period = timestamps[-1] - timestamps[0]
+    frequency = np.arange(0, numHarmonics+1) / period
+    # Integral of the waveform multiplied with exp(-j*2*pi*f*t) over one period
+    rising, falling = pwlExpIntegrals(timestamps, frequency)
+    integral = data[..., :-1] @ falling + data[..., 1:] @ rising
+    amplitude = integral / period * 2
+    amplitude[..., 0] = amplitude[..., 0] / 2  # DC component should not be doubled
+    return amplitude, frequency
+
+# Cache of the operators created by getPwlProjection. The operator only
+# depends on the time grids, so it is created once for each pair of grids.
+_pwlProjectionCache = {}
+
+# Returns the least-squares operator P that fits a piecewise linear waveform
+# with nodes at time_nodes to data sampled at time_samples: nodes = P @ data.
+# Several waveforms (rows) can be fitted at once with nodes = data @ P.T
+def getPwlProjection(time_nodes, time_samples):
+    time_nodes = np.asarray(time_nodes, dtype=float)
+    time_samples = np.asarray(time_samples, dtype=float)
+    key = (time_nodes.tobytes(), time_samples.tobytes())
+    if key not in _pwlProjectionCache:
+        # Design matrix: Each sample is a linear interpolation between the
+        # two nodes of the segment it falls into
+        seg = np.clip(np.searchsorted(time_nodes, time_samples, side='right') - 1, 0, len(time_nodes) - 2)
+        alpha = (time_nodes[seg+1] - time_samples) / (time_nodes[seg+1] - time_nodes[seg])
+        A = np.zeros((len(time_samples), len(time_nodes)))
+        rows = np.arange(len(time_samples))
+        A[rows, seg] = alpha
+        A[rows, seg+1] = 1 - alpha
+        # Least-squares solution for any right-hand side (same as np.linalg.lstsq)
+        _pwlProjectionCache[key] = np.linalg.pinv(A)
+    return _pwlProjectionCache[key]
+
+# Integrates the two halves of the piecewise linear hat functions with nodes
+# at time_nodes multiplied with exp(-j*2*pi*f*t) for each frequency f.
+# Returns two arrays (segments x frequencies):
+# rising[k]  = integral over segment k of (t - t_k) / (t_k+1 - t_k) * exp(-j*2*pi*f*t)
+# falling[k] = integral over segment k of (t_k+1 - t) / (t_k+1 - t_k) * exp(-j*2*pi*f*t)
+def pwlExpIntegrals(time_nodes, frequencies):
+    time_nodes = np.asarray(time_nodes, dtype=float)
+    h = np.diff(time_nodes)[:, None]
+    c = -2j * np.pi * np.atleast_1d(np.asarray(frequencies, dtype=float))[None, :]
+    x = c * h
+    small = np.abs(x) < 1e-2
+    # Avoid the division by zero for DC, those values are taken from the series expansion
+    x_safe = np.where(small, 1, x)
+    # Integrals of exp(x*u) and u*exp(x*u) for u = 0...1
+    i0 = np.where(small, 1 + x/2 + x**2/6 + x**3/24 + x**4/120, (np.exp(x_safe) - 1) / x_safe)
+    i1 = np.where(small, 1/2 + x/3 + x**2/8 + x**3/30 + x**4/144,
+                  np.exp(x_safe) / x_safe - (np.exp(x_safe) - 1) / x_safe**2)
+    phase = h * np.exp(c * time_nodes[:-1, None])
+    rising = phase * i1
+    falling = phase * (i0 - i1)
+    return rising, falling
+
+# Cache of the operators created by getHarmonicPwlProjection
+_harmonicPwlProjectionCache = {}
+
+# Returns the complex matrix H (frequencies x nodes) that directly projects
+# sinusoids onto a piecewise linear waveform with nodes at time_nodes.
+# The projection is the continuous least-squares fit over one period.
+# A waveform Re(b)*cos(2*pi*f*t) + Im(b)*sin(2*pi*f*t) summed over all
+# frequencies has the nodes np.real(b @ H), where b has one complex amplitude
+# per frequency. Several waveforms are projected at once if b has one row per waveform.
+def getHarmonicPwlProjection(time_nodes, frequencies):
+    time_nodes = np.asarray(time_nodes, dtype=float)
+    frequencies = np.atleast_1d(np.asarray(frequencies, dtype=float))
+    key = (time_nodes.tobytes(), frequencies.tobytes())
+    if key not in _harmonicPwlProjectionCache:
+        h = np.diff(time_nodes)
+        # Gram matrix of the hat functions
+        G = np.zeros((len(time_nodes), len(time_nodes)))
+        G[np.arange(len(h)), np.arange(len(h))] += h / 3
+        G[np.arange(len(h)) + 1, np.arange(len(h)) + 1] += h / 3
+        G[np.arange(len(h)), np.arange(len(h)) + 1] = h / 6
+        G[np.arange(len(h)) + 1, np.arange(len(h))] = h / 6
+        # Integral of each hat function multiplied with exp(-j*2*pi*f*t)
+        rising, falling = pwlExpIntegrals(time_nodes, frequencies)
+        E = np.zeros((len(time_nodes), len(frequencies)), dtype=complex)
+        E[:-1, :] += falling
+        E[1:, :] += rising
+        _harmonicPwlProjectionCache[key] = np.linalg.solve(G, E).T
+    return _harmonicPwlProjectionCache[key]
+
+# Cache of the bases created by getTrigBasis
+_trigBasisCache = {}
+
+# Returns the complex matrix (frequencies x samples) exp(-j*2*pi*f*t), which
+# is cos(2*pi*f*t) - j*sin(2*pi*f*t). The time-domain waveforms
+# Re(b)*cos(2*pi*f*t) + Im(b)*sin(2*pi*f*t) summed over all frequencies are
+# np.real(b @ basis), where b has one complex amplitude per frequency.
+# Several waveforms are synthesized at once if b has one row per waveform.
+def getTrigBasis(frequencies, time):
+    frequencies = np.atleast_1d(np.asarray(frequencies, dtype=float))
+    time = np.asarray(time, dtype=float)
+    key = (frequencies.tobytes(), time.tobytes())
+    if key not in _trigBasisCache:
+        _trigBasisCache[key] = np.exp(-2j * np.pi * np.outer(frequencies, time))
+    return _trigBasisCache[key]
+
+# Calculates the switching frequency that achieves the negative current
+# required for soft-switching within the desired dead time.
+# Works for scalars and arrays of operating points (Vin, D, iout_avg, L_self
+# and k are broadcast against each other)
+def calcSwitchingFrequency(Vin, D, iout_avg, L_self, k, simParam):
+    # Approximate the required negative current from the desired dead time
+    Ineg = Vin * simParam.Cds / simParam.deadTime
+    leg_ripple = 2 * iout_avg / 2 + 2 * Ineg
+    
+    # Calculate the switching frequency to achieve the negative current
+    # The case D >= 0.5 is the same as D < 0.5 with D and 1-D swapped
+    D_on = np.where(D < 0.5, D, 1 - D)
+    fs = Vin * D_on / (2 * L_self * leg_ripple) * (2 / (1 + k) * np.abs(0.5 - D) + 1 / (1 - k))
+    return fs
+
 # Determines the converter waveforms by solving the differential equations
 def getWaveformMath(sp, fs, res):
+    data, timestamps = getWaveformMathBatch(sp.Vin, sp.Vout, sp.iout_avg, sp.D, fs, res.L_m, res.L_out)
+    return data, timestamps
+
+# Determines the converter waveforms for many operating points at once.
+# All inputs are broadcast against each other. The returned waveforms and
+# timestamps have the broadcast shape with the 5 datapoints in the last axis.
+def getWaveformMathBatch(Vin, Vout, iout_avg, D, fs, L_m, L_out):
+    Vin, Vout, iout_avg, D, fs, L_m, L_out = np.broadcast_arrays(
+        *[np.asarray(x, dtype=float) for x in (Vin, Vout, iout_avg, D, fs, L_m, L_out)])
+    low = (D < 0.5)[..., None]
+    Vin = Vin[..., None]
+    Vout = Vout[..., None]
+    D = D[..., None]
+    L_m = L_m[..., None]
+    L_out = L_out[..., None]
+    Ts = 1/fs[..., None]
+    zero = np.zeros(Ts.shape)
+    
+    # D < 0.5
+    timestamps_low = np.concatenate([zero, D*Ts, Ts/2, Ts/2+D*Ts, Ts], axis=-1)
+    deltaI_mag_low = Vin*Ts*D/(2*L_m)
+    deltaI_out_low = Vin*Ts/L_out*D*(0.5-D)
+    # Changes of the magnetizing and output current in each interval
+    step_mag_low = np.concatenate([D*Ts/L_m*Vin/2, zero, -D*Ts/L_m*Vin/2, zero], axis=-1)
+    step_out_low = np.concatenate([D*Ts*1/L_out*(Vin/2-Vout), (0.5-D)*Ts*(-Vout)/L_out,
+                                   D*Ts*1/L_out*(Vin/2-Vout), (0.5-D)*Ts*(-Vout)/L_out], axis=-1)
+    # D >= 0.5
+    timestamps_high = np.concatenate([zero, (D-0.5)*Ts, Ts/2, D*Ts, Ts], axis=-1)
+    deltaI_mag_high = Vin*Ts/(2*L_m)*(1-D)
+    deltaI_out_high = Vin*Ts/L_out*(D-0.5)*(1-D)
+    step_mag_high = np.concatenate([zero, (1-D)*Ts/L_m*Vin/2, zero, -(1-D)*Ts/L_m*Vin/2], axis=-1)
+    step_out_high = np.concatenate([(D-0.5)*Ts*1/L_out*(Vin-Vout), (1-D)*Ts*(Vin/2-Vout)/L_out,
+                                    (D-0.5)*Ts*1/L_out*(Vin-Vout), (1-D)*Ts*(Vin/2-Vout)/L_out], axis=-1)
+    
+    timestamps = np.where(low, timestamps_low, timestamps_high)
+    deltaI_mag = np.where(low, deltaI_mag_low, deltaI_mag_high)
+    deltaI_out = np.where(low, deltaI_out_low, deltaI_out_high)
+    
     data = {}
-    data['imag'] = np.zeros(5)
-    data['iout'] = np.zeros(5)
-    data['i1'] = np.zeros(5)
-    data['i2'] = np.zeros(5)
-    
-    Ts = 1/fs
-    if sp.D < 0.5:
-        timestamps = np.array([0, sp.D*Ts, Ts/2, Ts/2+sp.D*Ts, Ts])
-        deltaI_mag = sp.Vin*Ts*sp.D/(2*res.L_m)
-        deltaI_out = sp.Vin*Ts/res.L_out*sp.D*(0.5-sp.D)
-        # Magnetizing current
-        data['imag'][0] = -deltaI_mag/2
-        data['imag'][1] = data['imag'][0] + sp.D*Ts/res.L_m*sp.Vin/2
-        data['imag'][2] = data['imag'][1]
-        data['imag'][3] = data['imag'][2] - sp.D*Ts/res.L_m*sp.Vin/2
-        data['imag'][4] = data['imag'][3]
-        # Output current
-        data['iout'][0] = sp.iout_avg - deltaI_out/2
-        data['iout'][1] = data['iout'][0] + sp.D*Ts*1/res.L_out*(sp.Vin/2-sp.Vout)
-        data['iout'][2] = data['iout'][1] + (0.5-sp.D)*Ts*(-sp.Vout)/res.L_out
-        data['iout'][3] = data['iout'][2] + sp.D*Ts*1/res.L_out*(sp.Vin/2-sp.Vout)
-        data['iout'][4] = data['iout'][3] + (0.5-sp.D)*Ts*(-sp.Vout)/res.L_out
-    else:
-        timestamps = np.array([0, (sp.D-0.5)*Ts, Ts/2, sp.D*Ts, Ts])
-        deltaI_mag = sp.Vin*Ts/(2*res.L_m)*(1-sp.D)
-        deltaI_out = sp.Vin*Ts/res.L_out*(sp.D-0.5)*(1-sp.D)
-        # Magnetizing current
-        data['imag'][0] = -deltaI_mag/2
-        data['imag'][1] = data['imag'][0]
-        data['imag'][2] = data['imag'][1] + (1-sp.D)*Ts/res.L_m*sp.Vin/2
-        data['imag'][3] = data['imag'][2]
-        data['imag'][4] = data['imag'][3] - (1-sp.D)*Ts/res.L_m*sp.Vin/2
-        # Output current
-        data['iout'][0] = sp.iout_avg - deltaI_out/2
-        data['iout'][1] = data['iout'][0] + (sp.D-0.5)*Ts*1/res.L_out*(sp.Vin-sp.Vout)
-        data['iout'][2] = data['iout'][1] + (1-sp.D)*Ts*(sp.Vin/2-sp.Vout)/res.L_out
-        data['iout'][3] = data['iout'][2] + (sp.D-0.5)*Ts*1/res.L_out*(sp.Vin-sp.Vout)
-        data['iout'][4] = data['iout'][3] + (1-sp.D)*Ts*(sp.Vin/2-sp.Vout)/res.L_out
+    # Magnetizing current
+    data['imag'] = np.cumsum(np.concatenate([-deltaI_mag/2, np.where(low, step_mag_low, step_mag_high)], axis=-1), axis=-1)
+    # Output current
+    data['iout'] = np.cumsum(np.concatenate([iout_avg[..., None] - deltaI_out/2, np.where(low, step_out_low, step_out_high)], axis=-1), axis=-1)
     
     data['i1'] = (data['iout'] + data['imag']) / 2
     data['i2'] = (data['iout'] - data['imag']) / 2
     
     return data, timestamps
 
-def calcCapacitance(time, current, res, simParam):
+# Creates the input current from the phase currents i1 and i2 (datapoints at
+# the 5 timestamps in time). The input current jumps at the switching
+# instants, which is modelled with an additional datapoint del_ later.
+# Several operating points (stacked in the leading axes) are handled at once.
+def getInputCurrent(time, i1, i2, D):
+    del_ = 1e-12
+    time = np.asarray(time, dtype=float)
+    i1 = np.asarray(i1, dtype=float)
+    i2 = np.asarray(i2, dtype=float)
+    low = (np.asarray(D) < 0.5)[..., None]
+    timestamps = np.stack([time[..., 0], time[..., 1], time[..., 1]+del_, time[..., 2],
+                           time[..., 2]+del_, time[..., 3], time[..., 3]+del_, time[..., 4]], axis=-1)
+    zero = np.zeros(np.broadcast(i1[..., 0], i2[..., 0]).shape)
+    i_in_low = np.stack([i1[..., 0], i1[..., 1], zero, zero,
+                         i2[..., 2], i2[..., 3], zero, zero], axis=-1)
+    i_in_high = np.stack([i1[..., 0] + i2[..., 0], i1[..., 1] + i2[..., 1], i1[..., 1], i1[..., 2],
+                          i1[..., 2] + i2[..., 2], i1[..., 3] + i2[..., 3], i2[..., 3], i2[..., 4]], axis=-1)
+    i_in = np.where(low, i_in_low, i_in_high)
+    return timestamps, i_in
+
+# Calculates the required input and output capacitance to achieve the
+# ripple specified in simParam for many operating points at once (stacked
+# in the leading axes of time, i1, i2, D and iout_avg).
+# Returns the arrays Cin and Cout
+def calcCapacitanceBatch(time, i1, i2, D, iout_avg, simParam):
+    timestamps, i_in = getInputCurrent(time, i1, i2, D)
+    # The charge is the exact integral of the piecewise linear current
+    inChrg_min, inChrg_max = myintegralRange(timestamps, mymean(timestamps, i_in)[..., None] - i_in)
+    # C = Q / V
+    Cin = (inChrg_max - inChrg_min) / simParam.DeltaVinMax
+    
+    iout = np.asarray(i1) + np.asarray(i2)
+    outChrg_min, outChrg_max = myintegralRange(time, np.asarray(iout_avg)[..., None] - iout)
+    Cout = (outChrg_max - outChrg_min) / simParam.DeltaVoutMax
+    return Cin, Cout
+
+def calcCapacitance(time, current, res, simParam, interactive=True):
     """Calculates the required capacitance to achieve a certain input and
-    output ripple based on the phase-current waveforms"""
+    output ripple based on the phase-current waveforms. The rms currents and
+    (with SHOWPLOTS) the currents and charges are only shown if interactive"""
     
-    del_ = 1e-12
-    timestamps = np.array([time[0], time[1], time[1]+del_, time[2], time[2]+del_, time[3], time[3]+del_, time[4]])
-    i_in = np.zeros(8)
-    
-    if simParam.D < 0.5:
-        i_in[0:2] = current['i1'][0:2]
-        i_in[2:4] = 0
-        i_in[4:6] = current['i2'][2:4]
-        i_in[6:8] = 0
-    else:
-        i_in[0:2] = current['i1'][0:2] + current['i2'][0:2]
-        i_in[2:4] = current['i1'][1:3]
-        i_in[4:6] = current['i1'][2:4] + current['i2'][2:4]
-        i_in[6:8] = current['i2'][3:5]
+    res.Cin, res.Cout = calcCapacitanceBatch(time, current['i1'], current['i2'], simParam.D, simParam.iout_avg, simParam)
+    if not interactive:
+        return res
     
-    time_interpol1, inChrg = myintegral(timestamps, mymean(timestamps, i_in) - i_in)
-    inChrg_ripple = max(inChrg) - min(inChrg)
-    # C = Q / V
-    res.Cin = inChrg_ripple / simParam.DeltaVinMax
+    timestamps, i_in = getInputCurrent(time, current['i1'], current['i2'], simParam.D)
     print(f"Iin,rms = {myrms(timestamps, i_in):.1f}")
-
     iout = current['i1'] + current['i2']
-    time_interpol2, outChrg = myintegral(time, simParam.iout_avg - iout)
-    outChrg_ripple = max(outChrg) - min(outChrg)
-    res.Cout = outChrg_ripple / simParam.DeltaVoutMax
     print(f"Iout,rms = {myrms(time, iout):.1f}")
 
     if simParam.SHOWPLOTS:
+        time_interpol1, inChrg = myintegral(timestamps, mymean(timestamps, i_in) - i_in)
+        time_interpol2, outChrg = myintegral(time, simParam.iout_avg - iout)
         plt.figure()
         plt.subplot(2, 1, 1)
         plt.plot(timestamps*1e6, i_in, label="I_{in}")
@@ -0,0 +1,63 @@
+# This file is part of the Planar Inductor Toolbox
+# Copyright (C) 2025 Adrian Keil
+# 
+# The Planar Inductor Toolbox is free software: you can redistribute it 
+# and/or modify it under the terms of the GNU General Public License as 
+# published by the Free Software Foundation, either version 3 of the 
+# License, or (at your option) any later version.
+# 
+# The Planar Inductor Toolbox is distributed in the hope that it will be
+# useful, but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+# 
+# You should have received a copy of the GNU General Public License
+# along with this program.  
+# If not, see https://www.gnu.org/licenses/gpl-3.0.html
+
+import os
+import numpy as np
+from SolverBackend import getSolverBackend
+from simulationCache import isReuseAllowed
+
+def getStoredResults(myind, simnum, baseFile, solutionFile, freq, currents, circuitNames, centers, simParam):
+    # Returns the results of a solution (see SolverBackend.solve and
+    # SolverBackend.getResults). With RESULT_STORE, the results are stored in
+    # solutionFile.npz after solving and are read from there the next time
+    # (if files are reused, see isReuseAllowed), so the solver isn't needed
+    # at all for solutions that were already evaluated.
+    centers = np.asarray(centers, dtype=float).reshape(2, -1)
+    if hasStoredResults(solutionFile, simParam):
+        with np.load(f"{solutionFile}.npz") as data:
+            # Only use the results if the same quantities were extracted
+            if list(data['circuits']) == list(circuitNames) and np.array_equal(data['centers'], centers):
+                return data['properties'], data['vol'], data['bx'], data['by']
+    
+    backend = getSolverBackend(simParam)
+    backend.solve(myind, simnum, baseFile, solutionFile, freq, currents, simParam)
+    properties, vol, bx, by = backend.getResults(circuitNames, centers)
+    backend.close(simParam)
+    
+    if simParam.RESULT_STORE:
+        # Write to a temporary file first, so there is never an incomplete
+        # store (e.g. if the simulation is aborted)
+        os.makedirs(os.path.dirname(os.path.abspath(solutionFile)), exist_ok=True)
+        np.savez(f"{solutionFile}_tmp.npz", method=getExtractionMethod(simParam),
+                 circuits=np.array(circuitNames, dtype=str), centers=centers,
+                 properties=np.asarray(properties, dtype=complex), vol=vol, bx=bx, by=by)
+        os.replace(f"{solutionFile}_tmp.npz", f"{solutionFile}.npz")
+    return properties, vol, bx, by
+
+def hasStoredResults(solutionFile, simParam):
+    # Checks if there are stored results of a solution that may be used
+    # (extracted with the same method)
+    if not (simParam.RESULT_STORE and isReuseAllowed(simParam) and os.path.isfile(f"{solutionFile}.npz")):
+        return False
+    with np.load(f"{solutionFile}.npz") as data:
+        return 'method' in data and str(data['method']) == getExtractionMethod(simParam)
+
+def getExtractionMethod(simParam):
+    # Solver backend and (for FEMM) if the results are read from the .ans
+    # file or by the FEMM postprocessor. These are different approximations,
+    # so the results of one method are not used for another one
+    return f"{simParam.SOLVER_BACKEND}, READ_ANS_FILES={simParam.READ_ANS_FILES}"
@@ -0,0 +1,408 @@
+# This file is part of the Planar Inductor Toolbox
+# Copyright (C) 2025 Adrian Keil
+# 
+# The Planar Inductor Toolbox is free software: you can redistribute it 
+# and/or modify it under the terms of the GNU General Public License as 
+# published by the Free Software Foundation, either version 3 of the 
+# License, or (at your option) any later version.
+# 
+# The Planar Inductor Toolbox is distributed in the hope that it will be
+# useful, but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+# 
+# You should have received a copy of the GNU General Public License
+# along with this program.  
+# If not, see https://www.gnu.org/licenses/gpl-3.0.html
+
+import numpy as np
+import time
+from pathlib import Path
+import pickle
+
+from designs import designs
+from Inductor import Inductor
+from Message import Message
+from Result import Result
+from getInductancePlanar import getInductancePlanar
+from getInductanceAxi import getInductanceAxi
+from helperFunctions import getWaveformMath, calcSwitchingFrequency, calcCapacitance, myrms, getSpectrumPwl, sortData, displayLossDensityTable, plotFluxDensityComponent, getPwlProjection, getHarmonicPwlProjection, getTrigBasis
+from corelossSullivan import corelossSullivanBatch
+from SolverBackend import getSolverBackend
+from solveHarmonicsParallel import solveHarmonicsParallel
+from solveHarmonic import solveHarmonic, superposeHarmonic, getFrequencyModel, getHarmonicFile
+from designIndex import updateDesignIndex
+from waveformArchive import archiveWaveforms
+
+def simulateDesign(design, simParam, save=True, interactive=False):
+    # Simulates one design and returns its results (result[0] for planar,
+    # result[1] for axi, None if the simulation was not run).
+    # design is either a design number (see designs) or an Inductor.
+    # With save, the results are saved in the data folder (see
+    # evaluateDesigns). Plots (SHOWPLOTS and the loss-density table) and
+    # console messages are only shown if interactive (otherwise messages only
+    # go to the logfile), so the function can be called repeatedly, e.g.
+    # for many designs in one process or in workers. The solver is kept open between
+    # calls and needs to be closed by the caller (getSolverBackend(simParam).shutdown())
+    
+    # Field solver that is used for all draws and solves
+    backend = getSolverBackend(simParam)
+    
+    ## Prepare a fresh start
+    start_time = time.time()
+
+    # Create new inductor object with the design (unless an inductor is given)
+    if isinstance(design, Inductor):
+        myind = design
+    else:
+        myind = designs(design, simParam)
+    mywinding = myind.design_num
+
+    # Define a new message object which is used to store all messages into a logfile and print messages to the console which are above a specified priority
+    msg = Message(f"{simParam.log_folder}/{myind.uniqueName}.txt", interactive)
+    msg.print_msg(1, f"------------ {myind.description} ------------\n", simParam)
+    if mywinding is not None:
+        msg.print_msg(1, f"simDesign={mywinding}\n", simParam)
+
+    ## Draw the inductor and get the inductance
+    # For coupled designs, the inductance is always determined from
+    # planar simulation because axisymmetric cannot reflect coupling
+    # (except for designs with both windigs on one limb but that is 
+    # too special to make an exception)
+    result = [None, None]  # result[0] for planar, result[1] for axi
+    
+    if simParam.SIMULATIONS[0] == 1 or not (myind.coupled == 0):
+        # Prepare a result object
+        result[0] = Result()
+        backend.run(msg, simParam, backend.draw, myind, 0, simParam)
+        msg.print_msg(5, f"Saved to: {myind.filename_planar}.fem\n", simParam)
+        result[0] = backend.run(msg, simParam, getInductancePlanar, myind, result[0], msg, simParam)
+
+    ## Draw the axisymmetric inductor if the user wants to do an axisymmetric simulation
+    if simParam.SIMULATIONS[1] == 1:
+        backend.run(msg, simParam, backend.draw, myind, 1, simParam)
+        msg.print_msg(5, f"Saved to: {myind.filename_axi}.fem\n", simParam)
+        # Reuse the contents of result[0] and only modify L_self
+        # The reason is, that the other parameters cannot be determined
+        # from axisymmetric simulation for coupled inductors
+        if simParam.SIMULATIONS[0] == 1 or not (myind.coupled == 0):
+            result[1] = Result()
+            # Copy relevant attributes from result[0]
+            result[1].__dict__.update(result[0].__dict__)
+        else:
+            result[1] = Result()
+            result[1].k = 0
+            result[1].L_coupled = 0
+        result[1] = backend.run(msg, simParam, getInductanceAxi, myind, result[1], msg, simParam)
+
+    ## Main simulation loop
+    for simnum in range(2):  # 0 for planar, 1 for axi
+        if simParam.SIMULATIONS[simnum] == 1:
+            if simnum == 0:
+                msg.print_msg(1, "------ Planar Simulation ------\n", simParam)
+            else:
+                msg.print_msg(1, "\n------ Axisymmetric Simulation ------\n", simParam)
+
+            ## Calculate the required frequency for soft-switching
+            result[simnum].fs = float(calcSwitchingFrequency(simParam.Vin, simParam.D, simParam.iout_avg,
+                                                             result[simnum].L_self, result[simnum].k, simParam))
+            
+            msg.print_msg(2, f"fs (calculated) = {result[simnum].fs*1e-6:.2f} MHz\n", simParam)
+
+            # Check if frequency should be overwritten
+            if simParam.fs_overwrite > 0:
+                result[simnum].fs = simParam.fs_overwrite
+                msg.print_msg(2, f"fs (overwritten) = {result[simnum].fs*1e-6:.2f} MHz\n", simParam)
+        
+            ## Get the waveform
+            current, time_array = getWaveformMath(simParam, result[simnum].fs, result[simnum])
+            if interactive and simParam.SHOWPLOTS:
+                import matplotlib.pyplot as plt
+                plt.figure()
+                plt.plot(time_array, current['i1'], label='I_1')
+                plt.plot(time_array, current['i2'], label='I_2')
+                plt.grid(True)
+                plt.xlabel("Time [s]")
+                plt.ylabel("Current [A]")
+                plt.legend(loc='upper left')
+                plt.xlim([0, 1/result[simnum].fs])
+                plt.show()
+        
+            ## Calculate required input and output capacitance
+            if simParam.CALC_CAP:
+                result[simnum] = calcCapacitance(time_array, current, result[simnum], simParam, interactive)
+                msg.print_msg(2, f"Required input capacitance: {result[simnum].Cin*1e6:.1f} uF\n", simParam)
+                msg.print_msg(2, f"Required output capacitance: {result[simnum].Cout*1e6:.1f} uF\n", simParam)
+        
+            ## MOSFET conduction-loss
+            result[simnum].conduction_loss = simParam.Rds_on * myrms(time_array, current['i1'])**2 * 2    # *2 because of two legs
+            msg.print_msg(1, f"Transistor conduction loss: {result[simnum].conduction_loss:.1f}W\n", simParam)
+    
+            ## Get the spectrum of the current and analyze the largest harmonics
+            # Exact Fourier series of both piecewise linear currents at once
+            amplitude, f = getSpectrumPwl(np.vstack([current['i1'], current['i2']]), time_array, simParam.NUM_SPECTRUM_HARMONICS)
+            amplitude_1 = amplitude[0]
+            amplitude_2 = amplitude[1]
+        
+            # Sort spectrum by amplitude
+            # Currents are identical, just phase-shifted so they contain the same
+            # absolute frequency components. Therefore both calls to sortData return
+            # the same order of frequencies.
+            # Keep the first entry (DC component) unchanged and sort the rest
+            amp1_sorted_rest, f_sorted_rest = sortData(amplitude_1[1:], f[1:])
+            amp2_sorted_rest, _ = sortData(amplitude_2[1:], f[1:])
+            
+            # Prepend the first entry back
+            amp1_sorted = np.concatenate([[amplitude_1[0]], amp1_sorted_rest])
+            amp2_sorted = np.concatenate([[amplitude_2[0]], amp2_sorted_rest])
+            f_sorted = np.concatenate([[f[0]], f_sorted_rest])
+        
+            # Initialize some variables depending on which simulation is
+            # currently running
+            if simnum == 0:
+                areaCenters = myind.centers_planar
+                areaNames = myind.names_planar
+                rawFile = myind.filename_planar
+            elif simnum == 1:
+                areaCenters = myind.centers_axi
+                areaNames = myind.names_axi
+                rawFile = myind.filename_axi
+    
+            # Initialize the waveform variables
+            time_interpol = np.linspace(0, time_array[-1], 1000)
+            result[simnum].f_harmonic = []
+            result[simnum].bx_harmonic = []
+            result[simnum].by_harmonic = []
+            result[simnum].harmonic_files = {}
+            
+            # Initialize loss arrays
+            result[simnum].loss_copper = 0
+            result[simnum].loss_copper_harmonic = []
+            result[simnum].Hdc = np.zeros(len(areaCenters[0]))
+            result[simnum].loss_core_area = np.zeros(len(areaNames))
+            
+            # Superposition of unit-current solutions is only valid for a
+            # linear BH-relationship
+            useSuperposition = simParam.SUPERPOSITION or simParam.FREQUENCY_MODEL
+            if useSuperposition and simParam.USE_BHCURVE:
+                msg.print_msg(0, "SUPERPOSITION and FREQUENCY_MODEL require USE_BHCURVE = 0, solving each harmonic directly\n", simParam)
+                useSuperposition = 0
+            
+            # Create the frequency-response model and report its error
+            if useSuperposition and simParam.FREQUENCY_MODEL:
+                model = backend.run(msg, simParam, getFrequencyModel, myind, simnum, rawFile, areaCenters, areaNames, simParam)
+                result[simnum].f_model = model['f']
+                result[simnum].model_fit_error = model['fit_error']
+                result[simnum].model_validation_error = model['validation_error']
+                if np.all(np.isnan(model['validation_error'])):
+                    # Leave-one-out validation needs at least 3 frequencies
+                    msg.print_msg(2, f"Frequency model: fit error {100*np.max(model['fit_error']):.2g} %, "
+                                  f"no validation (FREQUENCY_MODEL_POINTS < 3)\n", simParam)
+                else:
+                    worst = np.nanargmax(model['validation_error'])
+                    msg.print_msg(2, f"Frequency model: fit error {100*np.max(model['fit_error']):.2g} %, "
+                                  f"validation error {100*model['validation_error'][worst]:.2g} % at {model['f'][worst]/1e6:.2f} MHz\n", simParam)
+            
+            # Analyze the larges NUM_HARMONICS harmonics plus DC
+            # If the amplitude of a harmonic is much smaller than the biggest
+            # one, this and all following harmonics are skipped
+            numHarmonics = 0
+            while numHarmonics < simParam.NUM_HARMONICS + 1 and \
+                    abs(amp1_sorted[numHarmonics]) >= abs(simParam.HARMONIC_FACTOR * amp1_sorted[0]):
+                numHarmonics += 1
+            
+            # Solve all harmonics at once in parallel processes
+            useParallel = simParam.NUM_WORKERS > 1 and not useSuperposition and simParam.SOLVER_BACKEND == 'femm'
+            if useParallel:
+                jobs = [(f_sorted[harmonic], amp1_sorted[harmonic], amp2_sorted[harmonic]) for harmonic in range(numHarmonics)]
+                solutions = solveHarmonicsParallel(jobs, myind, simnum, rawFile, areaCenters, areaNames, simParam)
+            
+            for harmonic in range(numHarmonics):
+                # Solve the current frequency. With SUPERPOSITION, the result is
+                # composed from the cached unit-current solutions instead
+                if useParallel:
+                    circuits, bx_harmonic, by_harmonic, vol = solutions[harmonic]
+                elif useSuperposition:
+                    circuits, bx_harmonic, by_harmonic, vol = backend.run(msg, simParam, superposeHarmonic, myind, simnum, rawFile,
+                        f_sorted[harmonic], amp1_sorted[harmonic], amp2_sorted[harmonic], areaCenters, areaNames, simParam)
+                else:
+                    circuits, bx_harmonic, by_harmonic, vol = backend.run(msg, simParam, solveHarmonic, myind, simnum, rawFile,
+                        f_sorted[harmonic], amp1_sorted[harmonic], amp2_sorted[harmonic], areaCenters, areaNames, simParam)
+                if not useSuperposition:
+                    result[simnum].harmonic_files[f_sorted[harmonic]] = getHarmonicFile(myind, simnum, rawFile,
+                        f_sorted[harmonic], amp1_sorted[harmonic], amp2_sorted[harmonic], simParam)
+            
+                # Because the frequencies are sorted by amplitude, the
+                # first one isn't necessarily DC, so this variable
+                # indicates when a simulation is DC
+                isDC = 0
+                if simnum == 0:
+                    # Get Copperloss (lossA is identical to lossB)
+                    valsAl = circuits['Al']
+                    valsAr = circuits['Ar']
+                    # Calculate the loss differently for DC
+                    if np.imag(valsAl[0, 0]) == 0:
+                        isDC = 1
+                        loss_harmonic = float(np.real((np.sum(valsAl[:, 1]) - np.sum(valsAr[:, 1])) * valsAl[0, 0]))
+                    else:
+                        loss_harmonic = float(np.real(0.5 * (np.sum(valsAl[:, 1]) - np.sum(valsAr[:, 1])) * np.conj(valsAl[0, 0])))
+                    result[simnum].loss_copper_harmonic.append(loss_harmonic)
+                    # Add to total loss
+                    result[simnum].loss_copper = result[simnum].loss_copper + loss_harmonic
+                elif simnum == 1:
+                    # Get Copperloss
+                    vals = circuits['A']
+                    # Calculate the loss differently for DC
+                    if np.imag(vals[0, 0]) == 0:
+                        isDC = 1
+                        loss_harmonic = float(np.real(np.sum(vals[:, 1]) * vals[0, 0]))
+                    else:
+                        loss_harmonic = float(np.real(0.5 * np.sum(vals[:, 1]) * np.conj(vals[0, 0])))
+                    result[simnum].loss_copper_harmonic.append(loss_harmonic)
+                    # Add to total loss
+                    result[simnum].loss_copper = result[simnum].loss_copper + loss_harmonic
+            
+                # Get Hdc
+                if isDC:
+                    # Save dc_index for later
+                    dc_index = harmonic
+                    for i in range(len(areaNames)):
+                        result[simnum].Hdc[i] = float(np.real(np.sqrt(bx_harmonic[i]**2 + by_harmonic[i]**2) / (simParam.mu0 * myind.material.mu)))
+                        msg.print_msg(5, f"Hdc {areaNames[i]}: {result[simnum].Hdc[i]:.1f} A/m\n", simParam)
+
+                # Store the complex flux densities of all areas for this harmonic
+                result[simnum].f_harmonic.append(f_sorted[harmonic])
+                result[simnum].bx_harmonic.append(bx_harmonic)
+                result[simnum].by_harmonic.append(by_harmonic)
+
+            # Table of the complex flux densities (harmonics x areas)
+            result[simnum].f_harmonic = np.array(result[simnum].f_harmonic)
+            result[simnum].bx_harmonic = np.array(result[simnum].bx_harmonic)
+            result[simnum].by_harmonic = np.array(result[simnum].by_harmonic)
+
+            # Synthesize the time-domain waveforms of all areas (rows) from all
+            # harmonics at once. With DIRECT_PWL_PROJECTION, they are not needed
+            if not simParam.DIRECT_PWL_PROJECTION:
+                trigBasis = getTrigBasis(result[simnum].f_harmonic, time_interpol)
+                result[simnum].bx_waveform = np.real(result[simnum].bx_harmonic.T @ trigBasis)
+                result[simnum].by_waveform = np.real(result[simnum].by_harmonic.T @ trigBasis)
+
+            # Multiply total copper loss by two for the two coils
+            result[simnum].loss_copper = result[simnum].loss_copper * 2
+            msg.print_msg(0, f"Copper Loss: {result[simnum].loss_copper:.1f} W\n", simParam)
+            # Calculate DC-resistance 
+            res_dc = result[simnum].loss_copper_harmonic[dc_index] / (simParam.iout_avg / 2)**2
+            # Compare the loss with the loss that would occur for a
+            # constant resistivity
+            loss_const = res_dc * (myrms(time_array, current['i1'])**2 + myrms(time_array, current['i2'])**2)
+            msg.print_msg(1, f"Increase in resisitivy: {100*(result[simnum].loss_copper/loss_const-1):.0f} % \n", simParam)
+    
+            # Create piecewise linear approximation of Bx and By waveforms using least squares
+            # The linear waveforms will have nodes at the same timestamps as the current waveforms
+            msg.print_msg(2, "Creating piecewise linear flux density waveforms using least squares...\n", simParam)
+            
+            if simParam.DIRECT_PWL_PROJECTION:
+                # Project each harmonic analytically onto the piecewise linear
+                # waveform, directly from the complex flux densities
+                harmonicProjection = getHarmonicPwlProjection(time_array, result[simnum].f_harmonic)
+                result[simnum].bx_waveform_linear = np.real(result[simnum].bx_harmonic.T @ harmonicProjection)
+                result[simnum].by_waveform_linear = np.real(result[simnum].by_harmonic.T @ harmonicProjection)
+            else:
+                # The least-squares operator only depends on the time grids, so it is
+                # created once and applied to the waveforms of all areas at once
+                pwlProjection = getPwlProjection(time_array, time_interpol)
+                result[simnum].bx_waveform_linear = result[simnum].bx_waveform @ pwlProjection.T
+                result[simnum].by_waveform_linear = result[simnum].by_waveform @ pwlProjection.T
+            
+            # Compute the loss-density for each area using iGSE
+            # Make sure the first and last points are identical for periodicity
+            result[simnum].bx_waveform_linear[:, -1] = result[simnum].bx_waveform_linear[:, 0]
+            result[simnum].by_waveform_linear[:, -1] = result[simnum].by_waveform_linear[:, 0]
+            # Calculate loss in x and y direction independently for all areas at once
+            # loss density in mW/cm^3 = kW/m^3
+            result[simnum].loss_core_area = corelossSullivanBatch(time_array, result[simnum].bx_waveform_linear[:len(areaNames), :], myind.material) + \
+                corelossSullivanBatch(time_array, result[simnum].by_waveform_linear[:len(areaNames), :], myind.material)
+            result[simnum].loss_core = 0
+            for i in range(len(areaNames)):
+                msg.print_msg(5, f"    {areaNames[i]}: {result[simnum].loss_core_area[i]:.0f} mW/cm^3\n", simParam)
+                # Total loss in W
+                result[simnum].loss_core = result[simnum].loss_core + result[simnum].loss_core_area[i] * vol[i] * 1e3
+                
+            # Display the loss densities and Hdc values in a table
+            if interactive:
+                displayLossDensityTable(areaNames, result[simnum].loss_core_area, result[simnum].Hdc, vol, simnum)
+            
+            # Plot Bx and By waveforms for each area
+            if interactive and simParam.SHOWPLOTS:
+                #plotFluxDensityComponent(areaNames, result[simnum].bx_waveform, time_interpol, 'Bx', simnum)
+                #plotFluxDensityComponent(areaNames, result[simnum].by_waveform, time_interpol, 'By', simnum)
+                
+                # Plot the piecewise linear waveforms
+                plotFluxDensityComponent(areaNames, result[simnum].bx_waveform_linear, time_array, 'Bx', simnum)
+                plotFluxDensityComponent(areaNames, result[simnum].by_waveform_linear, time_array, 'By', simnum)
+            
+            # Sum losses for different parts as indicated by their by prefix (before first underscore)
+            if simnum == 0:
+                part_losses = {}
+                for i in range(len(areaNames)):
+                    # Extract part (everything before the first underscore)
+                    part = areaNames[i].split('_')[0] if '_' in areaNames[i] else areaNames[i]
+                    # Calculate total loss for this area in mW
+                    # Multiply by the number of symmetry axis *2
+                    area_loss = result[simnum].loss_core_area[i] * vol[i] * (np.sum(myind.symm)+1) * 1e6
+                    # Add to part sum
+                    if part in part_losses:
+                        part_losses[part] += area_loss
+                    else:
+                        part_losses[part] = area_loss
+                
+                # Print summed losses by part
+                msg.print_msg(1, "Core loss by region [mW]:\n", simParam)
+                for part in sorted(part_losses.keys(), key=lambda x: part_losses[x], reverse=True):
+                    msg.print_msg(1, f"  {part}: {part_losses[part]:.1f} mW\n", simParam)
+
+            # Multiply overall core loss depending on the amout of symmetry
+            if simnum == 0:
+                result[simnum].loss_core = result[simnum].loss_core * (np.sum(myind.symm) + 1)
+                if myind.coupled:
+                    result[simnum].loss_core = result[simnum].loss_core * 2
+            else:
+                # For axisymmetric simulation, only the y-direction matters
+                # *2 because only one core is simulated
+                result[simnum].loss_core = result[simnum].loss_core * 2 * (myind.symm[1] + 1)
+            result[simnum].loss_core = result[simnum].loss_core
+            msg.print_msg(0, f"Core Loss: {result[simnum].loss_core:.1f} W\n", simParam)
+    
+            # Total loss
+            result[simnum].loss_total = result[simnum].loss_core + result[simnum].loss_copper + result[simnum].conduction_loss
+            msg.print_msg(0, f"Total Loss: {result[simnum].loss_total:.2f}W\n", simParam)
+            msg.print_msg(0, f"Total Efficiency: {(1-result[simnum].loss_total/simParam.pout)*100:.2f} %\n", simParam)
+
+    # Save all the data
+    if save:
+        save_path = Path(simParam.datafolder) / f"{myind.description}.pkl"
+        save_path.parent.mkdir(parents=True, exist_ok=True)
+        # The waveforms are stored in the waveform archive, the design file only
+        # refers to them
+        archiveWaveforms(result, simParam.datafolder, save_path.stem)
+        # Write to a temporary file first, so there is never a half-written design
+        # file in the data folder
+        with open(save_path.with_suffix('.pkl.tmp'), 'wb') as f:
+            pickle.dump({
+                'mywinding': mywinding,
+                'myind': myind,
+                'result': result,
+                'simParam': simParam
+            }, f)
+        save_path.with_suffix('.pkl.tmp').replace(save_path)
+        # Add the summary of the design to the index of the data folder
+        updateDesignIndex(save_path, mywinding, myind, result)
+
+    # Finish
+    elapsedTime = time.time() - start_time
+    msg.print_msg(0, f"\n\n--------------------Finished in {elapsedTime:.0f} s--------------------\n", simParam)
+
+    # Delete the msg handle to close the logfile (might not be necessary but doesn't hurt)
+    del msg
+    
+    return result
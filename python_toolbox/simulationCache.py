@@ -0,0 +1,82 @@
+# This file is part of the Planar Inductor Toolbox
+# Copyright (C) 2025 Adrian Keil
+# 
+# The Planar Inductor Toolbox is free software: you can redistribute it 
+# and/or modify it under the terms of the GNU General Public License as 
+# published by the Free Software Foundation, either version 3 of the 
+# License, or (at your option) any later version.
+# 
+# The Planar Inductor Toolbox is distributed in the hope that it will be
+# useful, but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+# 
+# You should have received a copy of the GNU General Public License
+# along with this program.  
+# If not, see https://www.gnu.org/licenses/gpl-3.0.html
+
+import hashlib
+import numpy as np
+
+def getModelKey(myind, simnum, simParam):
+    # Returns a key (hash) of everything that defines the model of the
+    # planar (simnum == 0) or axisymmetric (simnum == 1) simulation of myind:
+    # Core geometry, conductors of the windings (including the PCB stack),
+    # material, mesh and solver settings and the frequency and currents of
+    # the drawing. Designs with the same key have the same model, no matter
+    # how they are named.
+    if simnum == 0:
+        geometry = [myind.rects_planar, myind.centers_planar, myind.air_planar, myind.depth_planar]
+    else:
+        geometry = [myind.rects_axi, myind.centers_axi, myind.air_axi]
+    conductors, circuits = myind.getConductors(simnum, simParam)
+    material = [myind.material.mu]
+    if simParam.USE_BHCURVE:
+        material.append(myind.material.bhcurve)
+    settings = [simParam.SOLVER_BACKEND, simParam.WRITE_FEM_FILES, simParam.USE_BHCURVE,
+                simParam.CORE_AUTOMESH, simParam.CORE_MESHSIZE, simParam.AIR_AUTOMESH, simParam.AIR_MESHSIZE,
+                simParam.COPPER_AUTOMESH, simParam.COPPER_MESHSIZE, simParam.ANALYTICAL_GRID_SIZE,
+                simParam.mu0, simParam.rho_copper, simParam.target_fs, simParam.iout_avg]
+    return _getHash([simnum, geometry, conductors, circuits, myind.turns, myind.coupled, material, settings])
+
+def getSolutionKey(modelKey, freq, currents):
+    # Returns a key (hash) of the solution of the model modelKey at the
+    # frequency freq with the currents in the dictionary currents (circuit
+    # name: complex amplitude)
+    return _getHash([modelKey, freq, sorted(currents.items())])
+
+def getResponseKey(myind, simnum, areaCenters, areaNames, simParam, parameters):
+    # Returns a key (hash) of the results extracted from the model of myind
+    # (see getModelKey) for the areas areaCenters/areaNames. parameters is a
+    # list of everything else the results depend on (e.g. the frequency).
+    # Unlike the file names, the key is unique without CONTENT_CACHE, so
+    # results can be cached in memory across designs.
+    return _getHash([getModelKey(myind, simnum, simParam), np.asarray(areaCenters, dtype=float),
+                     list(areaNames), simParam.READ_ANS_FILES, parameters])
+
+def isReuseAllowed(simParam):
+    # Files that already exist are only reused with reuse_file (also with
+    # CONTENT_CACHE), so reuse_file = 0 always solves again
+    return simParam.reuse_file
+
+def _getHash(value):
+    h = hashlib.sha256()
+    _updateHash(h, value)
+    return h.hexdigest()[:32]
+
+def _updateHash(h, value):
+    # Adds value (nested lists, tuples and dictionaries of strings, numbers
+    # and arrays) to the hash. Numbers are rounded to 9 decimals, so values
+    # that were calculated in different ways give the same hash
+    if isinstance(value, dict):
+        _updateHash(h, sorted(value.items()))
+    elif isinstance(value, (list, tuple)) and not all(isinstance(v, (int, float, complex, np.number)) for v in value):
+        h.update(f'list{len(value)};'.encode())
+        for v in value:
+            _updateHash(h, v)
+    elif isinstance(value, str):
+        h.update(f'str{len(value)};{value}'.encode())
+    else:
+        value = np.round(np.asarray(value, dtype=complex), 9) + 0
+        h.update(f'array{value.shape};'.encode())
+        h.update(value.tobytes())
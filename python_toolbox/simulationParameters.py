@@ -28,7 +28,27 @@ class SimulationParameters:
         # To speed up the simulation, it is faster to use a linear BH-relationship.
         # Speeds up by approx. 2x. The error is negligible (<1% for the inductance).
         self.USE_BHCURVE = 0
+        # Field solver: 'femm' for FEMM or 'analytical' for a simplified
+        # magnetostatic model (finite differences on the rectangles of the
+        # design, copper loss from Dowell). The analytical solver does not
+        # need FEMM, so it runs on any system and is meant for screening.
+        self.SOLVER_BACKEND = 'femm'
+        # Maximum grid spacing of the analytical solver within the design in
+        # mm
+        self.ANALYTICAL_GRID_SIZE = 0.1
         # FEMM parameters
+        # Write the FEMM files directly (writeFemFile) instead of drawing
+        # the design in FEMM. The files of the harmonics are then copies of
+        # the drawn file with a different frequency and currents.
+        # Note: The open boundary is a single asymptotic (mixed) boundary
+        # condition on the outer circle instead of the shells of mi_makeABC,
+        # so inductance and losses differ slightly from drawn models. Off by
+        # default to keep the results of FEMM runs unchanged
+        self.WRITE_FEM_FILES = 0
+        # Evaluate the flux density of the areas from the solution files with
+        # NumPy (FemmSolution) instead of the FEMM postprocessor. FEMM is then
+        # only used for the circuit properties.
+        self.READ_ANS_FILES = 0
         # Automesh the core, so meshsize doesn't matter
         self.CORE_AUTOMESH = 1
         self.CORE_MESHSIZE = 0
@@ -42,6 +62,18 @@ class SimulationParameters:
         self.MINIMIZE_FEMM = 0
         # Hide the FEMM window (0 = show, 1 = hide)
         self.HIDE_FEMM = 1
+        # Keep one FEMM instance open for all draws and solves (also across
+        # designs) instead of restarting FEMM for every document.
+        # FEMM is restarted automatically if a solve fails.
+        self.PERSISTENT_FEMM = 1
+        # Number of harmonics that are solved in parallel, each in its own
+        # process with its own FEMM instance (1 = solve sequentially).
+        # Not used with SUPERPOSITION or FREQUENCY_MODEL.
+        self.NUM_WORKERS = 1
+        # Module that the parallel workers use as femm and an optional folder
+        # in which it is searched first. Allows a stand-in for testing.
+        self.FEMM_MODULE = 'femm'
+        self.FEMM_MODULE_PATH = ''
 
         # In order to calculate the depth for the planar simulation, the
         # round coild needs to be streched into a linear shape.
@@ -66,10 +98,33 @@ class SimulationParameters:
         # Which simulation to show: 0 = planar, 1 = axisymmetric
         self.SHOWDESIGN_SIMULATION = 0
     
+        # Number of harmonics of the exact current spectrum from which the
+        # largest ones are selected
+        self.NUM_SPECTRUM_HARMONICS = 50
         # Max. number of harmonics to analyze
         self.NUM_HARMONICS = 4
         # If amplitude of a harmonic is smaller than HARMONIC_FACTOR*amp_fundamental: Ignore
         self.HARMONIC_FACTOR = 0.1
+        # Create the piecewise linear flux density waveforms directly from the
+        # complex flux density of each harmonic (exact least-squares fit over
+        # one period) instead of sampling the waveforms at 1000 points first.
+        # The sampled waveforms bx_waveform/by_waveform are not created then.
+        self.DIRECT_PWL_PROJECTION = 0
+        # Solve each frequency only once per coil with a unit current and
+        # compose the results of any current by linear combination. The unit
+        # solutions are cached and reused for all operating points.
+        # Only valid (and only used) with USE_BHCURVE = 0.
+        self.SUPERPOSITION = 0
+        # Interpolate the unit-current solutions (see SUPERPOSITION) with a
+        # rational model over frequency instead of solving every harmonic.
+        # The model is fitted to FREQUENCY_MODEL_POINTS log-spaced solutions
+        # within FREQUENCY_MODEL_RANGE [Hz] using FREQUENCY_MODEL_POLES poles.
+        # DC and harmonics outside the range are still solved.
+        # Only valid (and only used) with USE_BHCURVE = 0.
+        self.FREQUENCY_MODEL = 0
+        self.FREQUENCY_MODEL_RANGE = [1e5, 5e7]
+        self.FREQUENCY_MODEL_POINTS = 10
+        self.FREQUENCY_MODEL_POLES = 6
 
 
         # Enable verbose with a certain detail-level. 0 is only the most
@@ -83,6 +138,17 @@ class SimulationParameters:
         # Choose if you want to reuse previously generated files. Not all parameters are embedded into
         # the filename, so this may lead to wrong results. Check uniqueName for the included parameters.
         self.reuse_file = 1
+        # Name the simulation files by a hash of everything that defines them
+        # (geometry, materials, mesh, frequency, currents,...) instead. The
+        # files are stored in femm_folder/cache and are reused (with
+        # reuse_file) by all designs with the same model. Unlike the readable
+        # names, this makes reuse_file safe.
+        self.CONTENT_CACHE = 0
+        # Store the results that are extracted from each solution (circuit
+        # properties, volume and flux density of the areas) next to the
+        # simulation file. Reruns (e.g. with other core loss parameters) then
+        # read them instead of starting the solver (if files are reused).
+        self.RESULT_STORE = 1
 
         # Path to the folder in which the femm-files are stored
         self.femm_folder = 'femm'
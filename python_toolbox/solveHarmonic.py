@@ -0,0 +1,203 @@
+# This file is part of the Planar Inductor Toolbox
+# Copyright (C) 2025 Adrian Keil
+# 
+# The Planar Inductor Toolbox is free software: you can redistribute it 
+# and/or modify it under the terms of the GNU General Public License as 
+# published by the Free Software Foundation, either version 3 of the 
+# License, or (at your option) any later version.
+# 
+# The Planar Inductor Toolbox is distributed in the hope that it will be
+# useful, but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+# 
+# You should have received a copy of the GNU General Public License
+# along with this program.  
+# If not, see https://www.gnu.org/licenses/gpl-3.0.html
+
+import os
+import numpy as np
+from resultStore import getStoredResults
+from simulationCache import getSolutionKey, getResponseKey
+from vectorFit import vectorFit, evalRational
+
+# Cache of the unit-current responses created by getUnitResponses. The
+# responses only depend on the model, the areas and the frequency (see
+# getResponseKey), so they are reused for any current spectrum or operating
+# point.
+_unitResponseCache = {}
+# Cache of the frequency-response models created by getFrequencyModel
+_frequencyModelCache = {}
+
+def solveHarmonic(myind, simnum, rawFile, freq, amp1, amp2, areaCenters, areaNames, simParam, suffix=''):
+    # Solves one frequency with the complex current amplitudes amp1 (coil A)
+    # and amp2 (coil B, only used for coupled planar designs).
+    # Returns the circuit properties (current, voltage, flux linkage) of each
+    # turn in a dictionary (keys 'Al', 'Ar', 'Bl', 'Br' for planar and 'A' for
+    # axisymmetric simulations, each an array turns x 3), the average Bx and
+    # By of each area and the volume of each area.
+    # suffix is appended to the name of the simulation file.
+    
+    # Solve the model with the currents of this frequency and get the
+    # circuit properties of each turn and the flux-density of each area with
+    # one request (or from the stored results of this solution).
+    # Only check the areas that have a name because for 
+    # symmetrical designs, not all areas need to be checked
+    freqfile = getHarmonicFile(myind, simnum, rawFile, freq, amp1, amp2, simParam, suffix)
+    if simnum == 0:
+        names = ['Al', 'Ar']
+        if not (myind.coupled == 0):
+            names = names + ['Bl', 'Br']
+        circuitNames = [f'{name}{idx+1}' for name in names for idx in range(myind.turns)]
+    elif simnum == 1:
+        names = ['A']
+        circuitNames = [str(idx+1) for idx in range(myind.turns)]
+    properties, vol, bxAreas, byAreas = getStoredResults(myind, simnum, rawFile, freqfile, freq,
+        getHarmonicCurrents(myind, simnum, amp1, amp2), circuitNames, areaCenters[:, :len(areaNames)], simParam)
+    
+    circuits = {}
+    for i, name in enumerate(names):
+        circuits[name] = properties[i * myind.turns:(i + 1) * myind.turns, :]
+    bx = np.zeros(len(areaCenters[0]), dtype=complex)
+    by = np.zeros(len(areaCenters[0]), dtype=complex)
+    bx[:len(areaNames)] = bxAreas
+    by[:len(areaNames)] = byAreas
+    
+    return circuits, bx, by, vol
+
+def getHarmonicCurrents(myind, simnum, amp1, amp2):
+    # Returns the currents of all circuits (dictionary circuit name: complex
+    # amplitude) for the current amplitudes amp1 (coil A) and amp2 (coil B)
+    currents = {}
+    if simnum == 0:
+        for idx in range(myind.turns):
+            currents[f'Al{idx+1}'] = amp1
+            currents[f'Ar{idx+1}'] = -amp1
+            if not (myind.coupled == 0):
+                currents[f'Bl{idx+1}'] = amp2
+                currents[f'Br{idx+1}'] = -amp2
+    elif simnum == 1:
+        for idx in range(myind.turns):
+            currents[str(idx+1)] = amp1
+    return currents
+
+def getHarmonicFile(myind, simnum, rawFile, freq, amp1, amp2, simParam, suffix=''):
+    # Returns the name of the simulation file of one harmonic (see
+    # solveHarmonic). With CONTENT_CACHE, the name is the key of the
+    # solution, so it is only reused for exactly the same frequency and
+    # currents
+    if simParam.CONTENT_CACHE:
+        currents = getHarmonicCurrents(myind, simnum, amp1, amp2)
+        return os.path.join(os.path.dirname(rawFile), getSolutionKey(os.path.basename(rawFile), freq, currents))
+    return f"{rawFile}_f{freq/1e6:.2f}MHz{suffix}"
+
+def getUnitResponses(myind, simnum, rawFile, freq, areaCenters, areaNames, simParam):
+    # Returns the responses (see solveHarmonic) of one frequency for a unit
+    # current in coil A and, for coupled planar designs, in coil B.
+    # The responses are only valid for a linear BH-relationship. They are
+    # solved once per model, areas and frequency and then cached.
+    key = getResponseKey(myind, simnum, areaCenters, areaNames, simParam, [freq])
+    if key not in _unitResponseCache:
+        responses = [solveHarmonic(myind, simnum, rawFile, freq, 1, 0, areaCenters, areaNames, simParam, '_unitA')]
+        if simnum == 0 and not (myind.coupled == 0):
+            responses.append(solveHarmonic(myind, simnum, rawFile, freq, 0, 1, areaCenters, areaNames, simParam, '_unitB'))
+        _unitResponseCache[key] = responses
+    return _unitResponseCache[key]
+
+def superposeHarmonic(myind, simnum, rawFile, freq, amp1, amp2, areaCenters, areaNames, simParam):
+    # Same as solveHarmonic but composes the result from the cached
+    # unit-current responses: Every quantity is the sum of the unit
+    # responses weighted with the complex current of the respective coil.
+    # With FREQUENCY_MODEL, the unit responses inside the model range are
+    # interpolated instead of solved
+    if simParam.FREQUENCY_MODEL and simParam.FREQUENCY_MODEL_RANGE[0] <= freq <= simParam.FREQUENCY_MODEL_RANGE[1]:
+        model = getFrequencyModel(myind, simnum, rawFile, areaCenters, areaNames, simParam)
+        responses = evalFrequencyModel(model, freq)
+    else:
+        responses = getUnitResponses(myind, simnum, rawFile, freq, areaCenters, areaNames, simParam)
+    amps = [amp1, amp2][:len(responses)]
+    circuits = {}
+    for name in responses[0][0]:
+        circuits[name] = sum(amp * response[0][name] for amp, response in zip(amps, responses))
+    bx = sum(amp * response[1] for amp, response in zip(amps, responses))
+    by = sum(amp * response[2] for amp, response in zip(amps, responses))
+    vol = responses[0][3]
+    return circuits, bx, by, vol
+
+def getFrequencyModel(myind, simnum, rawFile, areaCenters, areaNames, simParam):
+    # Creates a rational model (see vectorFit) of the unit-current responses
+    # over frequency. The responses are solved at FREQUENCY_MODEL_POINTS
+    # log-spaced frequencies within FREQUENCY_MODEL_RANGE and fitted with
+    # FREQUENCY_MODEL_POLES common poles. The model is created once per
+    # model, areas and these settings and then cached.
+    # The returned dictionary also contains the fit error at each solved
+    # frequency and the leave-one-out validation error (model fitted without
+    # that frequency), both relative to the peak of each response. A large
+    # validation error indicates where more frequencies are needed.
+    key = getResponseKey(myind, simnum, areaCenters, areaNames, simParam, [list(simParam.FREQUENCY_MODEL_RANGE),
+                         simParam.FREQUENCY_MODEL_POINTS, simParam.FREQUENCY_MODEL_POLES])
+    if key not in _frequencyModelCache:
+        freqs = np.geomspace(simParam.FREQUENCY_MODEL_RANGE[0], simParam.FREQUENCY_MODEL_RANGE[1], simParam.FREQUENCY_MODEL_POINTS)
+        samples = [getUnitResponses(myind, simnum, rawFile, f, areaCenters, areaNames, simParam) for f in freqs]
+        H = np.array([_flattenResponses(responses, f) for responses, f in zip(samples, freqs)])
+        omega = 2 * np.pi * freqs
+        # Removing the (real) value at the highest frequency makes the small
+        # frequency-dependent part carry more weight in the fit
+        offset = np.real(H[-1, :])
+        peak = np.max(np.abs(H), axis=0)
+        peak[peak == 0] = 1
+        
+        model = vectorFit(omega, H - offset, simParam.FREQUENCY_MODEL_POLES)
+        model['offset'] = offset
+        model['template'] = samples[0]
+        model['f'] = freqs
+        model['fit_error'] = np.max(np.abs(evalRational(model, omega) + offset - H) / peak, axis=1)
+        # Leave-one-out validation for the inner frequencies
+        model['validation_error'] = np.full(len(freqs), np.nan)
+        for k in range(1, len(freqs) - 1):
+            keep = np.arange(len(freqs)) != k
+            reduced = vectorFit(omega[keep], H[keep, :] - offset, simParam.FREQUENCY_MODEL_POLES)
+            model['validation_error'][k] = np.max(np.abs(evalRational(reduced, omega[k]) + offset - H[k, :]) / peak)
+        _frequencyModelCache[key] = model
+    return _frequencyModelCache[key]
+
+def evalFrequencyModel(model, freq):
+    # Evaluates the model created by getFrequencyModel at the frequency freq.
+    # Returns the unit-current responses in the same format as getUnitResponses
+    H = evalRational(model, 2 * np.pi * freq)[0, :] + model['offset']
+    return _unflattenResponses(H, model['template'], freq)
+
+# Arranges all fitted quantities of the unit responses in one vector: Bx and
+# By of each area and for each circuit the flux linkage and the voltage
+# without the inductive part (V - j*w*flux). Otherwise the inductive part
+# dominates the voltage and the resistive part is lost in the fit.
+def _flattenResponses(responses, freq):
+    w = 2 * np.pi * freq
+    parts = []
+    for circuits, bx, by, vol in responses:
+        parts = parts + [bx, by]
+        for name in sorted(circuits):
+            parts = parts + [circuits[name][:, 1] - 1j * w * circuits[name][:, 2], circuits[name][:, 2]]
+    return np.concatenate(parts)
+
+# Inverse of _flattenResponses. The currents and volumes are taken from the
+# template (any unit response of the same file)
+def _unflattenResponses(H, template, freq):
+    w = 2 * np.pi * freq
+    responses = []
+    idx = 0
+    for circuits_template, bx_template, by_template, vol in template:
+        bx = H[idx:idx+len(bx_template)]
+        idx += len(bx_template)
+        by = H[idx:idx+len(by_template)]
+        idx += len(by_template)
+        circuits = {}
+        for name in sorted(circuits_template):
+            turns = circuits_template[name].shape[0]
+            circuits[name] = np.zeros((turns, 3), dtype=complex)
+            circuits[name][:, 0] = circuits_template[name][:, 0]
+            circuits[name][:, 2] = H[idx+turns:idx+2*turns]
+            circuits[name][:, 1] = H[idx:idx+turns] + 1j * w * circuits[name][:, 2]
+            idx += 2 * turns
+        responses.append((circuits, bx, by, vol))
+    return responses
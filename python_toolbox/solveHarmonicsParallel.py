@@ -0,0 +1,104 @@
+# This file is part of the Planar Inductor Toolbox
+# Copyright (C) 2025 Adrian Keil
+# 
+# The Planar Inductor Toolbox is free software: you can redistribute it 
+# and/or modify it under the terms of the GNU General Public License as 
+# published by the Free Software Foundation, either version 3 of the 
+# License, or (at your option) any later version.
+# 
+# The Planar Inductor Toolbox is distributed in the hope that it will be
+# useful, but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+# 
+# You should have received a copy of the GNU General Public License
+# along with this program.  
+# If not, see https://www.gnu.org/licenses/gpl-3.0.html
+
+import os
+import sys
+import glob
+import shutil
+import pickle
+import importlib
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+from solveHarmonic import getHarmonicFile, solveHarmonic
+from resultStore import hasStoredResults
+
+def solveHarmonicsParallel(jobs, myind, simnum, rawFile, areaCenters, areaNames, simParam):
+    # Solves several harmonics in parallel. jobs is a list with one tuple
+    # (frequency, amp1, amp2) per harmonic. Each harmonic is solved with
+    # solveHarmonic in its own process with its own FEMM instance and its
+    # own working directory. Up to simParam.NUM_WORKERS harmonics are solved
+    # at the same time.
+    # The workers import the module simParam.FEMM_MODULE as femm (searched in
+    # simParam.FEMM_MODULE_PATH first if given), so a stand-in for FEMM can be
+    # used for testing.
+    # Returns the results of solveHarmonic in the order of jobs. The solved
+    # files are moved next to rawFile as if they were solved sequentially.
+    with ThreadPoolExecutor(max_workers=simParam.NUM_WORKERS) as pool:
+        futures = [pool.submit(_runWorker, idx, job, myind, simnum, rawFile, areaCenters, areaNames, simParam)
+                   for idx, job in enumerate(jobs)]
+        return [future.result() for future in futures]
+
+def _runWorker(idx, job, myind, simnum, rawFile, areaCenters, areaNames, simParam):
+    # Prepares the working directory of one harmonic, runs the worker process
+    # and collects its result
+    # Harmonics with stored results don't need a worker (or FEMM) at all
+    freq, amp1, amp2 = job
+    freqfile = getHarmonicFile(myind, simnum, rawFile, freq, amp1, amp2, simParam)
+    if hasStoredResults(freqfile, simParam):
+        return solveHarmonic(myind, simnum, rawFile, freq, amp1, amp2, areaCenters, areaNames, simParam)
+    
+    workdir = os.path.abspath(f"{rawFile}_worker{idx}")
+    if os.path.isdir(workdir):
+        shutil.rmtree(workdir)
+    os.makedirs(workdir)
+    # The worker gets a copy of the base file and of previously solved files
+    # of its frequency (for reuse_file)
+    for file in [f"{rawFile}.fem"] + glob.glob(f"{glob.escape(freqfile)}.*"):
+        shutil.copy(file, workdir)
+    
+    jobFile = os.path.join(workdir, 'job.pkl')
+    resultFile = os.path.join(workdir, 'result.pkl')
+    with open(jobFile, 'wb') as f:
+        pickle.dump({
+            'args': (myind, simnum, os.path.join(workdir, os.path.basename(rawFile)), freq, amp1, amp2,
+                     areaCenters, areaNames, simParam),
+            'resultFile': resultFile
+        }, f)
+    
+    process = subprocess.run([sys.executable, os.path.abspath(__file__), jobFile, simParam.FEMM_MODULE,
+                              simParam.FEMM_MODULE_PATH], cwd=workdir,
+                             capture_output=True, text=True)
+    # The working directory is kept for debugging if the worker fails
+    if process.returncode != 0:
+        raise Exception(f"Worker for {freq/1e6:.2f} MHz failed:\n{process.stderr}")
+    with open(resultFile, 'rb') as f:
+        result = pickle.load(f)
+    
+    # Move the solved files back and remove the working directory
+    for file in glob.glob(os.path.join(glob.escape(workdir), f"{glob.escape(os.path.basename(freqfile))}.*")):
+        os.replace(file, os.path.join(os.path.dirname(os.path.abspath(rawFile)), os.path.basename(file)))
+    shutil.rmtree(workdir)
+    return result
+
+def _workerMain(jobFile, femmModule, femmModulePath):
+    # Entry point of a worker process: Solves one harmonic and stores the result
+    # Use the requested module as femm before any module of the toolbox
+    # imports it (also when the job is unpickled)
+    if femmModulePath:
+        sys.path.insert(0, femmModulePath)
+    sys.modules['femm'] = importlib.import_module(femmModule)
+    with open(jobFile, 'rb') as f:
+        job = pickle.load(f)
+    from FemmSession import femmSession
+    
+    result = solveHarmonic(*job['args'])
+    femmSession.shutdown()
+    with open(job['resultFile'], 'wb') as f:
+        pickle.dump(result, f)
+
+if __name__ == '__main__':
+    _workerMain(sys.argv[1], sys.argv[2], sys.argv[3])
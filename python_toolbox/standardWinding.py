@@ -15,15 +15,20 @@
 # along with this program.  
 # If not, see https://www.gnu.org/licenses/gpl-3.0.html
 
-import femm
+import numpy as np
+from helperFunctions import getRectangle
 
 def standardWinding(myind, windingName, start, positionToCore, simParam):
-    # Draws standard windings
+    # Creates the conductors of standard windings
     # windingName: Name of the circuit that shoud be used. A number is
     # automatically added depending on the turn
     # start: Coordinates where the winding starts: [startx; centery]
     # positionToCore: Either 'r' if it is on the right side of the core or
     # 'l' if it is on the left side of the core
+    # Returns the rectangles of the conductors (same layout as rects_planar)
+    # and the name of the circuit of each conductor
+    rects = []
+    circuits = []
     
     # Always draw from left to right
     if positionToCore == 'l':
@@ -44,10 +49,9 @@ def standardWinding(myind, windingName, start, positionToCore, simParam):
             else:
                 thickness = myind.pcb.copper_thickness
             
-            femm.mi_drawrectangle(startx, posy, startx + myind.winding['width'], posy + thickness)
-            femm.mi_addblocklabel(startx + myind.winding['width'] / 2, posy + thickness / 2)
-            femm.mi_selectlabel(startx + myind.winding['width'] / 2, posy + thickness / 2)
-            femm.mi_setblockprop('Copper', simParam.COPPER_AUTOMESH, simParam.COPPER_MESHSIZE, f'{windingName}{i}', 0, 0, 1)
-            femm.mi_clearselected()
+            rects.append(getRectangle(startx, posy, myind.winding['width'], thickness))
+            circuits.append(f'{windingName}{i}')
 
             posy = posy + thickness + myind.pcb.insulator_thickness
+    
+    return np.array(rects), circuits
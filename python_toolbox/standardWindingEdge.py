@@ -15,16 +15,19 @@
 # along with this program.  
 # If not, see https://www.gnu.org/licenses/gpl-3.0.html
 
-import femm
+import numpy as np
+from helperFunctions import getRectangle
 
 def standardWindingEdge(myind, windingName, start, positionToCore, simParam):
-    # Draws standard windings with edge-plating. 
+    # Creates the conductors of standard windings with edge-plating. 
     # Edge-plating is only possibe for single-turn inductors
     # windingName: Name of the circuit that shoud be used. A number is
     # automatically added depending on the turn
     # start: Coordinates where the winding starts: [startx; centery]
     # positionToCore: Either 'r' if it is on the right side of the core or
     # 'l' if it is on the left side of the core
+    # Returns the rectangles of the conductors (same layout as rects_planar)
+    # and the name of the circuit of each conductor
     assert myind.turns == 1
     
     # Always draw from left to right
@@ -36,12 +39,8 @@ def standardWindingEdge(myind, windingName, start, positionToCore, simParam):
     posy = start[1] - myind.pcb.thickness / 2
 
     # Draw the edge-plating
-    femm.mi_drawrectangle(startx, posy,
-                         startx + myind.pcb.edge_thickness, posy + myind.pcb.thickness)  # +2*(simParam.copper_thickness_outer-simParam.copper_thickness
-    femm.mi_addblocklabel(startx + myind.pcb.edge_thickness / 2, posy + myind.pcb.thickness / 2)
-    femm.mi_selectlabel(startx + myind.pcb.edge_thickness / 2, posy + myind.pcb.thickness / 2)
-    femm.mi_setblockprop('Copper', simParam.COPPER_AUTOMESH, simParam.COPPER_MESHSIZE, f'{windingName}1', 0, 0, 1)
-    femm.mi_clearselected()
+    rects = [getRectangle(startx, posy, myind.pcb.edge_thickness, myind.pcb.thickness)]  # +2*(simParam.copper_thickness_outer-simParam.copper_thickness
+    circuits = [f'{windingName}1']
 
     # If the winding is on the right side of the core the starting
     # x-coordinate needs to be adjusted
@@ -60,10 +59,9 @@ def standardWindingEdge(myind, windingName, start, positionToCore, simParam):
         else:
             thickness = myind.pcb.copper_thickness
         
-        femm.mi_drawrectangle(startx, posy, startx + mywidth, posy + thickness)
-        femm.mi_addblocklabel(startx + mywidth / 2, posy + thickness / 2)
-        femm.mi_selectlabel(startx + mywidth / 2, posy + thickness / 2)
-        femm.mi_setblockprop('Copper', simParam.COPPER_AUTOMESH, simParam.COPPER_MESHSIZE, f'{windingName}1', 0, 0, 1)
-        femm.mi_clearselected()
+        rects.append(getRectangle(startx, posy, mywidth, thickness))
+        circuits.append(f'{windingName}1')
 
         posy = posy + thickness + myind.pcb.insulator_thickness
+    
+    return np.array(rects), circuits
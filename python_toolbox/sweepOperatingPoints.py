@@ -0,0 +1,63 @@
+# This file is part of the Planar Inductor Toolbox
+# Copyright (C) 2025 Adrian Keil
+# 
+# The Planar Inductor Toolbox is free software: you can redistribute it 
+# and/or modify it under the terms of the GNU General Public License as 
+# published by the Free Software Foundation, either version 3 of the 
+# License, or (at your option) any later version.
+# 
+# The Planar Inductor Toolbox is distributed in the hope that it will be
+# useful, but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+# 
+# You should have received a copy of the GNU General Public License
+# along with this program.  
+# If not, see https://www.gnu.org/licenses/gpl-3.0.html
+
+import numpy as np
+from helperFunctions import calcSwitchingFrequency, getWaveformMathBatch, calcCapacitanceBatch, myrms
+
+def sweepOperatingPoints(Vin, Vout, iout_avg, L_self, k, simParam, fs=None):
+    # Evaluates the analytic converter model for many operating points of
+    # one design (self-inductance L_self and coupling factor k) at once.
+    # Vin, Vout, iout_avg and fs can be scalars or arrays and are broadcast
+    # against each other (e.g. created with np.meshgrid for efficiency maps).
+    # If fs is None, the switching frequency for soft-switching is calculated
+    # for each operating point.
+    # Returns a dictionary with the results for every operating point. The
+    # waveforms and timestamps have the 5 datapoints in the last axis.
+    Vin = np.asarray(Vin, dtype=float)
+    Vout = np.asarray(Vout, dtype=float)
+    iout_avg = np.asarray(iout_avg, dtype=float)
+    D = Vout / Vin
+    
+    # Transformer model of the design (see Result.calcTrafoModel)
+    L_coupled = k * L_self
+    L_out = (L_self + L_coupled) / 2
+    L_m = (L_self - L_coupled) / 2
+    
+    if fs is None:
+        fs = calcSwitchingFrequency(Vin, D, iout_avg, L_self, k, simParam)
+    fs = np.asarray(fs, dtype=float)
+    Vin, Vout, iout_avg, D, fs = np.broadcast_arrays(Vin, Vout, iout_avg, D, fs)
+    
+    sweep = {}
+    sweep['Vin'] = Vin
+    sweep['Vout'] = Vout
+    sweep['iout_avg'] = iout_avg
+    sweep['D'] = D
+    sweep['fs'] = fs
+    
+    ## Get the waveforms
+    current, time_array = getWaveformMathBatch(Vin, Vout, iout_avg, D, fs, L_m, L_out)
+    sweep['time'] = time_array
+    sweep['current'] = current
+    
+    ## Calculate required input and output capacitance
+    sweep['Cin'], sweep['Cout'] = calcCapacitanceBatch(time_array, current['i1'], current['i2'], D, iout_avg, simParam)
+    
+    ## MOSFET conduction-loss
+    sweep['conduction_loss'] = simParam.Rds_on * myrms(time_array, current['i1'])**2 * 2    # *2 because of two legs
+    
+    return sweep
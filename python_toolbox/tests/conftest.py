@@ -0,0 +1,11 @@
+# Tests of the Planar Inductor Toolbox. Run with "python -m pytest tests" from
+# the python_toolbox folder. FEMM is not needed: The stand-in module in
+# tests/fakefemm is imported as femm.
+
+import os
+import sys
+
+testFolder = os.path.dirname(os.path.abspath(__file__))
+# The modules of the toolbox are imported by their name
+sys.path.insert(0, os.path.dirname(testFolder))
+sys.path.insert(0, os.path.join(testFolder, 'fakefemm'))
@@ -0,0 +1,137 @@
+# This file is part of the Planar Inductor Toolbox
+# Copyright (C) 2025 Adrian Keil
+# 
+# The Planar Inductor Toolbox is free software: you can redistribute it 
+# and/or modify it under the terms of the GNU General Public License as 
+# published by the Free Software Foundation, either version 3 of the 
+# License, or (at your option) any later version.
+# 
+# The Planar Inductor Toolbox is distributed in the hope that it will be
+# useful, but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+# 
+# You should have received a copy of the GNU General Public License
+# along with this program.  
+# If not, see https://www.gnu.org/licenses/gpl-3.0.html
+
+# Stand-in for the pyfemm module, so the toolbox can be tested without
+# FEMM (e.g. on Linux). Drawing functions do nothing. Solutions follow a
+# simple linear model of the frequency and the circuit currents of the
+# document: Each circuit has the flux linkage L*I and the voltage
+# (R + j*omega*L)*I, each block the volume 1 mm^3 and a flux density that
+# depends on its position, the frequency and the current of the first
+# circuit. DC solves are slowed down, so parallel solves finish in another
+# order than they were started.
+# Use it with simParam.FEMM_MODULE_PATH = <path of this folder> or by putting
+# this folder first on sys.path.
+
+import os
+import re
+import time
+import numpy as np
+
+L = 100e-9
+R = 1e-3
+DC_DELAY = 0.5
+
+# State of the current document
+_freq = 0.0
+_currents = {}
+_document = None
+_selected = None
+
+def openfemm(*args): pass
+def closefemm(): pass
+def main_minimize(): pass
+def mi_showgrid(): pass
+def mi_getmaterial(*args): pass
+def mi_addmaterial(*args): pass
+def mi_addbhpoints(*args): pass
+def mi_drawrectangle(*args): pass
+def mi_addblocklabel(*args): pass
+def mi_selectlabel(*args): pass
+def mi_setblockprop(*args): pass
+def mi_clearselected(): pass
+def mi_makeABC(*args): pass
+def mi_close(): pass
+def mo_close(): pass
+def mo_zoom(*args): pass
+def mo_showdensityplot(*args): pass
+def mo_clearblock(): pass
+
+def newdocument(doctype):
+    global _freq, _currents, _document
+    _freq, _currents, _document = 0.0, {}, None
+
+def opendocument(filename):
+    # Reads the frequency and the circuit currents of a written FEMM file
+    global _freq, _currents, _document
+    with open(filename) as f:
+        text = f.read()
+    _document = filename
+    match = re.search(r'\[Frequency\]\s*=\s*(\S+)', text)
+    _freq = float(match.group(1)) if match else 0.0
+    _currents = {name: complex(float(real), float(imag)) for name, real, imag in re.findall(
+        r'<CircuitName>\s*=\s*"(.*?)"\s*<TotalAmps_re>\s*=\s*(\S+)\s*<TotalAmps_im>\s*=\s*(\S+)', text)}
+
+def mi_probdef(freq, *args):
+    global _freq
+    _freq = freq
+
+def mi_addcircprop(name, current, circuitType):
+    _currents[name] = complex(current)
+
+def mi_setcurrent(name, current):
+    _currents[name] = complex(current)
+
+def mi_saveas(filename):
+    # Saves the state in the format of a written FEMM file
+    global _document
+    _document = filename
+    with open(filename, 'w') as f:
+        f.write(f"[Frequency] = {_freq!r}\n")
+        for name, current in _currents.items():
+            f.write(f'<CircuitName> = "{name}"\n<TotalAmps_re> = {current.real!r}\n<TotalAmps_im> = {current.imag!r}\n')
+
+def mi_analyze(*args):
+    if _freq == 0:
+        time.sleep(DC_DELAY)
+    with open(f"{os.path.splitext(_document)[0]}.ans", 'w') as f:
+        f.write(f"Solution of {_document} at {_freq!r} Hz\n")
+
+def mi_loadsolution(): pass
+
+def mo_getcircuitproperties(name):
+    current = _currents.get(name, 0j)
+    return [current, (R + 2j * np.pi * _freq * L) * current, L * current]
+
+def mo_selectblock(x, y):
+    global _selected
+    _selected = (x, y)
+
+def mo_blockintegral(kind):
+    # Volume (10) and integrals of Bx (8) and By (9)
+    vol = 1e-9
+    current = next(iter(_currents.values()), 0j)
+    if kind == 10:
+        return vol
+    if kind == 8:
+        return vol * 1e-3 * (_selected[0] + _freq / 1e6) * current
+    return vol * 1e-3 * _selected[1] * current
+
+def callfemm(command):
+    # Runs the extraction script of FemmBackend.getResults
+    scriptFile = re.match(r'dofile\("(.*)"\)', command).group(1)
+    with open(scriptFile) as f:
+        script = f.read()
+    resultFile = re.search(r'openfile\("(.*?)"', script).group(1)
+    circuits = re.findall(r'"([^"]*)"', re.search(r'circuits = \{(.*?)\}', script, re.DOTALL).group(1))
+    blocks = [float(v) for v in re.search(r'blocks = \{(.*?)\}', script, re.DOTALL).group(1).split(',') if v.strip()]
+    rows = [mo_getcircuitproperties(name) for name in circuits]
+    for i in range(0, len(blocks), 2):
+        mo_selectblock(blocks[i], blocks[i + 1])
+        rows.append([mo_blockintegral(10), mo_blockintegral(8), mo_blockintegral(9)])
+    with open(resultFile, 'w') as f:
+        for row in rows:
+            f.write(' '.join(f"{complex(v).real!r} {complex(v).imag!r}" for v in row) + '\n')
@@ -0,0 +1,43 @@
+# This file is part of the Planar Inductor Toolbox
+# Copyright (C) 2025 Adrian Keil
+# 
+# The Planar Inductor Toolbox is free software: you can redistribute it 
+# and/or modify it under the terms of the GNU General Public License as 
+# published by the Free Software Foundation, either version 3 of the 
+# License, or (at your option) any later version.
+# 
+# The Planar Inductor Toolbox is distributed in the hope that it will be
+# useful, but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+# 
+# You should have received a copy of the GNU General Public License
+# along with this program.  
+# If not, see https://www.gnu.org/licenses/gpl-3.0.html
+
+# Runs design 4 through the analytical backend (no FEMM needed) and compares
+# the inductances and losses with stored values. The backend is
+# deterministic, so a change of these values is a change of the models.
+
+import numpy as np
+
+from simulationParameters import SimulationParameters
+from simulateDesign import simulateDesign
+
+# Stored values of design 4: L_self [H], k, L_coupled [H], loss_copper [W]
+# and loss_core [W] for the planar and the axisymmetric simulation
+reference = [[6.966692428193644e-08, -0.3716254260138361, -2.589000041534829e-08, 0.4061794102804562, 0.8581998162335575],
+             [6.661736752449502e-08, -0.3716254260138361, -2.589000041534829e-08, 0.6143725165982267, 0.26773293554583333]]
+
+def test_design4(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    simParam = SimulationParameters()
+    simParam.SOLVER_BACKEND = 'analytical'
+    simParam.SIMULATIONS = [1, 1]
+    simParam.SHOWPLOTS = 0
+    simParam.SHOWDESIGN = 0
+    result = simulateDesign(4, simParam, save=False)
+    for simnum in range(2):
+        res = result[simnum]
+        values = [res.L_self, res.k, res.L_coupled, res.loss_copper, res.loss_core]
+        assert np.allclose(values, reference[simnum], rtol=1e-9, atol=0)
@@ -0,0 +1,61 @@
+# This file is part of the Planar Inductor Toolbox
+# Copyright (C) 2025 Adrian Keil
+# 
+# The Planar Inductor Toolbox is free software: you can redistribute it 
+# and/or modify it under the terms of the GNU General Public License as 
+# published by the Free Software Foundation, either version 3 of the 
+# License, or (at your option) any later version.
+# 
+# The Planar Inductor Toolbox is distributed in the hope that it will be
+# useful, but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+# 
+# You should have received a copy of the GNU General Public License
+# along with this program.  
+# If not, see https://www.gnu.org/licenses/gpl-3.0.html
+
+# Checks that FemmSession.run only repeats a function after a failed
+# connection to FEMM.
+
+import pytest
+
+from simulationParameters import SimulationParameters
+from FemmSession import FemmSession
+
+class Log:
+    # Collects the messages instead of printing them
+    def __init__(self):
+        self.messages = []
+    
+    def print_msg(self, detail, text, simParam):
+        self.messages.append(text)
+
+def getFunction(error):
+    # Returns a function that raises error on the first call and the calls
+    calls = []
+    def function():
+        calls.append(1)
+        if len(calls) == 1:
+            raise error
+        return len(calls)
+    return function, calls
+
+def test_retry_on_femm_failure(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    simParam = SimulationParameters()
+    msg = Log()
+    function, calls = getFunction(ConnectionError('FEMM is gone'))
+    assert FemmSession().run(msg, simParam, function) == 2
+    assert len(calls) == 2
+    assert 'restarting FEMM' in msg.messages[0]
+
+def test_no_retry_on_other_errors(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    simParam = SimulationParameters()
+    msg = Log()
+    function, calls = getFunction(ValueError('bug'))
+    with pytest.raises(ValueError):
+        FemmSession().run(msg, simParam, function)
+    assert len(calls) == 1
+    assert msg.messages == []
@@ -0,0 +1,93 @@
+# This file is part of the Planar Inductor Toolbox
+# Copyright (C) 2025 Adrian Keil
+# 
+# The Planar Inductor Toolbox is free software: you can redistribute it 
+# and/or modify it under the terms of the GNU General Public License as 
+# published by the Free Software Foundation, either version 3 of the 
+# License, or (at your option) any later version.
+# 
+# The Planar Inductor Toolbox is distributed in the hope that it will be
+# useful, but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+# 
+# You should have received a copy of the GNU General Public License
+# along with this program.  
+# If not, see https://www.gnu.org/licenses/gpl-3.0.html
+
+# Checks the flux linkage of FemmSolution against the analytical result for
+# a rectangular conductor with a given potential, with and without eddy
+# currents.
+
+import numpy as np
+
+from FemmSolution import FemmSolution
+
+width = 2     # mm
+height = 1    # mm
+depth = 10    # mm
+sigma = 58    # MS/m
+current = 2
+
+def writeSolution(filename, freq, potential, problemType='planar', offset=0):
+    # Writes a .ans file with a meshed conductor (x from offset to
+    # offset + width, y from 0 to height) in the circuit "A" and the
+    # potential potential(x, y) in Wb/m (x, y in m)
+    n = 21
+    x, y = np.meshgrid(np.linspace(offset, offset + width, n), np.linspace(0, height, n), indexing='ij')
+    x = x.ravel()
+    y = y.ravel()
+    a = potential(x * 1e-3, y * 1e-3) + 0j
+    elements = []
+    for i in range(n - 1):
+        for j in range(n - 1):
+            elements.append([i * n + j, (i + 1) * n + j, (i + 1) * n + j + 1])
+            elements.append([i * n + j, (i + 1) * n + j + 1, i * n + j + 1])
+    
+    lines = [f"[Frequency] = {freq}", f"[Depth] = {depth}", "[LengthUnits] = millimeters",
+             f"[ProblemType] = {problemType}", "[BlockProps] = 2"]
+    for blockName, blockSigma in [("Air", 0), ("Copper", sigma)]:
+        lines += ["  <BeginBlock>", f'    <BlockName> = "{blockName}"', f"    <Sigma> = {blockSigma}", "  <EndBlock>"]
+    lines += ["[CircuitProps] = 1", "  <BeginCircuit>", '    <CircuitName> = "A"', f"    <TotalAmps_re> = {current}",
+              "    <TotalAmps_im> = 0", "    <CircuitType> = 0", "  <EndCircuit>",
+              "[NumBlockLabels] = 2", f"{offset + width + 1}\t0\t1\t-1\t0\t0\t0\t1\t0",
+              f"{offset + width / 2}\t{height / 2}\t2\t-1\t1\t0\t0\t1\t0", "[Solution]", str(len(x))]
+    lines += [f"{x[i]:.17g}\t{y[i]:.17g}\t{a[i].real:.17g}\t{a[i].imag:.17g}" for i in range(len(x))]
+    lines += [str(len(elements))] + [f"{e[0]}\t{e[1]}\t{e[2]}\t1" for e in elements]
+    with open(filename, 'w') as f:
+        f.write("\n".join(lines) + "\n")
+    return filename
+
+def test_uniform_potential(tmp_path):
+    # Without a gradient of A there are no eddy currents
+    filename = writeSolution(tmp_path / 'uniform.ans', 1e6, lambda x, y: 0 * x + 3e-6)
+    fluxLinkage = FemmSolution(filename).getFluxLinkage('A')
+    assert np.isclose(fluxLinkage, depth * 1e-3 * 3e-6, rtol=1e-12)
+
+def test_eddy_currents(tmp_path):
+    # A = g*x + c: J = -j*omega*sigma*g*(x - mean(x)) + I/S, so the flux
+    # linkage is depth*(c - j*omega*sigma*g^2*width^3*height/12/I)
+    freq = 1e6
+    g = 1e-3
+    c = 3e-6
+    filename = writeSolution(tmp_path / 'eddy.ans', freq, lambda x, y: g * (x - width / 2 * 1e-3) + c)
+    fluxLinkage = FemmSolution(filename).getFluxLinkage('A')
+    expected = depth * 1e-3 * (c - 1j * 2 * np.pi * freq * sigma * 1e6 * g ** 2 * (width * 1e-3) ** 3 * height * 1e-3 / 12 / current)
+    assert np.isclose(fluxLinkage, expected, rtol=1e-12)
+    assert fluxLinkage.imag < 0
+    
+    # Same potential without eddy currents (DC)
+    filename = writeSolution(tmp_path / 'dc.ans', 0, lambda x, y: g * (x - width / 2 * 1e-3) + c)
+    assert np.isclose(FemmSolution(filename).getFluxLinkage('A'), depth * 1e-3 * c, rtol=1e-12)
+
+def test_axisymmetric_dc(tmp_path):
+    # The voltage is the same around each turn, so J is proportional to 1/r
+    offset = 1
+    a = 3e-6
+    filename = writeSolution(tmp_path / 'axi.ans', 0, lambda r, z: 0 * r + a, 'axisymmetric', offset)
+    solution = FemmSolution(filename)
+    r = solution.centroid[:, 0]
+    expected = 2 * np.pi * a * np.sum(solution.area) / np.sum(solution.area / r)
+    assert np.isclose(solution.getFluxLinkage('A'), expected, rtol=1e-12)
+    # Between the uniform current density (mean radius) and the inner radius
+    assert 2 * np.pi * offset * 1e-3 * a < expected < 2 * np.pi * (offset + width / 2) * 1e-3 * a
@@ -0,0 +1,389 @@
+# This file is part of the Planar Inductor Toolbox
+# Copyright (C) 2025 Adrian Keil
+# 
+# The Planar Inductor Toolbox is free software: you can redistribute it 
+# and/or modify it under the terms of the GNU General Public License as 
+# published by the Free Software Foundation, either version 3 of the 
+# License, or (at your option) any later version.
+# 
+# The Planar Inductor Toolbox is distributed in the hope that it will be
+# useful, but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+# 
+# You should have received a copy of the GNU General Public License
+# along with this program.  
+# If not, see https://www.gnu.org/licenses/gpl-3.0.html
+
+# Compares the optimized functions of corelossSullivan with the original
+# implementations (the ...Reference functions) on random and edge-case
+# waveforms.
+
+import numpy as np
+
+import corelossSullivan as coreloss
+from corelossSullivan import makepositive, splitloop, calcki, calcseg, corelossSullivan, corelossSullivanBatch, gsepwl, ismonotonicloop
+from Material import Material
+
+def makepositiveReference(t, w):
+    # Original implementation of makepositive, inserts one zero crossing at
+    # a time
+    t = list(t)
+    w = list(w)
+    length = len(t)
+    cross = [(w[i] * w[i+1]) < 0 for i in range(length-1)]
+    loopnumber = length - 1 + sum(cross)
+    i = 0
+    while i < loopnumber and i < len(cross):
+        if cross[i]:
+            length = len(w)
+            tcross = w[i] * (t[i+1] - t[i]) / (w[i] - w[i+1]) + t[i]
+            t = t[0:i+1] + [tcross] + t[i+1:length]
+            w = w[0:i+1] + [0] + w[i+1:length]
+            cross = cross[0:i+1] + [0] + cross[i+1:length-1]
+        i = i + 1
+    
+    w = np.abs(np.array(w))
+    t = np.array(t)
+    return t, w
+
+def checkParity(t, w):
+    tNew, wNew = makepositive(t, w)
+    tRef, wRef = makepositiveReference(t, w)
+    np.testing.assert_array_equal(tNew, tRef)
+    np.testing.assert_array_equal(wNew, wRef)
+
+def test_random():
+    rng = np.random.default_rng(0)
+    for _ in range(5000):
+        n = rng.integers(2, 40)
+        t = np.cumsum(rng.uniform(0.1, 1, n))
+        w = rng.normal(size=n)
+        # Some waveforms with exact zeros
+        if rng.random() < 0.3:
+            w = np.round(w)
+        checkParity(t, w)
+
+def test_edge_cases():
+    t = np.arange(6, dtype=float)
+    # Exact zeros (no crossings inserted)
+    checkParity(t, [0, 0, 0, 0, 0, 0])
+    checkParity(t, [1, 0, -1, 0, 1, 0])
+    checkParity(t, [-1, 0, 2, -3, 0, -1])
+    # All negative and all positive
+    checkParity(t, [-1, -2, -0.5, -3, -1, -1])
+    checkParity(t, [1, 2, 0.5, 3, 1, 1])
+    # Crossings at the first and last sample
+    checkParity(t, [-1, 1, 2, 3, 2, 1])
+    checkParity(t, [1, 2, 3, 2, 1, -1])
+    checkParity(t, [-1, 1, 2, 3, 2, -1])
+    # Crossing on every segment
+    checkParity(t, [1, -1, 1, -1, 1, -1])
+    # Shortest waveforms
+    checkParity([0.0, 1.0], [1.0, -1.0])
+    checkParity([0.0], [-1.0])
+
+def splitloopReference(a, b):
+    # Original recursive loop splitter by Kapil Venkatachalam. Returns the
+    # major loop and lists of the minor loops
+    e = 0
+    sa = 1
+    for d in range(len(a)):
+        if (a[d] == np.min(a) and sa == 1):
+            e = d
+            sa = sa + 1
+    v = [a[e]]
+    t = [0]
+    bdiff = np.diff(b)
+    cumdiff = 0
+    for q in range(e+1, len(a)):
+        v.append(a[q])
+        cumdiff = cumdiff + bdiff[q-1]
+        t.append(cumdiff)
+    for zx in range(1, e):
+        v.append(a[zx])
+        cumdiff = cumdiff + bdiff[zx-1]
+        t.append(cumdiff)
+    v = np.array(v)
+    t = np.array(t)
+
+    z = 0
+    sa = 1
+    for x in range(len(v)):
+        if (v[x] == np.max(v) and sa == 1):
+            z = x
+            sa = sa + 1
+
+    i = 1
+    j = 0
+    k = 0
+    s = [[] for _ in range(1300)]
+    p = [[] for _ in range(1300)]
+
+    # Rising part
+    m = [v[0]]
+    n = [t[0]]
+    while i <= z:
+        if v[i] >= v[i-1]:
+            m.append(v[i])
+            n.append(t[i])
+            count = 1
+        else:
+            s[j].append(v[i-1])
+            p[j].append(t[i-1])
+            k = k + 1
+            while v[i] < max(m):
+                s[j].append(v[i])
+                p[j].append(t[i])
+                k = k + 1
+                i = i + 1
+            slope = (v[i-1] - v[i]) / (t[i-1] - t[i])
+            s[j].append(max(m))
+            stemp = ((max(m) - v[i-1]) / slope) + t[i-1]
+            p[j].append(stemp)
+            m.append(max(m))
+            n.append(stemp)
+            count = count + 1
+            j = j + 1
+            k = 0
+        if count <= 1:
+            i = i + 1
+
+    # Falling part
+    while i < len(v):
+        if v[i] <= v[i-1]:
+            m.append(v[i])
+            n.append(t[i])
+            count = 1
+        else:
+            temp = v[i-1]
+            s[j].append(v[i-1])
+            p[j].append(t[i-1])
+            k = k + 1
+            while i < len(v) and v[i] > temp:
+                s[j].append(v[i])
+                p[j].append(t[i])
+                k = k + 1
+                i = i + 1
+            while i < len(v) and k > 1:
+                slope = (v[i-1] - v[i]) / (t[i-1] - t[i])
+                s[j].append(temp)
+                qtemp = ((temp - v[i-1]) / slope) + t[i-1]
+                p[j].append(qtemp)
+                r = 1
+                while v[i] != temp and r == 1:
+                    m.append(temp)
+                    n.append(qtemp)
+                    r = r + 1
+                count = count + 1
+                j = j + 1
+                k = 0
+        if count <= 1:
+            i = i + 1
+
+    # Removal of repeated points in the major loop
+    majorloop = [m[0]]
+    majortime = [n[0]]
+    g = 0
+    for h in range(1, len(m)):
+        if m[h-1] != m[h]:
+            majortime.append(n[h] - g)
+            majorloop.append(m[h])
+        else:
+            g = g + n[h] - n[h-1]
+
+    uo = 0
+    pt = 0
+    ss = 1
+    while ss == 1 and uo < len(s):
+        while len(s[uo]) > 0:
+            uo = uo + 1
+            if uo >= len(s):
+                break
+        ss = ss + 1
+        pt = uo
+
+    # Recursion for minor loops with sub-loops
+    minorloop = []
+    minortime = []
+    for qq in range(pt):
+        sinp = s[qq]
+        pinp = p[qq]
+        if minorloop1Reference(sinp, pinp):
+            fn, ln, sn, pn = splitloopReference(np.array(sinp), np.array(pinp))
+            if len(fn) != 0:
+                minorloop.append(fn)
+                minorloop.append(sn[0])
+                minortime.append(ln)
+                minortime.append(pn[0])
+        else:
+            if len(sinp) != 0:
+                minorloop.append(np.array(sinp))
+                minortime.append(np.array(pinp))
+
+    return np.array(majorloop), np.array(majortime), minorloop, minortime
+
+def minorloop1Reference(s, p):
+    # Original check for sub-loops in a minor loop
+    peak = -1
+    prevslope = 0
+    for i in range(1, len(s)):
+        slope = (s[i-1] - s[i]) / (p[i-1] - p[i])
+        if slope <= 0 and prevslope >= 0:
+            peak = peak + 1
+        if prevslope <= 0 and slope >= 0:
+            peak = peak + 1
+        prevslope = slope
+    return peak > 2
+
+def getLoops(B, t):
+    # Loops of both splitters as lists of (B, time) with the major loop first
+    loopB, loopT, offsets = splitloop(B, t)
+    loops = [(loopB[offsets[j]:offsets[j+1]], loopT[offsets[j]:offsets[j+1]]) for j in range(len(offsets) - 1)]
+    majorloop, majortime, minorloop, minortime = splitloopReference(B, t)
+    loopsRef = [(majorloop, majortime)] + [(np.asarray(b, dtype=float), np.asarray(p, dtype=float)) for b, p in zip(minorloop, minortime)]
+    return loops, loopsRef
+
+def getShape(loops):
+    # Compares loops by their values and the duration of their segments:
+    # - The original splitter restarts the time of recursively split loops
+    #   and removes constant segments of the major loop (they have no loss)
+    # - Nested loops are returned in another order (inner loops first)
+    shape = []
+    for B, t in loops:
+        changes = np.diff(B) != 0
+        shape.append((np.concatenate([[B[0]], B[1:][changes]]), np.diff(t)[changes]))
+    key = lambda loop: (len(loop[0]), tuple(np.round(loop[0], 9)), tuple(np.round(loop[1], 9)))
+    return [shape[0]] + sorted(shape[1:], key=key)
+
+def getLossReference(t, B, material):
+    # Loss density with the loops of the original splitter (gsepwl)
+    ki = calcki(material.fexp, material.bexp, material.k)
+    loops = getLoops(B, t)[1]
+    p = sum(calcseg(lt, lb, material.fexp, material.bexp, ki, 1.0) * (lt[-1] - lt[0]) for lb, lt in loops)
+    return p / (t[-1] - t[0])
+
+def checkSplitParity(B, t=None):
+    B = np.asarray(B, dtype=float)
+    if t is None:
+        t = np.arange(len(B), dtype=float)
+    loops, loopsRef = getLoops(B, t)
+    shape = getShape(loops)
+    shapeRef = getShape(loopsRef)
+    assert len(shape) == len(shapeRef)
+    for (b, dt), (bRef, dtRef) in zip(shape, shapeRef):
+        np.testing.assert_allclose(b, bRef, rtol=1e-12)
+        np.testing.assert_allclose(dt, dtRef, rtol=1e-9)
+    material = Material("3F46")
+    assert np.isclose(corelossSullivan(t, B, material, 1), getLossReference(t, B, material), rtol=1e-12)
+
+def test_splitloop_cases():
+    # Minor loops, also at the same level
+    checkSplitParity([0, 2, 1, 3, 0])
+    checkSplitParity([0, 3, 1, 2, 0])
+    checkSplitParity([0, 4, 1, 3, 1, 3, 0])
+    checkSplitParity([0, 2, 1, 2, 3, 1, 3, 4, 0])
+    # Nested minor loops
+    checkSplitParity([0, 4, 1, 3, 2, 3.5, 0])
+    checkSplitParity([0, 4, 3.5, 3.8, 1, 3, 2, 2.5, 0])
+    # Repeated extrema: peaks and valleys at the level of the maximum,
+    # the minimum or of another turning point, and constant segments
+    checkSplitParity([0, 5, 2, 5, 0])
+    checkSplitParity([0, 5, 0, 5, 0])
+    checkSplitParity([0, 2, 4.5, 2.5, 5, 3.5, 4, 3, 2, 2.5, 5, 0])
+    checkSplitParity([0, 1.5, 3, 5, 1.5, 4.5, 2.5, 4, 4.5, 0])
+    checkSplitParity([0, 4.5, 5, 3, 3, 2.5, 2.5, 4.5, 4, 4.5, 0])
+    checkSplitParity([0, 3, 3, 1, 1, 3, 4, 4, 0])
+    checkSplitParity([0, 4, 4, 2, 4, 4, 1, 0])
+
+def test_splitloop_random():
+    # Random waveforms starting at their minimum, with many repeated levels.
+    # The original splitter loses parts of loops that are nested in a minor
+    # loop before the maximum (its recursion drops a point when rotating the
+    # loop) and fails for some of them, these waveforms are skipped
+    rng = np.random.default_rng(1)
+    compared = 0
+    for _ in range(800):
+        n = rng.integers(3, 20)
+        B = np.concatenate([[0], np.round(rng.uniform(1, 5, n) * 2) / 2, [0]])
+        t = np.cumsum(rng.uniform(0.1, 1, len(B)))
+        try:
+            loopsRef = getLoops(B, t)[1]
+        except IndexError:
+            continue
+        constant = np.sum(np.diff(t)[np.diff(B) == 0])
+        if not np.isclose(sum(dt.sum() for b, dt in getShape(loopsRef)), t[-1] - t[0] - constant):
+            continue
+        checkSplitParity(B, t)
+        compared = compared + 1
+    assert compared > 400
+
+def test_splitloop_nested_before_maximum():
+    # Loops nested in a minor loop before the maximum are all kept, so the
+    # loops cover the whole period
+    B = np.array([0, 4, 2, 3, 1, 5, 0], dtype=float)
+    t = np.arange(len(B), dtype=float)
+    loopB, loopT, offsets = splitloop(B, t)
+    assert len(offsets) == 4
+    duration = loopT[offsets[1:] - 1] - loopT[offsets[:-1]]
+    assert np.isclose(np.sum(duration), t[-1] - t[0])
+
+def getWaveforms(rng, count, length):
+    # Random periodic waveforms (rows) in T with minor loops and zero
+    # crossings, some rows with repeated levels
+    B = rng.normal(scale=0.05, size=(count, length))
+    B[::3] = np.round(B[::3] * 100) / 100
+    B[:, -1] = B[:, 0]
+    return B
+
+def test_batch():
+    rng = np.random.default_rng(3)
+    material = Material("3F46")
+    tvs = np.cumsum(rng.uniform(0.1, 1, 12)) * 1e-7
+    B = getWaveforms(rng, 300, len(tvs))
+    # Triangular and trapezoidal rows without minor loops
+    B[:20] = np.array([-1, 0, 1, 2, 3, 2, 1, 0, -1, -2, -2, -1]) * rng.uniform(0.001, 0.05, (20, 1))
+    B[20:40] = np.array([0, 1, 2, 2, 2, 1, 0, -1, -1, -1, -1, 0]) * rng.uniform(0.001, 0.05, (20, 1))
+    # Constant and invalid rows (first value is not the last one)
+    B[40] = 0.01
+    B[41, -1] = B[41, 0] + 0.01
+    assert np.any(~ismonotonicloop(B)) and np.any(ismonotonicloop(B))
+    
+    batch = corelossSullivanBatch(tvs, B, material)
+    single = np.array([corelossSullivan(tvs, row, material, 1) for row in B])
+    assert batch[41] == -1 and single[41] == -1
+    np.testing.assert_allclose(batch, single, rtol=1e-12, atol=0)
+
+def test_fast_path(monkeypatch):
+    # The closed-form path gives the same loss as the general path for
+    # waveforms without minor loops
+    material = Material("3F46")
+    t = np.array([0, 0.1, 0.35, 0.5, 0.6, 0.9, 1.0]) * 1e-6
+    waveforms = [[-0.05, 0.0, 0.05, 0.1, 0.05, -0.02, -0.05],
+                 [0.02, 0.04, 0.06, 0.06, 0.03, 0.01, 0.02],
+                 [0.1, 0.1, 0.05, -0.05, -0.1, 0.0, 0.1],
+                 [0.0, 0.03, 0.03, 0.0, -0.03, -0.03, 0.0]]
+    assert np.all(ismonotonicloop(waveforms))
+    fast = [gsepwl(t, np.array(B), material.fexp, material.bexp, material.k) for B in waveforms]
+    monkeypatch.setattr(coreloss, 'ismonotonicloop', lambda B: np.zeros(np.atleast_2d(B).shape[0], dtype=bool))
+    general = [gsepwl(t, np.array(B), material.fexp, material.bexp, material.k) for B in waveforms]
+    np.testing.assert_allclose(fast, general, rtol=1e-12)
+
+def test_no_fast_path_with_minor_loops(monkeypatch):
+    # Waveforms with minor loops (also only a small one or one at the level
+    # of the maximum) are split
+    material = Material("3F46")
+    t = np.arange(8) * 1e-7
+    waveforms = [[0, 0.05, 0.02, 0.08, 0.1, 0.04, -0.05, 0],
+                 [0, 0.1, 0.09, 0.095, 0.0, -0.1, -0.05, 0],
+                 [0, 0.1, 0.05, 0.1, 0.0, -0.1, -0.1, 0]]
+    assert not np.any(ismonotonicloop(waveforms))
+    calls = []
+    def spy(B, t):
+        calls.append(1)
+        return splitloop(B, t)
+    monkeypatch.setattr(coreloss, 'splitloop', spy)
+    for B in waveforms:
+        gsepwl(t, np.array(B, dtype=float), material.fexp, material.bexp, material.k)
+    corelossSullivanBatch(t, np.array(waveforms), material)
+    assert len(calls) == 2 * len(waveforms)
@@ -0,0 +1,60 @@
+# This file is part of the Planar Inductor Toolbox
+# Copyright (C) 2025 Adrian Keil
+# 
+# The Planar Inductor Toolbox is free software: you can redistribute it 
+# and/or modify it under the terms of the GNU General Public License as 
+# published by the Free Software Foundation, either version 3 of the 
+# License, or (at your option) any later version.
+# 
+# The Planar Inductor Toolbox is distributed in the hope that it will be
+# useful, but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+# 
+# You should have received a copy of the GNU General Public License
+# along with this program.  
+# If not, see https://www.gnu.org/licenses/gpl-3.0.html
+
+# Checks when stored results are used instead of solving again (with the
+# analytical backend, no FEMM needed).
+
+from simulationParameters import SimulationParameters
+from designs import designs
+from SolverBackend import getSolverBackend
+from AnalyticalBackend import AnalyticalBackend
+from resultStore import getStoredResults
+
+def test_extraction_method(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    simParam = SimulationParameters()
+    simParam.SOLVER_BACKEND = 'analytical'
+    simParam.RESULT_STORE = 1
+    simParam.reuse_file = 1
+    myind = designs(4, simParam)
+    getSolverBackend(simParam).draw(myind, 0, simParam)
+    
+    solves = []
+    solve = AnalyticalBackend.solve
+    def countSolves(self, *args):
+        solves.append(1)
+        return solve(self, *args)
+    monkeypatch.setattr(AnalyticalBackend, 'solve', countSolves)
+    
+    def getResults():
+        return getStoredResults(myind, 0, myind.filename_planar, myind.filename_planar, simParam.target_fs,
+                                None, ['Al1'], myind.centers_planar, simParam)
+    first = getResults()
+    assert len(solves) == 1
+    stored = getResults()
+    assert len(solves) == 1
+    assert (stored[0] == first[0]).all() and (stored[2] == first[2]).all()
+    # Results extracted from the .ans file are another approximation
+    simParam.READ_ANS_FILES = 1
+    getResults()
+    assert len(solves) == 2
+    getResults()
+    assert len(solves) == 2
+    # Without reuse_file, the solution is always solved again
+    simParam.reuse_file = 0
+    getResults()
+    assert len(solves) == 3
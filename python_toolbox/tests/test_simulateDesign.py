@@ -0,0 +1,38 @@
+# This file is part of the Planar Inductor Toolbox
+# Copyright (C) 2025 Adrian Keil
+# 
+# The Planar Inductor Toolbox is free software: you can redistribute it 
+# and/or modify it under the terms of the GNU General Public License as 
+# published by the Free Software Foundation, either version 3 of the 
+# License, or (at your option) any later version.
+# 
+# The Planar Inductor Toolbox is distributed in the hope that it will be
+# useful, but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+# 
+# You should have received a copy of the GNU General Public License
+# along with this program.  
+# If not, see https://www.gnu.org/licenses/gpl-3.0.html
+
+# Runs simulateDesign with the analytical backend (no FEMM needed).
+
+import numpy as np
+
+from simulationParameters import SimulationParameters
+from simulateDesign import simulateDesign
+
+def test_frequency_model_without_validation(tmp_path, monkeypatch):
+    # With 2 frequencies there is no leave-one-out validation
+    monkeypatch.chdir(tmp_path)
+    simParam = SimulationParameters()
+    simParam.SOLVER_BACKEND = 'analytical'
+    simParam.SHOWPLOTS = 0
+    simParam.SHOWDESIGN = 0
+    simParam.USE_BHCURVE = 0
+    simParam.FREQUENCY_MODEL = 1
+    simParam.FREQUENCY_MODEL_POINTS = 2
+    simParam.FREQUENCY_MODEL_POLES = 1
+    result = simulateDesign(4, simParam, save=False)
+    assert np.all(np.isnan(result[0].model_validation_error))
+    assert np.isfinite(result[0].loss_copper)
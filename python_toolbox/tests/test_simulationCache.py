@@ -0,0 +1,44 @@
+# This file is part of the Planar Inductor Toolbox
+# Copyright (C) 2025 Adrian Keil
+# 
+# The Planar Inductor Toolbox is free software: you can redistribute it 
+# and/or modify it under the terms of the GNU General Public License as 
+# published by the Free Software Foundation, either version 3 of the 
+# License, or (at your option) any later version.
+# 
+# The Planar Inductor Toolbox is distributed in the hope that it will be
+# useful, but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+# 
+# You should have received a copy of the GNU General Public License
+# along with this program.  
+# If not, see https://www.gnu.org/licenses/gpl-3.0.html
+
+# Checks when simulation files are reused and how they are named.
+
+import os
+
+from simulationParameters import SimulationParameters
+from simulationCache import isReuseAllowed, getModelKey
+from designs import designs
+
+def test_reuse_file_forces_solve(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    simParam = SimulationParameters()
+    for contentCache in [0, 1]:
+        simParam.CONTENT_CACHE = contentCache
+        simParam.reuse_file = 0
+        assert not isReuseAllowed(simParam)
+        simParam.reuse_file = 1
+        assert isReuseAllowed(simParam)
+
+def test_file_names(tmp_path, monkeypatch):
+    # Readable names by default, the model key with CONTENT_CACHE
+    monkeypatch.chdir(tmp_path)
+    simParam = SimulationParameters()
+    myind = designs(4, simParam)
+    assert myind.filename_planar == os.path.join(simParam.femm_folder, f"planar_{myind.uniqueName}")
+    simParam.CONTENT_CACHE = 1
+    myind = designs(4, simParam)
+    assert myind.filename_planar == os.path.join(simParam.femm_folder, 'cache', getModelKey(myind, 0, simParam))
@@ -0,0 +1,83 @@
+# This file is part of the Planar Inductor Toolbox
+# Copyright (C) 2025 Adrian Keil
+# 
+# The Planar Inductor Toolbox is free software: you can redistribute it 
+# and/or modify it under the terms of the GNU General Public License as 
+# published by the Free Software Foundation, either version 3 of the 
+# License, or (at your option) any later version.
+# 
+# The Planar Inductor Toolbox is distributed in the hope that it will be
+# useful, but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+# 
+# You should have received a copy of the GNU General Public License
+# along with this program.  
+# If not, see https://www.gnu.org/licenses/gpl-3.0.html
+
+# Checks that the in-memory caches of solveHarmonic are not reused for other
+# models, areas or settings in the same process (solved with the stand-in for
+# FEMM in tests/fakefemm).
+
+import numpy as np
+
+from simulationParameters import SimulationParameters
+from designs import designs
+from SolverBackend import getSolverBackend
+import solveHarmonic
+
+def prepare():
+    # Draws the planar model of design 4 in the working directory. The
+    # file names are not unique (CONTENT_CACHE = 0) and files are not reused
+    simParam = SimulationParameters()
+    simParam.WRITE_FEM_FILES = 1
+    simParam.CONTENT_CACHE = 0
+    simParam.reuse_file = 0
+    simParam.USE_BHCURVE = 0
+    myind = designs(4, simParam)
+    getSolverBackend(simParam).draw(myind, 0, simParam)
+    return myind, simParam
+
+def getResponses(myind, simParam, freq, areaCenters=None):
+    if areaCenters is None:
+        areaCenters = myind.centers_planar
+    return solveHarmonic.getUnitResponses(myind, 0, myind.filename_planar, freq, areaCenters,
+                                          myind.names_planar, simParam)
+
+def test_unit_response_cache(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(solveHarmonic, '_unitResponseCache', {})
+    myind, simParam = prepare()
+    
+    first = getResponses(myind, simParam, 1e6)
+    assert getResponses(myind, simParam, 1e6) is first
+    # Another frequency, other areas and another mesh are new responses
+    assert getResponses(myind, simParam, 2e6) is not first
+    assert getResponses(myind, simParam, 1e6, myind.centers_planar + 0.1) is not first
+    simParam.COPPER_MESHSIZE = simParam.COPPER_MESHSIZE / 2
+    getSolverBackend(simParam).draw(myind, 0, simParam)
+    assert getResponses(myind, simParam, 1e6) is not first
+    assert len(solveHarmonic._unitResponseCache) == 4
+    getSolverBackend(simParam).shutdown()
+
+def test_frequency_model_cache(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(solveHarmonic, '_unitResponseCache', {})
+    monkeypatch.setattr(solveHarmonic, '_frequencyModelCache', {})
+    myind, simParam = prepare()
+    simParam.FREQUENCY_MODEL_POINTS = 5
+    simParam.FREQUENCY_MODEL_POLES = 2
+    
+    def getModel(areaCenters=myind.centers_planar):
+        return solveHarmonic.getFrequencyModel(myind, 0, myind.filename_planar, areaCenters,
+                                               myind.names_planar, simParam)
+    first = getModel()
+    assert getModel() is first
+    # Other settings of the fit and other areas are new models
+    simParam.FREQUENCY_MODEL_POLES = 3
+    assert getModel() is not first
+    simParam.FREQUENCY_MODEL_RANGE = [2e5, 2e7]
+    assert getModel() is not first
+    assert getModel(myind.centers_planar + 0.1) is not first
+    assert len(solveHarmonic._frequencyModelCache) == 4
+    getSolverBackend(simParam).shutdown()
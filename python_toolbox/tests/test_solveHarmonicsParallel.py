@@ -0,0 +1,82 @@
+# This file is part of the Planar Inductor Toolbox
+# Copyright (C) 2025 Adrian Keil
+# 
+# The Planar Inductor Toolbox is free software: you can redistribute it 
+# and/or modify it under the terms of the GNU General Public License as 
+# published by the Free Software Foundation, either version 3 of the 
+# License, or (at your option) any later version.
+# 
+# The Planar Inductor Toolbox is distributed in the hope that it will be
+# useful, but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+# 
+# You should have received a copy of the GNU General Public License
+# along with this program.  
+# If not, see https://www.gnu.org/licenses/gpl-3.0.html
+
+# Runs solveHarmonicsParallel with the stand-in for FEMM (tests/fakefemm) in
+# several worker processes and checks the order of the results, the solved
+# files and the handling of failed workers.
+
+import os
+import glob
+import numpy as np
+import pytest
+
+from simulationParameters import SimulationParameters
+from designs import designs
+from SolverBackend import getSolverBackend
+from solveHarmonic import getHarmonicFile
+from solveHarmonicsParallel import solveHarmonicsParallel
+
+fakeFolder = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fakefemm')
+import femm as fakefemm
+
+# Harmonics (frequency, amp1, amp2). The DC solve is the slowest one
+jobs = [(0.0, 2.0, -1.0), (1e6, 1.5 + 0.5j, -0.5j), (3e6, 0.25 - 1j, 1.0), (2e6, -0.75, 0.5 + 0.5j)]
+
+def prepare(femmModule='femm'):
+    # Writes the planar model of design 4 in the working directory and
+    # returns the inductor and the parameters
+    simParam = SimulationParameters()
+    simParam.NUM_WORKERS = 3
+    simParam.FEMM_MODULE = femmModule
+    simParam.FEMM_MODULE_PATH = fakeFolder
+    simParam.WRITE_FEM_FILES = 1
+    simParam.verbose = 0
+    myind = designs(4, simParam)
+    getSolverBackend(simParam).draw(myind, 0, simParam)
+    return myind, simParam
+
+def test_order_and_files(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    myind, simParam = prepare()
+    rawFile = myind.filename_planar
+    results = solveHarmonicsParallel(jobs, myind, 0, rawFile, myind.centers_planar, myind.names_planar, simParam)
+    
+    assert len(results) == len(jobs)
+    numAreas = len(myind.names_planar)
+    for (freq, amp1, amp2), (circuits, bx, by, vol) in zip(jobs, results):
+        # Results of the stand-in for this harmonic (see tests/fakefemm)
+        assert np.allclose(circuits['Al'][:, 0], amp1)
+        assert np.allclose(circuits['Al'][:, 2], fakefemm.L * amp1)
+        assert np.allclose(circuits['Ar'][:, 0], -amp1)
+        assert np.allclose(circuits['Bl'][:, 0], amp2)
+        assert np.allclose(vol, 1e-9)
+        assert np.allclose(bx[:numAreas], 1e-3 * (myind.centers_planar[0, :numAreas] + freq / 1e6) * amp1)
+        assert np.allclose(by[:numAreas], 1e-3 * myind.centers_planar[1, :numAreas] * amp1)
+        # The solved files are next to rawFile
+        freqfile = getHarmonicFile(myind, 0, rawFile, freq, amp1, amp2, simParam)
+        assert os.path.dirname(freqfile) == os.path.dirname(rawFile)
+        assert os.path.isfile(f"{freqfile}.fem")
+        assert os.path.isfile(f"{freqfile}.ans")
+    # The working directories of the workers are removed
+    assert glob.glob(f"{glob.escape(rawFile)}_worker*") == []
+
+def test_failed_worker(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    myind, simParam = prepare('missingfemm')
+    with pytest.raises(Exception, match='Worker for .* MHz failed'):
+        solveHarmonicsParallel(jobs[:2], myind, 0, myind.filename_planar, myind.centers_planar,
+                               myind.names_planar, simParam)
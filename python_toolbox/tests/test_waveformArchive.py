@@ -0,0 +1,44 @@
+# This file is part of the Planar Inductor Toolbox
+# Copyright (C) 2025 Adrian Keil
+# 
+# The Planar Inductor Toolbox is free software: you can redistribute it 
+# and/or modify it under the terms of the GNU General Public License as 
+# published by the Free Software Foundation, either version 3 of the 
+# License, or (at your option) any later version.
+# 
+# The Planar Inductor Toolbox is distributed in the hope that it will be
+# useful, but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+# 
+# You should have received a copy of the GNU General Public License
+# along with this program.  
+# If not, see https://www.gnu.org/licenses/gpl-3.0.html
+
+# Checks that the waveforms of a saved design are read back from the archive
+# (see waveformArchive) for both simulations.
+
+import numpy as np
+
+from simulationParameters import SimulationParameters
+from simulateDesign import simulateDesign
+from waveformArchive import loadDesign, waveformNames
+
+def test_load_both_simulations(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    simParam = SimulationParameters()
+    simParam.SOLVER_BACKEND = 'analytical'
+    simParam.SIMULATIONS = [1, 1]
+    simParam.SHOWPLOTS = 0
+    simParam.SHOWDESIGN = 0
+    result = simulateDesign(4, simParam, save=True)
+    written = [{name: np.array(getattr(res, name)) for name in waveformNames} for res in result]
+    
+    data = loadDesign(tmp_path / simParam.datafolder / 'Four-pole, curved winding.pkl')
+    for simnum, res in enumerate(data['result']):
+        assert sorted(res.waveform_files) == sorted(waveformNames)
+        for name in waveformNames:
+            assert res.waveform_files[name].endswith(f"{name}_{simnum}.npy")
+            assert np.array_equal(getattr(res, name), written[simnum][name])
+    # The planar and axisymmetric models have a different number of areas
+    assert data['result'][0].bx_waveform_linear.shape != data['result'][1].bx_waveform_linear.shape
@@ -0,0 +1,78 @@
+# This file is part of the Planar Inductor Toolbox
+# Copyright (C) 2025 Adrian Keil
+# 
+# The Planar Inductor Toolbox is free software: you can redistribute it 
+# and/or modify it under the terms of the GNU General Public License as 
+# published by the Free Software Foundation, either version 3 of the 
+# License, or (at your option) any later version.
+# 
+# The Planar Inductor Toolbox is distributed in the hope that it will be
+# useful, but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+# 
+# You should have received a copy of the GNU General Public License
+# along with this program.  
+# If not, see https://www.gnu.org/licenses/gpl-3.0.html
+
+# Compares the FEMM files written by writeFemFile and writeFemVariant with
+# the reference files in tests/reference. After an intended change of the
+# file format, the reference files are recreated by running this file:
+# python tests/test_writeFemFile.py
+
+import os
+import sys
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from simulationParameters import SimulationParameters
+from designs import designs
+from writeFemFile import writeFemFile, writeFemVariant
+from solveHarmonic import getHarmonicCurrents
+
+referenceFolder = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'reference')
+
+def writeTestFiles(folder):
+    # Writes the planar and axisymmetric file of design 4 and a harmonic of
+    # the planar file to folder and returns their names
+    cwd = os.getcwd()
+    # SimulationParameters creates its folders in the working directory
+    os.chdir(folder)
+    try:
+        simParam = SimulationParameters()
+        myind = designs(4, simParam)
+    finally:
+        os.chdir(cwd)
+    files = ['planar.fem', 'axi.fem', 'planar_f2MHz.fem']
+    writeFemFile(myind, 0, simParam, os.path.join(folder, files[0]))
+    writeFemFile(myind, 1, simParam, os.path.join(folder, files[1]))
+    writeFemVariant(os.path.join(folder, files[0]), os.path.join(folder, files[2]), 2e6,
+                    getHarmonicCurrents(myind, 0, 1.5 + 0.25j, -0.75 + 1j))
+    return files
+
+def test_writeFemFile(tmp_path):
+    for name in writeTestFiles(str(tmp_path)):
+        with open(os.path.join(tmp_path, name)) as f:
+            written = f.read().splitlines()
+        with open(os.path.join(referenceFolder, name)) as f:
+            reference = f.read().splitlines()
+        assert written == reference, f"{name} differs from the reference file"
+
+def test_writeFemVariant(tmp_path):
+    # Only the frequency and the currents differ from the base file
+    writeTestFiles(str(tmp_path))
+    with open(os.path.join(tmp_path, 'planar.fem')) as f:
+        base = f.read().splitlines()
+    with open(os.path.join(tmp_path, 'planar_f2MHz.fem')) as f:
+        variant = f.read().splitlines()
+    assert len(base) == len(variant)
+    changed = [line.split('=')[0].strip() for line, other in zip(base, variant) if line != other]
+    assert changed[0] == '[Frequency]'
+    assert set(changed[1:]) == {'<TotalAmps_re>', '<TotalAmps_im>'}
+
+if __name__ == '__main__':
+    import tempfile
+    import shutil
+    with tempfile.TemporaryDirectory() as folder:
+        for name in writeTestFiles(folder):
+            shutil.copy(os.path.join(folder, name), os.path.join(referenceFolder, name))
@@ -0,0 +1,125 @@
+# This file is part of the Planar Inductor Toolbox
+# Copyright (C) 2025 Adrian Keil
+# 
+# The Planar Inductor Toolbox is free software: you can redistribute it 
+# and/or modify it under the terms of the GNU General Public License as 
+# published by the Free Software Foundation, either version 3 of the 
+# License, or (at your option) any later version.
+# 
+# The Planar Inductor Toolbox is distributed in the hope that it will be
+# useful, but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+# 
+# You should have received a copy of the GNU General Public License
+# along with this program.  
+# If not, see https://www.gnu.org/licenses/gpl-3.0.html
+
+import numpy as np
+
+# Fits the rational model
+#     H(s) = sum_k r_k / (s - a_k) + d + s * e
+# to the frequency responses H (frequencies x responses) sampled at the
+# angular frequencies omega (s = j*omega) using vector fitting
+# (Gustavsen/Semlyen). All responses share the same numPoles poles, which
+# are relocated in the given number of iterations. Poles are either real or
+# complex-conjugate pairs. Eddy-current problems mostly lead to real poles,
+# so the starting poles are real and spread logarithmically over the
+# frequency range.
+# Returns the model as a dictionary (poles, residues, d, e). Complex poles
+# are stored once (positive imaginary part), their conjugate is implied.
+def vectorFit(omega, H, numPoles, iterations=10):
+    omega = np.asarray(omega, dtype=float)
+    H = np.asarray(H, dtype=complex)
+    if H.ndim == 1:
+        H = H[:, None]
+    # Normalize the frequency and each response for a well-conditioned fit
+    omega0 = np.max(omega)
+    s = 1j * omega / omega0
+    scale = np.max(np.abs(H), axis=0)
+    scale[scale == 0] = 1
+    Hn = H / scale
+    
+    poles = -np.geomspace(np.min(omega), omega0, numPoles) / omega0 + 0j
+    
+    for _ in range(iterations):
+        phi = _rationalBasis(s, poles)
+        # For each response: H*sigma = phi*c + d + s*e with the shared
+        # weighting function sigma = phi*c_sigma + 1. The response-specific
+        # unknowns are eliminated with a QR decomposition, only the rows
+        # belonging to c_sigma are stacked.
+        rows = []
+        rhs = []
+        for m in range(Hn.shape[1]):
+            A = np.hstack([phi, np.ones((len(s), 1)), s[:, None], -Hn[:, m:m+1] * phi])
+            A = np.vstack([A.real, A.imag])
+            b = np.concatenate([Hn[:, m].real, Hn[:, m].imag])
+            Q, R = np.linalg.qr(A)
+            rows.append(R[numPoles+2:, numPoles+2:])
+            rhs.append(Q[:, numPoles+2:].T @ b)
+        c_sigma = np.linalg.lstsq(np.vstack(rows), np.concatenate(rhs), rcond=None)[0]
+        # The zeros of sigma are the new poles
+        Lambda = np.zeros((numPoles, numPoles))
+        bvec = np.zeros(numPoles)
+        k = 0
+        for a in poles:
+            if a.imag == 0:
+                Lambda[k, k] = a.real
+                bvec[k] = 1
+                k += 1
+            else:
+                Lambda[k:k+2, k:k+2] = [[a.real, a.imag], [-a.imag, a.real]]
+                bvec[k] = 2
+                k += 2
+        zeros = np.linalg.eigvals(Lambda - np.outer(bvec, c_sigma))
+        # Keep one pole per pair and flip unstable poles
+        isReal = np.abs(zeros.imag) <= 1e-9 * np.abs(zeros)
+        zeros = np.concatenate([zeros[isReal].real + 0j, zeros[~isReal & (zeros.imag > 0)]])
+        poles = np.sort_complex(-np.abs(zeros.real) + 1j * zeros.imag)
+    
+    # Residues, d and e for the final poles
+    phi = _rationalBasis(s, poles)
+    A = np.hstack([phi, np.ones((len(s), 1)), s[:, None]])
+    A = np.vstack([A.real, A.imag])
+    B = np.vstack([Hn.real, Hn.imag])
+    x = np.linalg.lstsq(A, B, rcond=None)[0]
+    
+    residues = np.zeros((len(poles), Hn.shape[1]), dtype=complex)
+    k = 0
+    for i, a in enumerate(poles):
+        if a.imag == 0:
+            residues[i, :] = x[k, :]
+            k += 1
+        else:
+            residues[i, :] = x[k, :] + 1j * x[k+1, :]
+            k += 2
+    
+    model = {}
+    model['poles'] = poles * omega0
+    model['residues'] = residues * scale * omega0
+    model['d'] = x[numPoles, :] * scale
+    model['e'] = x[numPoles+1, :] * scale / omega0
+    return model
+
+# Evaluates the rational model created by vectorFit at the angular
+# frequencies omega. Returns an array (frequencies x responses)
+def evalRational(model, omega):
+    s = 1j * np.atleast_1d(np.asarray(omega, dtype=float))[:, None, None]
+    poles = model['poles'][None, :, None]
+    residues = model['residues'][None, :, :]
+    # Complex poles also contribute their conjugate
+    conjugate = np.where(poles.imag != 0, np.conj(residues) / (s - np.conj(poles)), 0)
+    H = np.sum(residues / (s - poles) + conjugate, axis=1)
+    return H + model['d'][None, :] + s[:, 0, :] * model['e'][None, :]
+
+# Basis functions with real coefficients: 1/(s-a) for real poles and
+# 1/(s-a) + 1/(s-a*) and j/(s-a) - j/(s-a*) for complex poles a
+def _rationalBasis(s, poles):
+    columns = []
+    for a in poles:
+        if a.imag == 0:
+            columns.append(1 / (s - a))
+        else:
+            columns.append(1 / (s - a) + 1 / (s - np.conj(a)))
+            columns.append(1j / (s - a) - 1j / (s - np.conj(a)))
+    return np.column_stack(columns)
@@ -0,0 +1,74 @@
+# This file is part of the Planar Inductor Toolbox
+# Copyright (C) 2025 Adrian Keil
+# 
+# The Planar Inductor Toolbox is free software: you can redistribute it 
+# and/or modify it under the terms of the GNU General Public License as 
+# published by the Free Software Foundation, either version 3 of the 
+# License, or (at your option) any later version.
+# 
+# The Planar Inductor Toolbox is distributed in the hope that it will be
+# useful, but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+# 
+# You should have received a copy of the GNU General Public License
+# along with this program.  
+# If not, see https://www.gnu.org/licenses/gpl-3.0.html
+
+import os
+import pickle
+import numpy as np
+
+# Waveforms of a Result (areas x samples) that are stored in the archive
+waveformNames = ['bx_waveform', 'by_waveform', 'bx_waveform_linear', 'by_waveform_linear']
+
+# Name of the archive in the data folder. Each design has its own folder with
+# one .npy file per simulation and waveform
+archiveName = 'waveforms'
+
+def archiveWaveforms(result, datafolder, design):
+    # Writes the waveforms of the results of a design (result[0] for planar,
+    # result[1] for axi) to the archive and keeps the file of each waveform
+    # (relative to datafolder) in result[simnum].waveform_files. When the
+    # results are pickled, only these files are stored instead of the
+    # waveforms (see Result and loadDesign).
+    for simnum, res in enumerate(result):
+        if res is None:
+            continue
+        # Each result needs its own files (result[1] starts as a copy of
+        # result[0] and shares its dictionary)
+        res.waveform_files = dict(res.waveform_files)
+        for name in waveformNames:
+            waveform = getattr(res, name, None)
+            if not isinstance(waveform, np.ndarray) or waveform.size == 0:
+                continue
+            filename = getWaveformFile(datafolder, design, simnum, name)
+            os.makedirs(os.path.dirname(filename), exist_ok=True)
+            # Write to a temporary file first, so there is never a half-written
+            # waveform in the archive
+            np.save(f"{filename[:-4]}_tmp.npy", np.ascontiguousarray(waveform))
+            os.replace(f"{filename[:-4]}_tmp.npy", filename)
+            res.waveform_files[name] = os.path.relpath(filename, datafolder)
+
+def loadDesign(filepath):
+    # Loads a saved design (dictionary with mywinding, myind, result and
+    # simParam). The archived waveforms of its results are resolved against
+    # the folder of filepath, so the data folder may be moved or opened from
+    # any working directory
+    with open(filepath, 'rb') as f:
+        data = pickle.load(f)
+    for res in data['result']:
+        if res is not None:
+            res.archive_root = os.path.dirname(os.path.abspath(filepath))
+    return data
+
+def openWaveform(datafolder, design, simnum, name):
+    # Returns a waveform of a design from the archive without loading it.
+    # The array is memory-mapped, so only the parts that are used are read
+    # (e.g. openWaveform(...)[area, :] only reads the samples of one area)
+    return np.load(getWaveformFile(datafolder, design, simnum, name), mmap_mode='r')
+
+def getWaveformFile(datafolder, design, simnum, name):
+    # Returns the file of a waveform of a design (file name of the design
+    # without .pkl) in the archive
+    return os.path.join(datafolder, archiveName, design, f"{name}_{simnum}.npy")
@@ -0,0 +1,215 @@
+# This file is part of the Planar Inductor Toolbox
+# Copyright (C) 2025 Adrian Keil
+# 
+# The Planar Inductor Toolbox is free software: you can redistribute it 
+# and/or modify it under the terms of the GNU General Public License as 
+# published by the Free Software Foundation, either version 3 of the 
+# License, or (at your option) any later version.
+# 
+# The Planar Inductor Toolbox is distributed in the hope that it will be
+# useful, but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+# 
+# You should have received a copy of the GNU General Public License
+# along with this program.  
+# If not, see https://www.gnu.org/licenses/gpl-3.0.html
+
+import re
+import numpy as np
+
+def writeFemFile(myind, simnum, simParam, filename):
+    # Writes the FEMM file of the planar (simnum == 0) or axisymmetric
+    # (simnum == 1) simulation of myind directly (without FEMM). The model
+    # is the same as drawn by drawPlanarInductor and
+    # drawAxisymmetricInductor: Core rectangles, air labels, the conductors
+    # of the windings and one parallel circuit per turn with the same
+    # currents. The only difference is the open boundary: Instead of the
+    # shells of mi_makeABC, the circle (half circle for axisymmetric) with
+    # the same radius has an asymptotic (mixed) boundary condition.
+    # The rectangles must not overlap but may touch. Corners on the edges of
+    # other rectangles are connected like FEMM does it when drawing.
+    if simnum == 0:
+        rects = np.asarray(myind.rects_planar, dtype=float)
+        centers = myind.centers_planar
+        air = np.asarray(myind.air_planar, dtype=float).reshape(-1, 2)
+    else:
+        rects = np.asarray(myind.rects_axi, dtype=float)
+        centers = myind.centers_axi
+        air = np.asarray(myind.air_axi, dtype=float).reshape(-1, 2)
+    conductorRects, conductorCircuits = myind.getConductors(simnum, simParam)
+    conductorRects = np.asarray(conductorRects, dtype=float)
+    radius = np.max(np.abs(rects[:, :, 0])) * 2
+    
+    # Circuits in the order of drawPlanarInductor/drawAxisymmetricInductor
+    circuits = {}
+    for i in range(1, myind.turns + 1):
+        if simnum == 0:
+            circuits[f'Al{i}'] = simParam.iout_avg / 2
+            circuits[f'Ar{i}'] = -simParam.iout_avg / 2
+            # For some reason there is an error in FEMM when using zero current
+            circuits[f'Bl{i}'] = 0.0001
+            circuits[f'Br{i}'] = 0.0001
+        else:
+            circuits[str(i)] = simParam.iout_avg / 2
+    circuitIndex = {name: i + 1 for i, name in enumerate(circuits)}
+    
+    # Geometry: Corners and edges of all rectangles and the open boundary
+    allRects = np.concatenate([rects, conductorRects])
+    corners = []
+    edges = []
+    for rect in allRects:
+        x0, x1 = np.sort(rect[:, 0])
+        y0, y1 = np.sort(rect[:, 1])
+        corners = corners + [(x0, y0), (x1, y0), (x1, y1), (x0, y1)]
+        edges = edges + [((x0, y0), (x1, y0)), ((x1, y0), (x1, y1)), ((x0, y1), (x1, y1)), ((x0, y0), (x0, y1))]
+    if simnum == 0:
+        boundary = [(radius, 0), (-radius, 0)]
+        arcs = [(boundary[0], boundary[1]), (boundary[1], boundary[0])]
+    else:
+        boundary = [(0, -radius), (0, radius)]
+        arcs = [(boundary[0], boundary[1])]
+        # The axis closes the half circle
+        edges.append((boundary[0], boundary[1]))
+    points, segments = _getPslg(corners + boundary, edges)
+    pointIndex = {point: i for i, point in enumerate(points)}
+    
+    # Block labels: [x, y, block property, mesh size, circuit, turns]
+    labels = []
+    for i in range(rects.shape[0]):
+        labels.append([centers[0, i], centers[1, i], 3, _getMeshSize(simParam.CORE_AUTOMESH, simParam.CORE_MESHSIZE), 0, 0])
+    for point in air:
+        labels.append([point[0], point[1], 1, _getMeshSize(simParam.AIR_AUTOMESH, simParam.AIR_MESHSIZE), 0, 0])
+    for rect, name in zip(conductorRects, conductorCircuits):
+        center = np.mean(rect, axis=0)
+        labels.append([center[0], center[1], 2, _getMeshSize(simParam.COPPER_AUTOMESH, simParam.COPPER_MESHSIZE), circuitIndex[name], 1])
+    
+    # Core material, optionally with BH-curve (data is in mT, so rescale to
+    # T). The permeability is only a placeholder if the BH-curve is used
+    if simParam.USE_BHCURVE:
+        coreMu = 2100
+        bhcurve = np.array(myind.material.bhcurve, dtype=float).reshape(-1, 2) * [1e-3, 1]
+    else:
+        coreMu = myind.material.mu
+        bhcurve = np.zeros((0, 2))
+    # Air and Copper as in the FEMM material library: [name, relative
+    # permeability, conductivity in MS/m, BH-curve]
+    materials = [['Air', 1, 0, np.zeros((0, 2))],
+                 ['Copper', 1, 58, np.zeros((0, 2))],
+                 ['Core', coreMu, 0, bhcurve]]
+    
+    lines = ['[Format]      =  4.0',
+             '[Frequency]   =  ' + _formatNumber(simParam.target_fs),
+             '[Precision]   =  1e-08',
+             '[MinAngle]    =  30',
+             '[DoSmartMesh] =  1',
+             '[Depth]       =  ' + _formatNumber(myind.depth_planar if simnum == 0 else 0),
+             '[LengthUnits] =  millimeters',
+             '[ProblemType] =  ' + ('planar' if simnum == 0 else 'axisymmetric'),
+             '[Coordinates] =  cartesian',
+             '[ACSolver]    =  0',
+             '[Comment]     =  "Written by writeFemFile"',
+             '[PointProps]  = 0',
+             '[BdryProps]   = 1',
+             # Asymptotic boundary condition c0 = 1/(mu0*r) with r in m
+             *_formatProperty('Bdry', [('BdryName', '"ABC"'), ('BdryType', 2), ('A_0', 0), ('A_1', 0), ('A_2', 0),
+                                       ('Phi', 0), ('c0', 1 / (simParam.mu0 * radius * 1e-3)), ('c0i', 0), ('c1', 0),
+                                       ('c1i', 0), ('Mu_ssd', 0), ('Sigma_ssd', 0), ('innerangle', 0), ('outerangle', 0)]),
+             '[BlockProps]  = 3']
+    for name, mu, sigma, bh in materials:
+        lines = lines + _formatProperty('Block', [('BlockName', f'"{name}"'), ('Mu_x', mu), ('Mu_y', mu), ('H_c', 0),
+                                                   ('H_cAngle', 0), ('J_re', 0), ('J_im', 0), ('Sigma', sigma),
+                                                   ('d_lam', 0), ('Phi_h', 0), ('Phi_hx', 0), ('Phi_hy', 0),
+                                                   ('LamType', 0), ('LamFill', 1), ('NStrands', 0), ('WireD', 0),
+                                                   ('BHPoints', len(bh))],
+                                        [f'\t{_formatNumber(b)}\t{_formatNumber(h)}' for b, h in bh])
+    lines.append(f'[CircuitProps]  = {len(circuits)}')
+    for name, current in circuits.items():
+        lines = lines + _formatProperty('Circuit', [('CircuitName', f'"{name}"'), ('TotalAmps_re', np.real(current)),
+                                                     ('TotalAmps_im', np.imag(current)), ('CircuitType', 0)])
+    lines.append(f'[NumPoints] = {len(points)}')
+    lines = lines + [f'{_formatNumber(x)}\t{_formatNumber(y)}\t0\t0' for x, y in points]
+    lines.append(f'[NumSegments] = {len(segments)}')
+    lines = lines + [f'{n0}\t{n1}\t-1\t0\t0\t0' for n0, n1 in segments]
+    lines.append(f'[NumArcSegments] = {len(arcs)}')
+    lines = lines + [f'{pointIndex[_roundPoint(p0)]}\t{pointIndex[_roundPoint(p1)]}\t180\t1\t1\t0\t0' for p0, p1 in arcs]
+    lines.append('[NumHoles] = 0')
+    lines.append(f'[NumBlockLabels] = {len(labels)}')
+    lines = lines + [f'{_formatNumber(x)}\t{_formatNumber(y)}\t{block}\t{_formatNumber(meshSize)}\t{circuit}\t0\t0\t{turns}\t0'
+                     for x, y, block, meshSize, circuit, turns in labels]
+    
+    with open(filename, 'w') as f:
+        f.write('\n'.join(lines) + '\n')
+
+def writeFemVariant(baseFile, filename, freq, currents):
+    # Writes a copy of the FEMM file baseFile with a different frequency and
+    # the currents given in the dictionary currents (circuit name: complex
+    # amplitude). Everything else stays as in baseFile.
+    with open(baseFile) as f:
+        text = f.read()
+    text = re.sub(r'(\[Frequency\]\s*=\s*)\S+', lambda m: m.group(1) + _formatNumber(freq), text, count=1)
+    for name, current in currents.items():
+        # Replace the current within the block of the circuit
+        pattern = r'(<CircuitName>\s*=\s*"' + re.escape(name) + r'"(?:(?!<EndCircuit>).)*?<TotalAmps_re>\s*=\s*)\S+(\s*<TotalAmps_im>\s*=\s*)\S+'
+        text, count = re.subn(pattern, lambda m: m.group(1) + _formatNumber(np.real(current)) + m.group(2) + _formatNumber(np.imag(current)),
+                              text, count=1, flags=re.DOTALL)
+        if count == 0:
+            raise Exception(f"Circuit '{name}' not found in {baseFile}")
+    with open(filename, 'w') as f:
+        f.write(text)
+
+def _getPslg(points, edges):
+    # Returns the unique points and the segments (pairs of point indices)
+    # between them. Edges are split at every point that lies on them, so
+    # touching rectangles share their segments. Edges are horizontal or
+    # vertical.
+    unique = []
+    for point in points:
+        point = _roundPoint(point)
+        if point not in unique:
+            unique.append(point)
+    coords = np.array(unique)
+    tol = 1e-6
+    segments = []
+    for p0, p1 in edges:
+        # Points on the line of the edge, sorted along the edge
+        axis = 0 if abs(p1[1] - p0[1]) < tol else 1
+        low, high = sorted([p0[axis], p1[axis]])
+        onEdge = np.flatnonzero((np.abs(coords[:, 1 - axis] - p0[1 - axis]) < tol) &
+                                (coords[:, axis] > low - tol) & (coords[:, axis] < high + tol))
+        onEdge = onEdge[np.argsort(coords[onEdge, axis])]
+        for n0, n1 in zip(onEdge[:-1], onEdge[1:]):
+            segment = (int(min(n0, n1)), int(max(n0, n1)))
+            if segment not in segments:
+                segments.append(segment)
+    return unique, segments
+
+def _roundPoint(point):
+    # Coordinates of one point that were calculated in different ways differ
+    # slightly, so round them to 1 nm (coordinates are in mm)
+    return (round(float(point[0]), 6), round(float(point[1]), 6))
+
+def _getMeshSize(automesh, meshSize):
+    # FEMM stores automesh as mesh size -1
+    if automesh:
+        return -1
+    return meshSize
+
+def _formatNumber(value):
+    # Shortest representation that is read back exactly
+    value = float(value)
+    if value.is_integer():
+        return str(int(value))
+    return repr(value)
+
+def _formatProperty(kind, fields, extraLines=[]):
+    # Formats one property block (e.g. <BeginBlock> ... <EndBlock>)
+    lines = [f'  <Begin{kind}>']
+    for name, value in fields:
+        if isinstance(value, str):
+            lines.append(f'    <{name}> = {value}')
+        else:
+            lines.append(f'    <{name}> = {_formatNumber(value) if isinstance(value, float) else value}')
+    lines = lines + extraLines
+    lines.append(f'  <End{kind}>')
+    return lines